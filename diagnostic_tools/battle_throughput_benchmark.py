@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""This script measures battle throughput against a local showdown server, for various
+numbers of concurrent battles.
+
+usage:
+python diagnostic_tools/battle_throughput_benchmark.py <n_battles> <n_concurrent> \
+    [<n_concurrent> ...]
+"""
+import asyncio
+import sys
+
+from time import perf_counter
+
+from poke_env.player.random_player import RandomPlayer
+
+
+async def measure(n_battles, n_concurrent_battles):
+    p1 = RandomPlayer(max_concurrent_battles=n_concurrent_battles, log_level=40)
+    p2 = RandomPlayer(max_concurrent_battles=n_concurrent_battles, log_level=40)
+
+    start = perf_counter()
+    await p1.battle_against(p2, n_battles=n_battles)
+    duration = perf_counter() - start
+
+    utilization = p1.battle_scheduler.utilization
+    await p1.stop_listening()
+    await p2.stop_listening()
+    return duration, utilization
+
+
+async def main():
+    n_battles = int(sys.argv[1])
+
+    print("n_concurrent | battles/s | slot utilization")
+    for n_concurrent_battles in [int(n) for n in sys.argv[2:]]:
+        duration, utilization = await measure(n_battles, n_concurrent_battles)
+        print(
+            "%12d | %9.2f | %15.1f%%"
+            % (n_concurrent_battles, n_battles / duration, 100 * utilization)
+        )
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(main())
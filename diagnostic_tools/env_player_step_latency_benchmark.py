@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""This script measures the latency added by EnvPlayer's bridge between the agent
+thread and the event loop, for each call to step.
+
+The event loop simulates a battle sending a new request as soon as an order is
+received, so no server is needed and the measured time only covers the handoff
+between the agent and the player.
+
+usage:
+python diagnostic_tools/env_player_step_latency_benchmark.py <n_steps>
+"""
+import asyncio
+import numpy as np
+import sys
+
+from time import perf_counter
+
+from poke_env.environment.battle import Battle
+from poke_env.environment.move import Move
+from poke_env.player.env_player import Gen8EnvSinglePlayer
+from poke_env.player_configuration import PlayerConfiguration
+
+
+class BenchmarkEnvPlayer(Gen8EnvSinglePlayer):
+    def embed_battle(self, battle):
+        return np.zeros(10)
+
+
+def agent(player, n_steps):
+    latencies = []
+    player.reset()
+    for _ in range(n_steps):
+        start = perf_counter()
+        player.step(0)
+        latencies.append(perf_counter() - start)
+    return np.array(latencies) * 1e6
+
+
+async def main():
+    n_steps = int(sys.argv[1])
+    player = BenchmarkEnvPlayer(
+        player_configuration=PlayerConfiguration("BenchmarkPlayer", None),
+        start_listening=False,
+    )
+    player._loop = asyncio.get_event_loop()
+
+    battle = Battle("battle-gen8randombattle-1", player.username, player.logger)
+    battle._available_moves = [Move("flamethrower")]
+
+    async def simulate_battle():
+        while True:
+            await player.choose_move(battle)
+
+    battle_simulation = asyncio.ensure_future(simulate_battle())
+    latencies = await player._loop.run_in_executor(None, agent, player, n_steps)
+    battle_simulation.cancel()
+
+    print(
+        "step latency over %d steps: mean %.1fus, p50 %.1fus, p99 %.1fus"
+        % (
+            n_steps,
+            latencies.mean(),
+            np.percentile(latencies, 50),
+            np.percentile(latencies, 99),
+        )
+    )
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(main())
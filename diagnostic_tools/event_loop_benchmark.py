@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""This script measures how many battle frames per second a player processes on the
+default asyncio event loop and, if it is installed, on uvloop.
+
+Frames are synthetic battle updates dispatched the same way as frames received from
+showdown, so no server is needed.
+
+usage:
+python diagnostic_tools/event_loop_benchmark.py <n_battles> <n_turns>
+"""
+import asyncio
+import orjson
+import os
+import sys
+
+from time import perf_counter
+
+from poke_env.event_loop import new_event_loop, uvloop_available
+from poke_env.player.random_player import RandomPlayer
+from poke_env.player_configuration import PlayerConfiguration
+
+with open(os.path.join("fixture_data", "example_request.json")) as f:
+    REQUEST = orjson.dumps(orjson.loads(f.read())).decode()
+
+BATTLE_FORMAT = "gen8randombattle"
+
+
+class BenchmarkPlayer(RandomPlayer):
+    async def _send_message(self, *args, **kwargs):
+        pass
+
+
+def battle_frames(battle_id, n_turns):
+    tag = ">battle-%s-%d" % (BATTLE_FORMAT, battle_id)
+    yield "\n".join(
+        [
+            tag,
+            "|init|battle",
+            "|title|BenchmarkPlayer 1 vs. Opponent",
+            "|player|p1|Opponent|1|",
+            "|player|p2|BenchmarkPlayer 1|2|",
+            "|gametype|singles",
+            "|gen|8",
+            "|request|" + REQUEST,
+            "|switch|p1a: Charizard|Charizard, L80, M|100/100",
+            "|switch|p2a: Venusaur|Venusaur, L82, M|139/265",
+            "|turn|1",
+        ]
+    )
+    for turn in range(2, n_turns + 2):
+        yield "\n".join(
+            [
+                tag,
+                "|",
+                "|t:|1",
+                "|move|p1a: Charizard|Air Slash|p2a: Venusaur",
+                "|-damage|p2a: Venusaur|120/265",
+                "|move|p2a: Venusaur|Sludge Bomb|p1a: Charizard",
+                "|-damage|p1a: Charizard|60/100",
+                "|upkeep",
+                "|turn|%d" % turn,
+            ]
+        )
+
+
+async def measure(n_battles, n_turns):
+    player = BenchmarkPlayer(
+        player_configuration=PlayerConfiguration("BenchmarkPlayer 1", None),
+        battle_format=BATTLE_FORMAT,
+        start_listening=False,
+        max_concurrent_battles=0,
+    )
+    player._logged_in.set()
+
+    battles = [battle_frames(i, n_turns) for i in range(n_battles)]
+    frames = [frame for turn in zip(*battles) for frame in turn]
+
+    start = perf_counter()
+    # Frames are handled in their own tasks, as when listening to a websocket
+    await asyncio.gather(*[player._handle_message(frame) for frame in frames])
+    return len(frames), perf_counter() - start
+
+
+def main():
+    n_battles, n_turns = int(sys.argv[1]), int(sys.argv[2])
+
+    loops = [("asyncio", False)]
+    if uvloop_available():
+        loops.append(("uvloop", True))
+    else:
+        print("uvloop is not installed - only the asyncio loop will be measured.")
+
+    print("loop    | frames/s")
+    for name, use_uvloop in loops:
+        loop = new_event_loop(use_uvloop)
+        # Players bind their primitives to the current loop when created
+        asyncio.set_event_loop(loop)
+        n_frames, duration = loop.run_until_complete(measure(n_battles, n_turns))
+        loop.close()
+        print("%-7s | %8.0f" % (name, n_frames / duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""This script measures MCTSPlayer's search throughput, in rollouts per second and per
+core, on a full six versus six battle.
+
+Searches run for a fixed time budget with an increasing number of worker processes,
+so no server is needed. The compilation of the forward model is measured separately.
+
+usage:
+python diagnostic_tools/mcts_rollout_benchmark.py <time_budget> <max_workers>
+"""
+import logging
+import sys
+
+from time import perf_counter
+
+from poke_env.environment.battle import Battle
+from poke_env.environment.forward_model import ForwardModel
+from poke_env.environment.pokemon import Pokemon
+from poke_env.player.mcts_player import MCTSPlayer
+
+TEAM = {
+    "garchomp": ["earthquake", "outrage", "stoneedge", "swordsdance"],
+    "ferrothorn": ["powerwhip", "gyroball", "leechseed", "spikes"],
+    "rotomwash": ["hydropump", "voltswitch", "willowisp", "painsplit"],
+    "clefable": ["moonblast", "softboiled", "calmmind", "flamethrower"],
+    "dragapult": ["dracometeor", "shadowball", "uturn", "fireblast"],
+    "toxapex": ["scald", "toxic", "recover", "haze"],
+}
+OPPONENT_TEAM = {
+    "heatran": ["magmastorm", "earthpower", "flashcannon", "toxic"],
+    "landorustherian": ["earthquake", "uturn", "stoneedge", "stealthrock"],
+    "tapukoko": ["thunderbolt", "dazzlinggleam", "voltswitch", "roost"],
+    "corviknight": ["bravebird", "bodypress", "roost", "defog"],
+    "blissey": ["seismictoss", "softboiled", "thunderwave", "toxic"],
+    "kartana": ["leafblade", "sacredsword", "knockoff", "swordsdance"],
+}
+
+
+def create_team(sets, role):
+    team = {}
+    for i, (species, moves) in enumerate(sets.items()):
+        mon = Pokemon(species=species)
+        mon._set_hp("100/100")
+        mon._active = i == 0
+        for move in moves:
+            mon._add_move(move)
+        team["%s: %s" % (role, species)] = mon
+    return team
+
+
+def create_battle():
+    battle = Battle("battle-gen8ou-1", "BenchmarkPlayer", logging.getLogger())
+    battle._player_role = "p1"
+    battle._team = create_team(TEAM, "p1")
+    battle._opponent_team = create_team(OPPONENT_TEAM, "p2")
+    battle._team_size = {"p1": 6, "p2": 6}
+    battle._available_moves = list(battle.active_pokemon.moves.values())
+    battle._available_switches = [mon for mon in battle.team.values() if not mon.active]
+    return battle
+
+
+def main():
+    time_budget = float(sys.argv[1])
+    max_workers = int(sys.argv[2])
+    battle = create_battle()
+
+    start = perf_counter()
+    n_compilations = 20
+    for _ in range(n_compilations):
+        model = ForwardModel(battle)
+    compilation_time = (perf_counter() - start) / n_compilations
+    print("forward model compilation: %.1fms" % (compilation_time * 1000))
+
+    for n_workers in range(1, max_workers + 1):
+        player = MCTSPlayer(
+            start_listening=False, n_workers=n_workers, time_budget=time_budget
+        )
+        # Warms up the process pool
+        player.search(model)
+
+        start = perf_counter()
+        player.search(model)
+        duration = perf_counter() - start
+        player.close()
+
+        rollouts_per_second = player.last_n_rollouts / duration
+        print(
+            "%d worker(s): %d rollouts in %.2fs, %.0f rollouts/s, %.0f rollouts/s/core"
+            % (
+                n_workers,
+                player.last_n_rollouts,
+                duration,
+                rollouts_per_second,
+                rollouts_per_second / n_workers,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -27,7 +27,10 @@ with open("requirements.txt") as requirements:
     REQUIRED = requirements.read().split("\n")
 
 # What packages are optional?
-EXTRAS = {}
+EXTRAS = {
+    "gymnasium": ["gymnasium>=1.1; python_version >= '3.8'"],
+    "uvloop": ["uvloop; sys_platform != 'win32'"],
+}
 
 # The rest you shouldn't have to touch too much :)
 # ------------------------------------------------
@@ -3,6 +3,7 @@
 """
 import poke_env.data as data
 import poke_env.environment as environment
+import poke_env.event_loop as event_loop
 import poke_env.exceptions as exceptions
 import poke_env.player as player
 import poke_env.player_configuration as player_configuration
@@ -20,9 +21,12 @@ __stream_handler.setFormatter(__formatter)
 __logger.addHandler(__stream_handler)
 logging.addLevelName(25, "PS_ERROR")
 
+event_loop._set_event_loop_policy_from_environment()
+
 __all__ = [
     "data",
     "environment",
+    "event_loop",
     "exceptions",
     "player",
     "player_configuration",
@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
 from poke_env.environment import abstract_battle
 from poke_env.environment import battle
+from poke_env.environment import damage_calculator
 from poke_env.environment import double_battle
 from poke_env.environment import effect
 from poke_env.environment import field
+from poke_env.environment import forward_model
 from poke_env.environment import move_category
 from poke_env.environment import move
 from poke_env.environment import pokemon_gender
 from poke_env.environment import pokemon_type
 from poke_env.environment import pokemon
+from poke_env.environment import set_inference
 from poke_env.environment import side_condition
 from poke_env.environment import status
 from poke_env.environment import weather
@@ -18,14 +21,17 @@ from poke_env.environment import z_crystal
 __all__ = [
     "abstract_battle",
     "battle",
+    "damage_calculator",
     "double_battle",
     "effect",
     "field",
+    "forward_model",
     "move_category",
     "move",
     "pokemon_gender",
     "pokemon_type",
     "pokemon",
+    "set_inference",
     "side_condition",
     "status",
     "weather",
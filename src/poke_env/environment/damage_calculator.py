@@ -0,0 +1,487 @@
+# -*- coding: utf-8 -*-
+"""This module defines a deterministic damage calculator, following the damage
+formula of generations 5 to 8.
+"""
+
+import numpy as np  # pyre-ignore
+
+from collections import namedtuple
+from typing import Dict
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from poke_env.data import TYPE_CHART
+from poke_env.data import UNKNOWN_ITEM
+from poke_env.environment.abstract_battle import AbstractBattle
+from poke_env.environment.double_battle import DoubleBattle
+from poke_env.environment.field import Field
+from poke_env.environment.move import Move
+from poke_env.environment.move_category import MoveCategory
+from poke_env.environment.pokemon import Pokemon
+from poke_env.environment.pokemon_type import PokemonType
+from poke_env.environment.side_condition import SideCondition
+from poke_env.environment.status import Status
+from poke_env.environment.weather import Weather
+from poke_env.utils import _raw_hp
+from poke_env.utils import _raw_stat
+from poke_env.utils import to_id_str
+
+DamageRange = namedtuple("DamageRange", ["min", "max", "expected"])
+"""Damage dealt by a move, in hp points. Represented with a tuple with three entries:
+the minimum, maximum and expected damage over random rolls and number of hits. Entries
+are floats, or arrays of floats when returned by DamageCalculator.damage_matrix."""
+
+# Static move data used by the calculator, cached as Move properties are computed from
+# data entries on each access
+_MoveData = namedtuple(
+    "_MoveData",
+    [
+        "base_power",
+        "category",
+        "damage",
+        "defensive_category",
+        "expected_hits",
+        "id",
+        "n_hit",
+        "type",
+        "use_target_offensive",
+    ],
+)
+
+_TYPES = list(PokemonType)
+_TYPE_INDEX = {pokemon_type: i for i, pokemon_type in enumerate(_TYPES)}
+
+# Attacking type x defending type. The last column, for missing second types, is
+# neutral
+_TYPE_CHART = np.array(
+    [
+        [TYPE_CHART[attacking.name][defending.name] for defending in _TYPES] + [1.0]
+        for attacking in _TYPES
+    ]
+)
+_NO_TYPE = len(_TYPES)
+
+_ROLLS = np.arange(85, 101, dtype=np.int64)
+
+_IMMUNITY_ABILITIES = {
+    "dryskin": PokemonType.WATER,
+    "flashfire": PokemonType.FIRE,
+    "levitate": PokemonType.GROUND,
+    "lightningrod": PokemonType.ELECTRIC,
+    "motordrive": PokemonType.ELECTRIC,
+    "sapsipper": PokemonType.GRASS,
+    "stormdrain": PokemonType.WATER,
+    "voltabsorb": PokemonType.ELECTRIC,
+    "waterabsorb": PokemonType.WATER,
+}
+_MOLD_BREAKER_ABILITIES = {"moldbreaker", "teravolt", "turboblaze"}
+_SCREENS = {
+    MoveCategory.PHYSICAL: (SideCondition.REFLECT, SideCondition.AURORA_VEIL),
+    MoveCategory.SPECIAL: (SideCondition.LIGHT_SCREEN, SideCondition.AURORA_VEIL),
+}
+_TERRAIN_TYPES = {
+    Field.ELECTRIC_TERRAIN: PokemonType.ELECTRIC,
+    Field.GRASSY_TERRAIN: PokemonType.GRASS,
+    Field.PSYCHIC_TERRAIN: PokemonType.PSYCHIC,
+}
+_WEATHER_MODIFIERS = {
+    Weather.DESOLATELAND: {PokemonType.FIRE: 1.5, PokemonType.WATER: 0.0},
+    Weather.PRIMORDIALSEA: {PokemonType.FIRE: 0.0, PokemonType.WATER: 1.5},
+    Weather.RAINDANCE: {PokemonType.FIRE: 0.5, PokemonType.WATER: 1.5},
+    Weather.SUNNYDAY: {PokemonType.FIRE: 1.5, PokemonType.WATER: 0.5},
+}
+
+
+def _boost_multiplier(boost: int) -> float:
+    if boost >= 0:
+        return (2 + boost) / 2
+    return 2 / (2 - boost)
+
+
+def _poke_round(values: np.ndarray) -> np.ndarray:
+    # Rounds halves down, as the games do
+    return np.ceil(values - 0.5)
+
+
+class DamageCalculator:
+    """Computes the damage dealt by moves, from pokemons' stats, boosts, levels, types,
+    items and abilities, as well as the battle's weather, fields and screens.
+
+    Stats that are not known - those of the opponent's pokemons - are estimated from
+    base stats and levels, with the given IVs and EVs and a neutral nature. Unknown
+    items and abilities are ignored, unless a species has a single possible ability.
+
+    The most common damage modifiers are supported, but critical hits, moves whose
+    base power depends on the battle's state and rarer items and abilities are not.
+    Expected damage is averaged over the random rolls and the number of hits, but does
+    not take accuracy into account.
+    """
+
+    def __init__(self, evs: int = 84, ivs: int = 31) -> None:
+        """
+        :param evs: The EVs assumed in each stat when estimating unknown stats.
+            Defaults to 84, as in random battles.
+        :type evs: int
+        :param ivs: The IVs assumed in each stat when estimating unknown stats.
+            Defaults to 31.
+        :type ivs: int
+        """
+        self._evs = evs
+        self._ivs = ivs
+        self._move_data: Dict[Tuple[type, str], _MoveData] = {}
+
+    @staticmethod
+    def _ability(mon: Pokemon) -> Optional[str]:
+        return to_id_str(mon.ability) if mon.ability else None
+
+    @staticmethod
+    def _is_grounded(mon: Pokemon, ability: Optional[str], fields: Dict) -> bool:
+        if Field.GRAVITY in fields:
+            return True
+        return (
+            PokemonType.FLYING not in mon.types
+            and ability != "levitate"
+            and DamageCalculator._item(mon) != "airballoon"
+        )
+
+    @staticmethod
+    def _item(mon: Pokemon) -> Optional[str]:
+        if mon.item in (None, "", UNKNOWN_ITEM):
+            return None
+        return mon.item
+
+    def _get_move_data(self, move: Move) -> _MoveData:
+        key = (type(move), move.id)
+        if key not in self._move_data:
+            self._move_data[key] = _MoveData(
+                **{field: getattr(move, field) for field in _MoveData._fields}
+            )
+        return self._move_data[key]
+
+    def _attack_stat(
+        self,
+        mon: Pokemon,
+        stat: str,
+        ability: Optional[str],
+        weather: Optional[Weather],
+    ) -> float:
+        item = self._item(mon)
+        value = float(self.estimate_stat(mon, stat))
+        if stat == "atk":
+            if ability in ("hugepower", "purepower"):
+                value *= 2
+            if ability in ("gorillatactics", "hustle") or item == "choiceband":
+                value *= 1.5
+            if ability == "guts" and mon.status is not None:
+                value *= 1.5
+        else:
+            if item == "choicespecs":
+                value *= 1.5
+            if ability == "solarpower" and weather == Weather.SUNNYDAY:
+                value *= 1.5
+        return value
+
+    def _defense_stat(
+        self,
+        mon: Pokemon,
+        stat: str,
+        ability: Optional[str],
+        weather: Optional[Weather],
+    ) -> float:
+        item = self._item(mon)
+        value = float(self.estimate_stat(mon, stat))
+        if item == "eviolite":
+            value *= 1.5
+        if stat == "def":
+            if ability == "furcoat":
+                value *= 2
+        else:
+            if item == "assaultvest":
+                value *= 1.5
+            if weather == Weather.SANDSTORM and PokemonType.ROCK in mon.types:
+                value *= 1.5
+        return value
+
+    def calculate(
+        self,
+        attacker: Pokemon,
+        defender: Pokemon,
+        move: Move,
+        battle: Optional[AbstractBattle] = None,
+    ) -> DamageRange:
+        """Computes the damage dealt by a move.
+
+        :param attacker: The pokemon using the move.
+        :type attacker: Pokemon
+        :param defender: The pokemon targeted by the move.
+        :type defender: Pokemon
+        :param move: The move.
+        :type move: Move
+        :param battle: The battle, whose weather, fields and side conditions are used.
+            Defaults to None.
+        :type battle: AbstractBattle, optional
+        :return: The minimum, maximum and expected damage.
+        :rtype: DamageRange
+        """
+        damage = self.damage_matrix(attacker, [move], [defender], battle)
+        return DamageRange(*(float(values[0, 0]) for values in damage))
+
+    def damage_matrix(
+        self,
+        attacker: Pokemon,
+        moves: Sequence[Move],
+        defenders: Sequence[Pokemon],
+        battle: Optional[AbstractBattle] = None,
+    ) -> DamageRange:
+        """Computes the damage dealt by each move against each defender at once.
+
+        :param attacker: The pokemon using the moves.
+        :type attacker: Pokemon
+        :param moves: The moves.
+        :type moves: sequence of Move
+        :param defenders: The pokemons targeted by the moves.
+        :type defenders: sequence of Pokemon
+        :param battle: The battle, whose weather, fields and side conditions are used.
+            Defenders are assumed to be on the attacker's opposing side. Defaults to
+            None.
+        :type battle: AbstractBattle, optional
+        :return: The minimum, maximum and expected damage, as arrays of shape
+            (len(moves), len(defenders)).
+        :rtype: DamageRange
+        """
+        shape = (len(moves), len(defenders))
+        if not moves or not defenders:
+            return DamageRange(np.zeros(shape), np.zeros(shape), np.zeros(shape))
+
+        fields = battle.fields if battle is not None else {}
+        weather = battle.weather if battle is not None else None
+        if isinstance(weather, dict):
+            # -weather messages store the weather with its starting turn
+            weather = next(iter(weather), None)
+        side_conditions: Dict = {}
+        if battle is not None:
+            if attacker in battle.team.values():
+                side_conditions = battle.opponent_side_conditions
+            else:
+                side_conditions = battle.side_conditions
+        screen_modifier = 2732 / 4096 if isinstance(battle, DoubleBattle) else 0.5
+
+        attacker_ability = self._ability(attacker)
+        attacker_grounded = self._is_grounded(attacker, attacker_ability, fields)
+        attacker_item = self._item(attacker)
+        attacker_stats = {
+            stat: self._attack_stat(attacker, stat, attacker_ability, weather)
+            for stat in ("atk", "spa")
+        }
+        ignores_abilities = attacker_ability in _MOLD_BREAKER_ABILITIES
+        defender_abilities = [
+            None if ignores_abilities else self._ability(defender)
+            for defender in defenders
+        ]
+
+        # Defender properties, of shape (n_defenders,)
+        defender_types = np.array(
+            [
+                [_TYPE_INDEX[t] if t is not None else _NO_TYPE for t in d.types]
+                for d in defenders
+            ]
+        )
+        stats = {
+            stat: np.array(
+                [
+                    self._defense_stat(d, stat, ability, weather)
+                    * (
+                        1
+                        if attacker_ability == "unaware"
+                        else _boost_multiplier(d.boosts[stat])
+                    )
+                    for d, ability in zip(defenders, defender_abilities)
+                ]
+            )
+            for stat in ("def", "spd")
+        }
+        unaware = np.array([ability == "unaware" for ability in defender_abilities])
+        full_hp = np.array(
+            [
+                ability in ("multiscale", "shadowshield") and d.current_hp_fraction == 1
+                for d, ability in zip(defenders, defender_abilities)
+            ]
+        )
+        grounded = np.array(
+            [
+                self._is_grounded(d, ability, fields)
+                for d, ability in zip(defenders, defender_abilities)
+            ]
+        )
+
+        # Move properties, of shape (n_moves,)
+        moves = [self._get_move_data(move) for move in moves]
+        move_types = np.array([_TYPE_INDEX[move.type] for move in moves])
+        base_powers = np.zeros(len(moves))
+        fixed_damages = np.zeros(len(moves))
+        attacks = np.zeros(len(moves))
+        attack_boosts = np.ones(len(moves))
+        physical = np.zeros(len(moves), dtype=bool)
+        hits_physical = np.zeros(len(moves), dtype=bool)
+        use_target_attack = np.zeros(len(moves), dtype=bool)
+        weather_modifiers = np.ones(len(moves))
+        stab_modifiers = np.ones(len(moves))
+        burn_modifiers = np.ones(len(moves))
+        final_modifiers = np.ones(shape)
+        hits = np.ones((3, len(moves)))
+
+        for i, move in enumerate(moves):
+            if move.damage == "level":
+                fixed_damages[i] = attacker.level
+            elif move.damage:
+                fixed_damages[i] = move.damage
+            if move.category == MoveCategory.STATUS:
+                continue
+
+            base_power = move.base_power
+            if attacker_ability == "technician" and base_power <= 60:
+                base_power *= 1.5
+            for terrain, terrain_type in _TERRAIN_TYPES.items():
+                if (
+                    terrain in fields
+                    and move.type == terrain_type
+                    and attacker_grounded
+                ):
+                    base_power *= 1.3
+            base_powers[i] = base_power
+
+            physical[i] = move.category == MoveCategory.PHYSICAL
+            hits_physical[i] = move.defensive_category == MoveCategory.PHYSICAL
+            stat = "atk" if physical[i] else "spa"
+            use_target_attack[i] = move.use_target_offensive
+            attacks[i] = attacker_stats[stat]
+            attack_boosts[i] = _boost_multiplier(attacker.boosts[stat])
+
+            weather_modifiers[i] = _WEATHER_MODIFIERS.get(
+                weather, {}
+            ).get(  # pyre-ignore
+                move.type, 1.0
+            )
+            if move.type in attacker.types:
+                stab_modifiers[i] = 2.0 if attacker_ability == "adaptability" else 1.5
+            if (
+                physical[i]
+                and attacker.status == Status.BRN
+                and attacker_ability != "guts"
+                and move.id != "facade"
+            ):
+                burn_modifiers[i] = 0.5
+
+            if attacker_item == "lifeorb":
+                final_modifiers[i] *= 1.3
+            if any(screen in side_conditions for screen in _SCREENS[move.category]):
+                final_modifiers[i] *= screen_modifier
+            if move.type == PokemonType.DRAGON and Field.MISTY_TERRAIN in fields:
+                final_modifiers[i, grounded] *= 0.5
+            if move.type in (PokemonType.FIRE, PokemonType.ICE):
+                final_modifiers[i, [a == "thickfat" for a in defender_abilities]] *= 0.5
+            for j, ability in enumerate(defender_abilities):
+                if _IMMUNITY_ABILITIES.get(ability) == move.type:  # pyre-ignore
+                    final_modifiers[i, j] = 0.0
+
+            min_hits, max_hits = move.n_hit
+            hits[:, i] = min_hits, max_hits, move.expected_hits
+
+        # Type effectiveness and the modifiers depending on it, of shape
+        # (n_moves, n_defenders)
+        effectiveness = (
+            _TYPE_CHART[move_types[:, None], defender_types[None, :, 0]]
+            * _TYPE_CHART[move_types[:, None], defender_types[None, :, 1]]
+        )
+        super_effective = effectiveness > 1
+        for j, ability in enumerate(defender_abilities):
+            if ability in ("filter", "prismarmor", "solidrock"):
+                final_modifiers[super_effective[:, j], j] *= 0.75
+            elif ability == "wonderguard":
+                final_modifiers[~super_effective[:, j], j] = 0.0
+        if attacker_item == "expertbelt":
+            final_modifiers[super_effective] *= 1.2
+        if attacker_ability == "tintedlens":
+            final_modifiers[(effectiveness > 0) & (effectiveness < 1)] *= 2
+        if full_hp.any():
+            final_modifiers[:, full_hp] *= 0.5
+
+        attack = attacks[:, None] * np.where(unaware, 1.0, attack_boosts[:, None])
+        if use_target_attack.any():
+            target_attack = {
+                stat: np.array(
+                    [
+                        self.estimate_stat(d, stat) * _boost_multiplier(d.boosts[stat])
+                        for d in defenders
+                    ]
+                )
+                for stat in ("atk", "spa")
+            }
+            attack = np.where(
+                use_target_attack[:, None],
+                np.where(physical[:, None], target_attack["atk"], target_attack["spa"]),
+                attack,
+            )
+        defense = np.where(hits_physical[:, None], stats["def"], stats["spd"])
+
+        base_damage = (
+            np.floor(
+                np.floor(
+                    np.floor(2 * attacker.level / 5 + 2)
+                    * base_powers[:, None]
+                    * np.floor(attack)
+                    / np.floor(defense)
+                )
+                / 50
+            )
+            + 2
+        )
+        base_damage = _poke_round(base_damage * weather_modifiers[:, None])
+
+        # Random rolls, of shape (n_moves, n_defenders, n_rolls)
+        damage = (base_damage.astype(np.int64)[..., None] * _ROLLS // 100).astype(
+            np.float64
+        )
+        damage = _poke_round(damage * stab_modifiers[:, None, None])
+        damage = np.floor(damage * effectiveness[..., None])
+        damage = np.floor(damage * burn_modifiers[:, None, None])
+        damage = _poke_round(damage * final_modifiers[..., None])
+
+        lands = (effectiveness > 0) & (final_modifiers > 0)
+        damage = np.where(lands[..., None], np.maximum(damage, 1), 0)
+        damage = np.where((base_powers > 0)[:, None, None], damage, 0)
+        damage = np.where(
+            (fixed_damages > 0)[:, None, None],
+            (fixed_damages[:, None] * lands)[..., None],
+            damage,
+        )
+
+        return DamageRange(
+            damage[..., 0] * hits[0, :, None],
+            damage[..., -1] * hits[1, :, None],
+            damage.mean(axis=-1) * hits[2, :, None],
+        )
+
+    def estimate_stat(self, mon: Pokemon, stat: str) -> int:
+        """Returns a pokemon's stat, without boosts. Stats received from the server
+        are used when available.
+
+        :param mon: The pokemon.
+        :type mon: Pokemon
+        :param stat: The stat, among "hp", "atk", "def", "spa", "spd" and "spe".
+        :type stat: str
+        :return: The stat.
+        :rtype: int
+        """
+        known_stats = mon.stats
+        if stat == "hp":
+            if known_stats.get("atk") is not None and mon.max_hp:
+                return mon.max_hp
+            if mon.species == "shedinja":
+                return 1
+            return _raw_hp(mon.base_stats["hp"], self._evs, self._ivs, mon.level)
+
+        if known_stats.get(stat) is not None:
+            return known_stats[stat]  # pyre-ignore
+        return _raw_stat(mon.base_stats[stat], self._evs, self._ivs, mon.level, 1.0)
@@ -0,0 +1,605 @@
+# -*- coding: utf-8 -*-
+"""This module defines an approximate forward model of singles battles, used to
+simulate battles from their current state.
+"""
+
+import numpy as np  # pyre-ignore
+import random
+
+from collections import namedtuple
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from poke_env.environment.abstract_battle import AbstractBattle
+from poke_env.environment.damage_calculator import DamageCalculator
+from poke_env.environment.move import Move
+from poke_env.environment.move_category import MoveCategory
+from poke_env.environment.pokemon import Pokemon
+from poke_env.environment.pokemon_type import PokemonType
+from poke_env.environment.set_inference import SetInference
+from poke_env.environment.status import Status
+
+# Moves assumed for opponent pokemons whose moves are unknown: a physical and a special
+# move of each of their types
+_DEFAULT_MOVES = {
+    PokemonType.BUG: ("xscissor", "bugbuzz"),
+    PokemonType.DARK: ("crunch", "darkpulse"),
+    PokemonType.DRAGON: ("dragonclaw", "dragonpulse"),
+    PokemonType.ELECTRIC: ("wildcharge", "thunderbolt"),
+    PokemonType.FAIRY: ("playrough", "moonblast"),
+    PokemonType.FIGHTING: ("closecombat", "aurasphere"),
+    PokemonType.FIRE: ("flareblitz", "flamethrower"),
+    PokemonType.FLYING: ("bravebird", "airslash"),
+    PokemonType.GHOST: ("shadowclaw", "shadowball"),
+    PokemonType.GRASS: ("leafblade", "energyball"),
+    PokemonType.GROUND: ("earthquake", "earthpower"),
+    PokemonType.ICE: ("iciclecrash", "icebeam"),
+    PokemonType.NORMAL: ("bodyslam", "hypervoice"),
+    PokemonType.POISON: ("poisonjab", "sludgebomb"),
+    PokemonType.PSYCHIC: ("zenheadbutt", "psychic"),
+    PokemonType.ROCK: ("stoneedge", "powergem"),
+    PokemonType.STEEL: ("ironhead", "flashcannon"),
+    PokemonType.WATER: ("waterfall", "surf"),
+}
+
+_STATUS_IMMUNE_TYPES = {
+    Status.BRN: {PokemonType.FIRE},
+    Status.FRZ: {PokemonType.ICE},
+    Status.PAR: {PokemonType.ELECTRIC},
+    Status.PSN: {PokemonType.POISON, PokemonType.STEEL},
+    Status.TOX: {PokemonType.POISON, PokemonType.STEEL},
+}
+
+_FREEZE_THAW_CHANCE = 0.2
+_FULL_PARALYSIS_CHANCE = 0.25
+_MAX_MOVES = 4
+_MAX_SLEEP_TURNS = 3
+
+# Simulated moves. Damages are fractions of each opposing pokemon's max hp
+_SimulatedMove = namedtuple(
+    "_SimulatedMove",
+    [
+        "accuracy",
+        "damage_max",
+        "damage_min",
+        "expected_damage",
+        "heal",
+        "id",
+        "physical",
+        "priority",
+        "self_target",
+        "status",
+        "status_affects",
+    ],
+)
+
+
+class SimulationState:
+    """The state of a simulated battle. Side 0 is the player's, side 1 its opponent's.
+
+    States only hold what changes during a simulation, indexed by side then by pokemon
+    in team order, so copying them is cheap.
+    """
+
+    __slots__ = ("active", "hp", "status", "status_turns", "turn")
+
+    def __init__(
+        self,
+        active: List[int],
+        hp: List[List[float]],
+        status: List[List[Optional[Status]]],
+        status_turns: List[List[int]],
+        turn: int = 0,
+    ) -> None:
+        """
+        :param active: The index of each side's active pokemon.
+        :type active: List[int]
+        :param hp: The hp fraction of each pokemon.
+        :type hp: List[List[float]]
+        :param status: The status of each pokemon.
+        :type status: List[List[Status, optional]]
+        :param status_turns: Remaining sleep turns, or turns since being badly
+            poisoned, of each pokemon.
+        :type status_turns: List[List[int]]
+        :param turn: The number of simulated turns. Defaults to 0.
+        :type turn: int
+        """
+        self.active = active
+        self.hp = hp
+        self.status = status
+        self.status_turns = status_turns
+        self.turn = turn
+
+    def copy(self) -> "SimulationState":
+        """
+        :return: A copy of the state.
+        :rtype: SimulationState
+        """
+        return SimulationState(
+            list(self.active),
+            [list(self.hp[0]), list(self.hp[1])],
+            [list(self.status[0]), list(self.status[1])],
+            [list(self.status_turns[0]), list(self.status_turns[1])],
+            self.turn,
+        )
+
+
+class ForwardModel:
+    """Approximate transition model of singles battles.
+
+    The model is compiled from a battle: the damage of every known move of every
+    pokemon against every opposing pokemon is computed once with a damage calculator,
+    from the battle's current boosts, weather, fields and side conditions, so
+    simulating a turn only involves table lookups. Simulated turns resolve switches,
+    then moves by priority and speed with accuracy checks and random damage rolls,
+    primary statuses and healing, then burn and poison damage. Sleep, freeze and
+    paralysis can prevent pokemons from moving. Boosts, volatile effects, abilities,
+    items and secondary effects are not simulated.
+
+    Opponent pokemons are simulated from their revealed moves, completed with the
+    most likely moves inferred by set_inference if provided. Opponent pokemons whose
+    moves are all unknown are given a physical and a special move of each of their
+    types. Opponent pokemons that have not been revealed can not be simulated: they
+    only count as healthy pokemons in evaluations.
+
+    Actions are integers: move indices in the active pokemon's moves, or
+    SWITCH_OFFSET plus the index of the pokemon to switch in. None stands for no
+    action, when only the other side replaces a fainted pokemon.
+
+    Compiled models only hold plain data and can be sent to other processes.
+    """
+
+    SWITCH_OFFSET = 16
+
+    def __init__(
+        self,
+        battle: AbstractBattle,
+        *,
+        calculator: Optional[DamageCalculator] = None,
+        set_inference: Optional[SetInference] = None,
+    ) -> None:
+        """
+        :param battle: The battle to model.
+        :type battle: AbstractBattle
+        :param calculator: The damage calculator. Defaults to a DamageCalculator with
+            default parameters.
+        :type calculator: DamageCalculator, optional
+        :param set_inference: Used to infer the unknown moves of opponent pokemons.
+            Defaults to None.
+        :type set_inference: SetInference, optional
+        """
+        calculator = calculator or DamageCalculator()
+        teams = [list(battle.team.values()), list(battle.opponent_team.values())]
+
+        opponent_team_size = battle._team_size.get(battle.opponent_role or "", 6)
+        self._n_unknown = max(opponent_team_size - len(teams[1]), 0)
+
+        available_moves = list(getattr(battle, "available_moves", []))
+        moves = [
+            [self._player_moves(mon, available_moves) for mon in teams[0]],
+            [self._opponent_moves(mon, set_inference) for mon in teams[1]],
+        ]
+        max_hp = [
+            np.array([calculator.estimate_stat(mon, "hp") for mon in team])
+            for team in teams
+        ]
+
+        self._moves: List[List[List[_SimulatedMove]]] = [[], []]
+        for side in (0, 1):
+            defenders = teams[1 - side]
+            for mon, mon_moves in zip(teams[side], moves[side]):
+                damages = calculator.damage_matrix(mon, mon_moves, defenders, battle)
+                self._moves[side].append(
+                    [
+                        self._simulated_move(
+                            move,
+                            damages.min[m] / max_hp[1 - side],
+                            damages.max[m] / max_hp[1 - side],
+                            damages.expected[m] / max_hp[1 - side],
+                            defenders,
+                        )
+                        for m, move in enumerate(mon_moves)
+                    ]
+                )
+
+        self._speeds = [
+            [
+                calculator.estimate_stat(mon, "spe")
+                * (self._boost_multiplier(mon.boosts["spe"]) if mon.active else 1)
+                for mon in team
+            ]
+            for team in teams
+        ]
+        self._burned_at_root = [
+            [mon.status == Status.BRN for mon in team] for team in teams
+        ]
+        self._move_ids = [
+            [[move.id for move in mon_moves] for mon_moves in side_moves]
+            for side_moves in moves
+        ]
+
+        self._root_state = self._state_from_battle(teams)
+        self._root_forced = bool(getattr(battle, "force_switch", False))
+        self._root_actions = self._actions_from_battle(battle, teams[0])
+
+    def _actions_from_battle(
+        self, battle: AbstractBattle, team: List[Pokemon]
+    ) -> List[int]:
+        actions = []
+        active = self._root_state.active[0]
+        if active is not None and not self._root_forced:
+            available = {move.id for move in getattr(battle, "available_moves", [])}
+            actions.extend(
+                m
+                for m, move_id in enumerate(self._move_ids[0][active])
+                if move_id in available
+            )
+        for mon in getattr(battle, "available_switches", []):
+            if mon in team:
+                actions.append(self.SWITCH_OFFSET + team.index(mon))
+        return actions
+
+    @staticmethod
+    def _boost_multiplier(boost: int) -> float:
+        if boost >= 0:
+            return (2 + boost) / 2
+        return 2 / (2 - boost)
+
+    def _move_order(
+        self,
+        state: SimulationState,
+        side: int,
+        actions: Tuple[Optional[int], Optional[int]],
+        rng: random.Random,
+    ) -> Tuple[int, float, float]:
+        mon = state.active[side]
+        speed = self._speeds[side][mon]
+        if state.status[side][mon] == Status.PAR:
+            speed /= 2
+        # Faster moves are sorted first
+        return (
+            -self._moves[side][mon][actions[side]].priority,
+            -speed,
+            rng.random(),
+        )
+
+    @staticmethod
+    def _opponent_moves(
+        mon: Pokemon, set_inference: Optional[SetInference]
+    ) -> List[Move]:
+        moves = list(mon.moves.values())[:_MAX_MOVES]
+        if set_inference is not None and len(moves) < _MAX_MOVES:
+            inferred = set_inference.moves(mon)
+            for move_id in sorted(inferred, key=inferred.get, reverse=True):
+                if len(moves) >= _MAX_MOVES:
+                    break
+                if move_id not in mon.moves:
+                    moves.append(Move(move_id))
+        if not moves:
+            for mon_type in mon.types:
+                moves.extend(
+                    Move(move_id) for move_id in _DEFAULT_MOVES.get(mon_type, ())
+                )
+        return moves
+
+    @staticmethod
+    def _player_moves(mon: Pokemon, available_moves: Sequence[Move]) -> List[Move]:
+        moves = list(mon.moves.values())[:_MAX_MOVES]
+        if mon.active:
+            known = {move.id for move in moves}
+            moves.extend(move for move in available_moves if move.id not in known)
+        return moves
+
+    @staticmethod
+    def _simulated_move(
+        move: Move,
+        damage_min: Sequence[float],
+        damage_max: Sequence[float],
+        expected_damage: Sequence[float],
+        defenders: Sequence[Pokemon],
+    ) -> _SimulatedMove:
+        status = move.status
+        status_affects = []
+        for defender in defenders:
+            affected = status is not None and not (
+                _STATUS_IMMUNE_TYPES.get(status, set()) & set(defender.types)
+            )
+            # Electric status moves, like thunder wave, do not affect ground types
+            if (
+                move.type == PokemonType.ELECTRIC
+                and PokemonType.GROUND in defender.types
+            ):
+                affected = affected and move.category != MoveCategory.STATUS
+            status_affects.append(affected)
+
+        return _SimulatedMove(
+            accuracy=move.accuracy,
+            damage_max=tuple(damage_max.tolist()),
+            damage_min=tuple(damage_min.tolist()),
+            expected_damage=tuple((expected_damage * move.accuracy).tolist()),
+            heal=move.heal,
+            id=move.id,
+            physical=move.category == MoveCategory.PHYSICAL,
+            priority=move.priority,
+            self_target=move.target == "self",
+            status=status,
+            status_affects=tuple(status_affects),
+        )
+
+    def _state_from_battle(self, teams: List[List[Pokemon]]) -> SimulationState:
+        active = []
+        hp: List[List[float]] = [[], []]
+        status: List[List[Optional[Status]]] = [[], []]
+        status_turns: List[List[int]] = [[], []]
+        for side, team in enumerate(teams):
+            active.append(next((i for i, mon in enumerate(team) if mon.active), 0))
+            for mon in team:
+                if mon.fainted:
+                    hp[side].append(0.0)
+                elif mon.current_hp:
+                    hp[side].append(mon.current_hp_fraction)
+                else:
+                    # Opponent pokemons whose hp are unknown have not been damaged
+                    hp[side].append(1.0)
+
+                mon_status = None if mon.status == Status.FNT else mon.status
+                status[side].append(mon_status)
+                if mon_status == Status.SLP:
+                    status_turns[side].append(
+                        max(_MAX_SLEEP_TURNS - mon.status_counter, 1)
+                    )
+                else:
+                    status_turns[side].append(mon.status_counter)
+        return SimulationState(active, hp, status, status_turns)
+
+    def _use_move(
+        self, state: SimulationState, side: int, move_index: int, rng: random.Random
+    ) -> None:
+        mon = state.active[side]
+        if state.hp[side][mon] <= 0:
+            return
+
+        mon_status = state.status[side][mon]
+        if mon_status == Status.SLP:
+            state.status_turns[side][mon] -= 1
+            if state.status_turns[side][mon] > 0:
+                return
+            state.status[side][mon] = mon_status = None
+        elif mon_status == Status.FRZ:
+            if rng.random() >= _FREEZE_THAW_CHANCE:
+                return
+            state.status[side][mon] = mon_status = None
+        elif mon_status == Status.PAR and rng.random() < _FULL_PARALYSIS_CHANCE:
+            return
+
+        move = self._moves[side][mon][move_index]
+        if move.heal:
+            state.hp[side][mon] = min(state.hp[side][mon] + move.heal, 1.0)
+        if move.self_target:
+            return
+
+        target_side = 1 - side
+        target = state.active[target_side]
+        target_hp = state.hp[target_side]
+        if target_hp[target] <= 0:
+            return
+        if move.accuracy < 1 and rng.random() >= move.accuracy:
+            return
+
+        damage_max = move.damage_max[target]
+        if damage_max > 0:
+            damage_min = move.damage_min[target]
+            damage = damage_min + (damage_max - damage_min) * rng.random()
+            if (
+                move.physical
+                and mon_status == Status.BRN
+                and not self._burned_at_root[side][mon]
+            ):
+                damage /= 2
+            target_hp[target] = max(target_hp[target] - damage, 0.0)
+
+        if (
+            move.status is not None
+            and move.status_affects[target]
+            and target_hp[target] > 0
+            and state.status[target_side][target] is None
+        ):
+            state.status[target_side][target] = move.status
+            if move.status == Status.SLP:
+                state.status_turns[target_side][target] = rng.randint(
+                    1, _MAX_SLEEP_TURNS
+                )
+            else:
+                state.status_turns[target_side][target] = 0
+
+    def is_terminal(self, state: SimulationState) -> bool:
+        """
+        :param state: The state.
+        :type state: SimulationState
+        :return: Whether a side has no pokemon left to simulate.
+        :rtype: bool
+        """
+        return not any(hp > 0 for hp in state.hp[0]) or not any(
+            hp > 0 for hp in state.hp[1]
+        )
+
+    def legal_actions(self, state: SimulationState, side: int) -> List[Optional[int]]:
+        """Returns a side's possible actions. Sides whose active pokemon fainted can
+        only switch, while the other side waits.
+
+        :param state: The state.
+        :type state: SimulationState
+        :param side: The side.
+        :type side: int
+        :return: The possible actions.
+        :rtype: List[int, optional]
+        """
+        active = state.active[side]
+        hp = state.hp[side]
+        switches = [
+            self.SWITCH_OFFSET + i for i in range(len(hp)) if i != active and hp[i] > 0
+        ]
+        if hp[active] <= 0:
+            return switches or [None]
+        if state.hp[1 - side][state.active[1 - side]] <= 0:
+            return [None]
+        return list(range(len(self._moves[side][active]))) + switches or [None]
+
+    def move_id(self, side: int, mon: int, action: int) -> str:
+        """
+        :param side: The side.
+        :type side: int
+        :param mon: The index of the pokemon using the move.
+        :type mon: int
+        :param action: The move action.
+        :type action: int
+        :return: The id of the move used by the action.
+        :rtype: str
+        """
+        return self._move_ids[side][mon][action]
+
+    def policy(
+        self, state: SimulationState, side: int, rng: random.Random, epsilon: float
+    ) -> Optional[int]:
+        """A fast rollout policy: with probability epsilon, a random action. Otherwise,
+        the move with the highest expected damage, or the switch in with the most
+        damaging move when the active pokemon fainted.
+
+        :param state: The state.
+        :type state: SimulationState
+        :param side: The side.
+        :type side: int
+        :param rng: The random generator.
+        :type rng: random.Random
+        :param epsilon: The probability of a random action.
+        :type epsilon: float
+        :return: The action.
+        :rtype: int, optional
+        """
+        actions = self.legal_actions(state, side)
+        if len(actions) == 1 or rng.random() < epsilon:
+            return rng.choice(actions)
+
+        target = state.active[1 - side]
+        active = state.active[side]
+        if state.hp[side][active] <= 0:
+            return max(
+                actions,
+                key=lambda action: max(
+                    (
+                        move.expected_damage[target]
+                        for move in self._moves[side][action - self.SWITCH_OFFSET]
+                    ),
+                    default=0,
+                ),
+            )
+
+        moves = self._moves[side][active]
+        return max(range(len(moves)), key=lambda m: moves[m].expected_damage[target])
+
+    def step(
+        self,
+        state: SimulationState,
+        action: Optional[int],
+        opponent_action: Optional[int],
+        rng: random.Random,
+    ) -> None:
+        """Simulates a turn, updating state in place.
+
+        :param state: The state.
+        :type state: SimulationState
+        :param action: The player's action.
+        :type action: int, optional
+        :param opponent_action: The opponent's action.
+        :type opponent_action: int, optional
+        :param rng: The random generator.
+        :type rng: random.Random
+        """
+        actions = (action, opponent_action)
+        for side in (0, 1):
+            if actions[side] is not None and actions[side] >= self.SWITCH_OFFSET:
+                state.active[side] = actions[side] - self.SWITCH_OFFSET
+                if state.status[side][state.active[side]] == Status.TOX:
+                    state.status_turns[side][state.active[side]] = 0
+
+        # Replacing fainted pokemons does not take a turn
+        if action is None or opponent_action is None:
+            return
+
+        movers = [side for side in (0, 1) if actions[side] < self.SWITCH_OFFSET]
+        if len(movers) == 2:
+            movers.sort(key=lambda side: self._move_order(state, side, actions, rng))
+        for side in movers:
+            self._use_move(state, side, actions[side], rng)
+
+        for side in (0, 1):
+            mon = state.active[side]
+            mon_status = state.status[side][mon]
+            if mon_status is None or state.hp[side][mon] <= 0:
+                continue
+            if mon_status == Status.BRN:
+                damage = 1 / 16
+            elif mon_status == Status.PSN:
+                damage = 1 / 8
+            elif mon_status == Status.TOX:
+                state.status_turns[side][mon] += 1
+                damage = state.status_turns[side][mon] / 16
+            else:
+                continue
+            state.hp[side][mon] = max(state.hp[side][mon] - damage, 0.0)
+
+        state.turn += 1
+
+    def value(self, state: SimulationState) -> float:
+        """Evaluates a state for the player.
+
+        :param state: The state.
+        :type state: SimulationState
+        :return: 1 if the player won, 0 if it lost, and otherwise 0.5 plus half the
+            difference between the player's and the opponent's remaining hp fractions,
+            over the larger team size. Unrevealed opponent pokemons count as healthy.
+        :rtype: float
+        """
+        hp = sum(state.hp[0])
+        opponent_hp = sum(state.hp[1]) + self._n_unknown
+        if hp <= 0:
+            return 0.0
+        if opponent_hp <= 0:
+            return 1.0
+        team_size = max(len(state.hp[0]), len(state.hp[1]) + self._n_unknown)
+        return 0.5 + (hp - opponent_hp) / (2 * team_size)
+
+    @property
+    def n_unknown(self) -> int:
+        """
+        :return: The number of opponent pokemons that have not been revealed.
+        :rtype: int
+        """
+        return self._n_unknown
+
+    @property
+    def root_actions(self) -> List[int]:
+        """
+        :return: The player's actions available in the modelled battle.
+        :rtype: List[int]
+        """
+        return list(self._root_actions)
+
+    @property
+    def root_forced(self) -> bool:
+        """
+        :return: Whether the player has to switch in the modelled battle, the opponent
+            waiting.
+        :rtype: bool
+        """
+        return self._root_forced
+
+    @property
+    def root_state(self) -> SimulationState:
+        """
+        :return: A copy of the state of the modelled battle.
+        :rtype: SimulationState
+        """
+        return self._root_state.copy()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from typing import Any
+from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
@@ -36,6 +37,7 @@ class Pokemon:
         "_max_hp",
         "_moves",
         "_must_recharge",
+        "_observers",
         "_possible_abilities",
         "_preparing",
         "_protect_counter",
@@ -96,6 +98,7 @@ class Pokemon:
         self._last_request: dict = {}
         self._last_details: str = ""
         self._must_recharge = False
+        self._observers: List[Callable[["Pokemon"], None]] = []
         self._preparing = False
         self._protect_counter: int = 0
         self._revealed: bool = False
@@ -178,6 +181,7 @@ class Pokemon:
             self._status_counter = 0
         elif status is None and not self.fainted:
             self._status = None
+        self._notify_observers()
 
     def _damage(self, hp_status):
         self._set_hp_status(hp_status)
@@ -240,6 +244,10 @@ class Pokemon:
         if self._status == Status.SLP:
             self._status_counter += 1
 
+    def _notify_observers(self):
+        for observer in self._observers:
+            observer(self)
+
     def _prepare(self, move, target):
         self._preparing = (move, target)
 
@@ -274,6 +282,7 @@ class Pokemon:
         self._current_hp, self._max_hp = hp
         self._current_hp = int(self._current_hp)
         self._max_hp = int(self._max_hp)
+        self._notify_observers()
 
     def _start_effect(self, effect):
         effect = Effect.from_showdown_message(effect)
@@ -317,6 +326,7 @@ class Pokemon:
         self._update_from_pokedex(into.species, store_species=False)
         self._current_hp = int(current_hp)
         self._boosts = into.boosts.copy()
+        self._notify_observers()
 
     def _update_from_pokedex(self, species: str, store_species: bool = True) -> None:
         species = to_id_str(species)
@@ -415,6 +425,7 @@ class Pokemon:
         self._current_hp = None
         self._max_hp = None
         self._status = None
+        self._notify_observers()
 
         last_request = self._last_request
         self._last_request = None
@@ -730,6 +741,7 @@ class Pokemon:
         if isinstance(status, str):
             status = Status[status.upper()]
         self._status = status
+        self._notify_observers()
 
     @property
     def type_1(self) -> PokemonType:
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""This module defines an inference engine estimating the sets of opponent pokemons
+from their revealed information and usage statistics.
+"""
+
+import numpy as np  # pyre-ignore
+import orjson
+import os
+
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any
+from typing import Dict
+from typing import FrozenSet
+from typing import Optional
+from typing import Tuple
+
+from poke_env.data import GEN_TO_MOVES
+from poke_env.data import GEN_TO_POKEDEX
+from poke_env.data import UNKNOWN_ITEM
+from poke_env.environment.move import SPECIAL_MOVES
+from poke_env.environment.pokemon import Pokemon
+from poke_env.utils import to_id_str
+
+SetDistribution = namedtuple(
+    "SetDistribution", ["abilities", "items", "moves", "spreads"]
+)
+"""Inferred set of a pokemon. Represented with a tuple with four dictionaries:
+
+- abilities: the probability of each ability.
+- items: the probability of each item. The empty string stands for no item.
+- moves: the probability of each move to be one of the pokemon's moves. Probabilities
+  sum to the number of moves of the pokemon, four at most.
+- spreads: the probability of each nature and EV spread, formatted as in usage
+  statistics, eg. "Jolly:0/252/0/0/4/252".
+"""
+
+_LEARNSET_PATH: str = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+    "data",
+    "learnset.json",
+)
+
+_BISECTION_STEPS = 50
+_MAX_MOVES = 4
+
+# Items that can not be held along with revealed status moves
+_STATUS_MOVE_EXCLUDED_ITEMS = {"assaultvest"}
+
+
+@lru_cache(1)
+def _learnsets() -> Dict[str, Any]:
+    # Learnsets are large and only needed for inference, so they are loaded lazily
+    with open(_LEARNSET_PATH) as learnsets:
+        return orjson.loads(learnsets.read())
+
+
+def _normalize(weights: Dict[str, float]) -> Dict[str, float]:
+    total = sum(weights.values())
+    if total <= 0:
+        return {}
+    return {key: weight / total for key, weight in weights.items()}
+
+
+def _fill(marginals: Dict[str, float], n_slots: int) -> Dict[str, float]:
+    """Rescales marginals so that they sum to n_slots.
+
+    The odds of every move are multiplied by the same factor, found by bisection, so
+    that moves present in every set stay certain and probabilities stay below 1.
+    """
+    moves = [move for move, p in marginals.items() if p > 0]
+    if len(moves) <= n_slots:
+        return {move: 1.0 for move in moves}
+    if n_slots <= 0:
+        return {}
+
+    p = np.clip([marginals[move] for move in moves], 0, 1)
+    low, high = -50.0, 50.0
+    for _ in range(_BISECTION_STEPS):
+        log_factor = (low + high) / 2
+        factor = np.exp(log_factor)
+        if (p * factor / (1 - p + p * factor)).sum() > n_slots:
+            high = log_factor
+        else:
+            low = log_factor
+    factor = np.exp((low + high) / 2)
+    return dict(zip(moves, (p * factor / (1 - p + p * factor)).tolist()))
+
+
+@lru_cache(2 ** 11)
+def learnset(species: str, gen: int = 8) -> FrozenSet[str]:
+    """Returns the moves a species can learn in a given generation.
+
+    Formes and evolutions also learn the moves of their base forme and pre-evolutions.
+
+    :param species: The species.
+    :type species: str
+    :param gen: The generation. Defaults to 8.
+    :type gen: int
+    :return: The ids of the moves the species can learn. Empty if the species is
+        unknown.
+    :rtype: FrozenSet[str]
+    """
+    learnsets = _learnsets()
+    pokedex = GEN_TO_POKEDEX.get(gen, GEN_TO_POKEDEX[8])
+    prefix = str(gen)
+
+    moves = set()
+    to_visit = [to_id_str(species)]
+    visited = set()
+    while to_visit:
+        species_id = to_visit.pop()
+        if species_id in visited:
+            continue
+        visited.add(species_id)
+
+        for move, sources in learnsets.get(species_id, {}).get("learnset", {}).items():
+            if any(source.startswith(prefix) for source in sources):
+                moves.add(move)
+
+        entry = pokedex.get(species_id, {})
+        for related in ("baseSpecies", "changesFrom", "prevo"):
+            if related in entry:
+                to_visit.append(to_id_str(entry[related]))
+
+    return frozenset(moves)
+
+
+class SetInference:
+    """Infers opponent pokemons' sets from usage statistics.
+
+    For each species, priors give the probability of each ability, item and spread,
+    and the probability of each move to be in a set. Priors are usually computed once
+    per format from Smogon's usage statistics, with from_usage_stats.
+
+    Revealed information is taken into account: revealed abilities and items are
+    certain, revealed moves are in the set and the odds of other moves are rescaled
+    so that their probabilities sum to the number of remaining move slots. Moves a
+    species can not learn are discarded. Without priors for a species, abilities and
+    moves are uniform over its possible abilities and learnset.
+
+    Inferences only depend on the species and revealed information, and are cached on
+    them: they are recomputed when new information is revealed during a battle, and
+    repeated queries are dictionary lookups.
+    """
+
+    def __init__(
+        self,
+        priors: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None,
+        *,
+        cache_size: int = 2 ** 12,
+        gen: int = 8,
+    ) -> None:
+        """
+        :param priors: Priors, by species. Each species' priors is a dictionary with
+            optional "abilities", "items", "moves" and "spreads" entries, mapping ids
+            to probabilities. Defaults to None.
+        :type priors: Dict[str, Dict[str, Dict[str, float]]], optional
+        :param cache_size: Maximum number of cached inferences. Defaults to 4096.
+        :type cache_size: int
+        :param gen: The generation of the format, used for learnsets. Defaults to 8.
+        :type gen: int
+        """
+        self._gen = gen
+        self._moves_data = GEN_TO_MOVES.get(gen, GEN_TO_MOVES[8])
+        self._priors: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for species, species_priors in (priors or {}).items():
+            self._priors[to_id_str(species)] = {
+                key: {
+                    to_id_str(name): p
+                    for name, p in species_priors.get(key, {}).items()
+                }
+                for key in ("abilities", "items", "moves")
+            }
+            self._priors[to_id_str(species)]["spreads"] = dict(
+                species_priors.get("spreads", {})
+            )
+        self._infer = lru_cache(cache_size)(self._infer_uncached)
+
+    @classmethod
+    def from_usage_stats(cls, stats: Dict[str, Any], **kwargs) -> "SetInference":
+        """Creates an inference engine from Smogon's detailed usage statistics, as
+        found in the chaos directory of https://www.smogon.com/stats/.
+
+        :param stats: The parsed statistics, or their "data" entry.
+        :type stats: Dict[str, Any]
+        :param kwargs: Other arguments passed to the constructor.
+        :return: The inference engine.
+        :rtype: SetInference
+        """
+        priors = {}
+        for species, usage in stats.get("data", stats).items():
+            abilities = _normalize(
+                {to_id_str(a): w for a, w in usage.get("Abilities", {}).items()}
+            )
+            items = _normalize(
+                {
+                    "" if to_id_str(i) == "nothing" else to_id_str(i): w
+                    for i, w in usage.get("Items", {}).items()
+                }
+            )
+            spreads = _normalize(dict(usage.get("Spreads", {})))
+
+            # Move counts are counts of sets including each move
+            n_sets = sum(usage.get("Abilities", {}).values())
+            moves = {
+                to_id_str(move): min(weight / n_sets, 1.0)
+                for move, weight in usage.get("Moves", {}).items()
+                if to_id_str(move) and n_sets > 0
+            }
+            priors[species] = {
+                "abilities": abilities,
+                "items": items,
+                "moves": moves,
+                "spreads": spreads,
+            }
+        return cls(priors, **kwargs)
+
+    def _infer_uncached(
+        self,
+        species: str,
+        revealed_moves: FrozenSet[str],
+        item: Optional[str],
+        ability: Optional[str],
+        possible_abilities: Tuple[str, ...],
+    ) -> SetDistribution:
+        priors = self._priors.get(species, {})
+        species_learnset = learnset(species, self._gen)
+
+        # Abilities
+        if ability:
+            abilities = {ability: 1.0}
+        else:
+            abilities = _normalize(
+                {
+                    a: p
+                    for a, p in priors.get("abilities", {}).items()
+                    if not possible_abilities or a in possible_abilities
+                }
+            ) or {a: 1 / len(possible_abilities) for a in possible_abilities}
+
+        # Items
+        if item is None:
+            items = {"": 1.0}
+        elif item != UNKNOWN_ITEM:
+            items = {item: 1.0}
+        else:
+            excluded = set()
+            if any(
+                self._moves_data.get(move, {}).get("category") == "Status"
+                for move in revealed_moves
+            ):
+                excluded = _STATUS_MOVE_EXCLUDED_ITEMS
+            items = _normalize(
+                {i: p for i, p in priors.get("items", {}).items() if i not in excluded}
+            )
+
+        # Moves
+        candidates = {
+            move: p
+            for move, p in priors.get("moves", {}).items()
+            if move not in revealed_moves
+            and (not species_learnset or move in species_learnset)
+        }
+        if not candidates and not priors.get("moves"):
+            candidates = {
+                move: 1 / len(species_learnset)
+                for move in species_learnset
+                if move not in revealed_moves
+            }
+        moves = {move: 1.0 for move in revealed_moves}
+        moves.update(_fill(candidates, max(_MAX_MOVES - len(revealed_moves), 0)))
+
+        return SetDistribution(
+            abilities=abilities,
+            items=items,
+            moves=moves,
+            spreads=dict(priors.get("spreads", {})),
+        )
+
+    def abilities(self, mon: Pokemon) -> Dict[str, float]:
+        """
+        :param mon: The pokemon.
+        :type mon: Pokemon
+        :return: The probability of each of the pokemon's possible abilities.
+        :rtype: Dict[str, float]
+        """
+        return self.infer(mon).abilities
+
+    def clear_cache(self) -> None:
+        """Clears cached inferences."""
+        self._infer.cache_clear()
+
+    def infer(self, mon: Pokemon) -> SetDistribution:
+        """Infers a pokemon's set from its species and revealed information.
+
+        :param mon: The pokemon.
+        :type mon: Pokemon
+        :return: The inferred set.
+        :rtype: SetDistribution
+        """
+        possible_abilities = mon.possible_abilities
+        if isinstance(possible_abilities, dict):
+            possible_abilities = possible_abilities.values()
+
+        return self._infer(
+            mon.species,
+            frozenset(move for move in mon.moves if move not in SPECIAL_MOVES),
+            mon.item,
+            to_id_str(mon.ability) if mon.ability else None,
+            tuple(to_id_str(a) for a in possible_abilities),
+        )
+
+    def items(self, mon: Pokemon) -> Dict[str, float]:
+        """
+        :param mon: The pokemon.
+        :type mon: Pokemon
+        :return: The probability of each item, the empty string standing for no
+            item.
+        :rtype: Dict[str, float]
+        """
+        return self.infer(mon).items
+
+    def moves(self, mon: Pokemon) -> Dict[str, float]:
+        """
+        :param mon: The pokemon.
+        :type mon: Pokemon
+        :return: The probability of each move to be one of the pokemon's moves.
+        :rtype: Dict[str, float]
+        """
+        return self.infer(mon).moves
+
+    def spreads(self, mon: Pokemon) -> Dict[str, float]:
+        """
+        :param mon: The pokemon.
+        :type mon: Pokemon
+        :return: The probability of each nature and EV spread.
+        :rtype: Dict[str, float]
+        """
+        return self.infer(mon).spreads
+
+    @property
+    def gen(self) -> int:
+        """
+        :return: The generation of the format.
+        :rtype: int
+        """
+        return self._gen
+
+    @property
+    def species(self) -> FrozenSet[str]:
+        """
+        :return: The species with priors.
+        :rtype: FrozenSet[str]
+        """
+        return frozenset(self._priors)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""This module contains helpers to choose the event loop players run on.
+
+Players create their asyncio primitives when they are instantiated, on the loop
+returned by ``asyncio.get_event_loop()``. The event loop policy must therefore be
+chosen before any player is created: either by calling ``set_event_loop_policy`` at
+the start of the program, by creating players inside the coroutine passed to ``run``,
+or by setting the ``POKE_ENV_EVENT_LOOP`` environment variable to ``uvloop`` before
+importing ``poke_env``.
+
+uvloop is an optional dependency, which can be installed with
+``pip install poke_env[uvloop]``. When it is requested but unavailable, the default
+asyncio event loop is used instead.
+"""
+
+import asyncio
+import logging
+import os
+
+from typing import Any
+from typing import Awaitable
+
+EVENT_LOOP_ENVIRONMENT_VARIABLE = "POKE_ENV_EVENT_LOOP"
+
+_LOGGER = logging.getLogger("poke-env")
+
+
+def _uvloop_policy_class():
+    try:
+        import uvloop  # pyre-ignore
+    except ImportError:
+        return None
+    return uvloop.EventLoopPolicy
+
+
+def uvloop_available() -> bool:
+    """
+    :return: Whether uvloop can be used on this platform.
+    :rtype: bool
+    """
+    return _uvloop_policy_class() is not None
+
+
+def set_event_loop_policy(use_uvloop: bool = True) -> bool:
+    """Sets the event loop policy used to create player loops.
+
+    If the requested policy is already installed, the current event loop is kept.
+
+    :param use_uvloop: Whether to use uvloop. If uvloop is not installed, the default
+        asyncio policy is used and a warning is logged. Defaults to True.
+    :type use_uvloop: bool
+    :return: Whether uvloop is used.
+    :rtype: bool
+    """
+    policy_class = _uvloop_policy_class() if use_uvloop else None
+
+    if use_uvloop and policy_class is None:
+        _LOGGER.warning("uvloop is not installed - using the default asyncio loop.")
+    if policy_class is None:
+        policy_class = asyncio.DefaultEventLoopPolicy
+
+    if type(asyncio.get_event_loop_policy()) is not policy_class:
+        asyncio.set_event_loop_policy(policy_class())
+    return policy_class is not asyncio.DefaultEventLoopPolicy
+
+
+def new_event_loop(use_uvloop: bool = True) -> asyncio.AbstractEventLoop:
+    """Creates a new event loop, without installing it as the current loop.
+
+    This is useful to run players in a thread or process other than the main one.
+
+    :param use_uvloop: Whether to create a uvloop loop when uvloop is installed.
+        Defaults to True.
+    :type use_uvloop: bool
+    :return: The new event loop.
+    :rtype: asyncio.AbstractEventLoop
+    """
+    policy_class = _uvloop_policy_class() if use_uvloop else None
+    if policy_class is None:
+        return asyncio.DefaultEventLoopPolicy().new_event_loop()
+    return policy_class().new_event_loop()
+
+
+def run(main: Awaitable, use_uvloop: bool = True) -> Any:
+    """Runs an awaitable to completion on a new event loop, after installing the
+    requested event loop policy.
+
+    As asyncio.run, the loop is installed as the current loop while main runs, and
+    closed afterwards. Players used by main should therefore be created inside it.
+
+    :param main: The awaitable to run.
+    :type main: Awaitable
+    :param use_uvloop: Whether to use uvloop when it is installed. Defaults to True.
+    :type use_uvloop: bool
+    :return: The result of main.
+    """
+    set_event_loop_policy(use_uvloop)
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+def _set_event_loop_policy_from_environment() -> None:
+    event_loop = os.environ.get(EVENT_LOOP_ENVIRONMENT_VARIABLE, "").lower()
+
+    if event_loop == "uvloop":
+        set_event_loop_policy(use_uvloop=True)
+    elif event_loop not in {"", "asyncio"}:
+        _LOGGER.warning(
+            "Unknown value '%s' for %s - expected 'asyncio' or 'uvloop'.",
+            event_loop,
+            EVENT_LOOP_ENVIRONMENT_VARIABLE,
+        )
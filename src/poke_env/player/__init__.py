@@ -7,6 +7,7 @@ from poke_env.player import player_network_interface
 from poke_env.player import random_player
 from poke_env.player import trainable_player
 from poke_env.player import utils
+from poke_env.player import vec_env_player
 
 __all__ = [
     "env_player",
@@ -15,4 +16,5 @@ __all__ = [
     "random_player",
     "trainable_player",
     "utils",
+    "vec_env_player",
 ]
@@ -1,10 +1,31 @@
 # -*- coding: utf-8 -*-
+from functools import lru_cache
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
 from poke_env.environment.move_category import MoveCategory
+from poke_env.environment.pokemon_type import PokemonType
 from poke_env.environment.side_condition import SideCondition
 from poke_env.player.player import Player
 from poke_env.player.random_player import RandomPlayer  # noqa: F401
 
 
+_Types = Tuple[PokemonType, Optional[PokemonType]]
+
+
+@lru_cache(2 ** 16)
+def _type_advantage(types: _Types, opponent_types: _Types) -> float:
+    """Returns the best multiplier of types on opponent_types, minus the best
+    multiplier of opponent_types on types.
+
+    Results are cached, forming a table of the type pairs met in battles.
+    """
+    return max(
+        t.damage_multiplier(*opponent_types) for t in types if t is not None
+    ) - max(t.damage_multiplier(*types) for t in opponent_types if t is not None)
+
+
 class MaxBasePowerPlayer(Player):
     def choose_move(self, battle):
         if battle.available_moves:
@@ -27,11 +48,23 @@ class SimpleHeuristicsPlayer(Player):
     HP_FRACTION_COEFICIENT = 0.4
     SWITCH_OUT_MATCHUP_THRESHOLD = -2
 
-    def _estimate_matchup(self, mon, opponent):
-        score = max([opponent.damage_multiplier(t) for t in mon.types if t is not None])
-        score -= max(
-            [mon.damage_multiplier(t) for t in opponent.types if t is not None]
-        )
+    def _estimate_matchup(self, mon, opponent, matchups: Optional[Dict] = None):
+        # Matchups only change with species, types and hp, so they are memoized in
+        # matchups, usually over a turn
+        if matchups is not None:
+            key = (
+                mon.species,
+                mon.types,
+                mon.current_hp_fraction,
+                opponent.species,
+                opponent.types,
+                opponent.current_hp_fraction,
+            )
+            if key not in matchups:
+                matchups[key] = self._estimate_matchup(mon, opponent)
+            return matchups[key]
+
+        score = _type_advantage(mon.types, opponent.types)
         if mon.base_stats["spe"] > opponent.base_stats["spe"]:
             score += self.SPEED_TIER_COEFICIENT
         elif opponent.base_stats["spe"] > mon.base_stats["spe"]:
@@ -42,7 +75,9 @@ class SimpleHeuristicsPlayer(Player):
 
         return score
 
-    def _should_dynamax(self, battle, n_remaining_mons):
+    def _should_dynamax(
+        self, battle, n_remaining_mons, matchups: Optional[Dict] = None
+    ):
         if battle.can_dynamax:
             # Last full HP mon
             if (
@@ -54,7 +89,7 @@ class SimpleHeuristicsPlayer(Player):
             # Matchup advantage and full hp on full hp
             if (
                 self._estimate_matchup(
-                    battle.active_pokemon, battle.opponent_active_pokemon
+                    battle.active_pokemon, battle.opponent_active_pokemon, matchups
                 )
                 > 0
                 and battle.active_pokemon.current_hp_fraction == 1
@@ -65,14 +100,14 @@ class SimpleHeuristicsPlayer(Player):
                 return True
         return False
 
-    def _should_switch_out(self, battle):
+    def _should_switch_out(self, battle, matchups: Optional[Dict] = None):
         active = battle.active_pokemon
         opponent = battle.opponent_active_pokemon
         # If there is a decent switch in...
         if [
             m
             for m in battle.available_switches
-            if self._estimate_matchup(m, opponent) > 0
+            if self._estimate_matchup(m, opponent, matchups) > 0
         ]:
             # ...and a 'good' reason to switch out
             if active.boosts["def"] <= -3 or active.boosts["spd"] <= -3:
@@ -88,7 +123,7 @@ class SimpleHeuristicsPlayer(Player):
             ):
                 return True
             if (
-                self._estimate_matchup(active, opponent)
+                self._estimate_matchup(active, opponent, matchups)
                 < self.SWITCH_OUT_MATCHUP_THRESHOLD
             ):
                 return True
@@ -106,6 +141,7 @@ class SimpleHeuristicsPlayer(Player):
         # Main mons shortcuts
         active = battle.active_pokemon
         opponent = battle.opponent_active_pokemon
+        matchups: Dict = {}
 
         # Rough estimation of damage ratio
         physical_ratio = self._stat_estimation(active, "atk") / self._stat_estimation(
@@ -116,7 +152,8 @@ class SimpleHeuristicsPlayer(Player):
         )
 
         if battle.available_moves and (
-            not self._should_switch_out(battle) or not battle.available_switches
+            not self._should_switch_out(battle, matchups)
+            or not battle.available_switches
         ):
             n_remaining_mons = len(
                 [m for m in battle.team.values() if m.fainted is False]
@@ -147,7 +184,7 @@ class SimpleHeuristicsPlayer(Player):
             # Setup moves
             if (
                 active.current_hp_fraction == 1
-                and self._estimate_matchup(active, opponent) > 0
+                and self._estimate_matchup(active, opponent, matchups) > 0
             ):
                 for move in battle.available_moves:
                     if (
@@ -175,14 +212,15 @@ class SimpleHeuristicsPlayer(Player):
                 * opponent.damage_multiplier(m),
             )
             return self.create_order(
-                move, dynamax=self._should_dynamax(battle, n_remaining_mons)
+                move,
+                dynamax=self._should_dynamax(battle, n_remaining_mons, matchups),
             )
 
         if battle.available_switches:
             return self.create_order(
                 max(
                     battle.available_switches,
-                    key=lambda s: self._estimate_matchup(s, opponent),
+                    key=lambda s: self._estimate_matchup(s, opponent, matchups),
                 )
             )
 
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""This module defines a runner spreading battles over several worker processes.
+
+Within one process, every player shares a single event loop and therefore a single
+core. BattleFarm shards battle quotas over worker processes, each running its own
+event loop and its own copies of the players, and aggregates the results.
+
+It can also be used from the command line:
+
+python -m poke_env.player.battle_farm cross-evaluate \
+    poke_env.player.random_player.RandomPlayer \
+    poke_env.player.baselines.MaxBasePowerPlayer --n-battles 1000 --n-workers 4
+"""
+
+import argparse
+import asyncio
+import importlib
+import multiprocessing
+import os
+
+from collections import namedtuple
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from poke_env.data import to_id_str
+from poke_env.event_loop import new_event_loop
+from poke_env.player_configuration import PlayerConfiguration
+
+PlayerSpec = namedtuple("PlayerSpec", ["name", "player_class", "kwargs"])
+"""Description of a player to instantiate in each worker. Represented with a tuple with
+three entries: a unique name, the player class - or its import path - and the keyword
+arguments passed to the player's constructor, which must be picklable.
+
+The username of each copy is derived from the name, truncated to fit showdown's username
+length limit, and the worker id. Derived usernames must be unique within a farm run."""
+
+BattleRecord = namedtuple(
+    "BattleRecord", ["n_won_battles", "n_lost_battles", "n_tied_battles"]
+)
+"""Aggregated battle results. Represented with a tuple with three entries: the number
+of won, lost and tied battles."""
+
+_FarmJob = namedtuple("_FarmJob", ["worker_id", "players", "assignments", "use_uvloop"])
+# assignments are (player index, opponent index or None for ladder, n_battles) tuples
+_Assignment = Tuple[int, Optional[int], int]
+
+
+def _split_evenly(n: int, n_parts: int) -> List[int]:
+    return [n // n_parts + (1 if i < n % n_parts else 0) for i in range(n_parts)]
+
+
+def _resolve_player_class(player_class: Any) -> Any:
+    if isinstance(player_class, str):
+        module_name, class_name = player_class.rsplit(".", 1)
+        return getattr(importlib.import_module(module_name), class_name)
+    return player_class
+
+
+def _worker_username(name: str, worker_id: int) -> str:
+    suffix = " %d" % worker_id
+    return name[: 18 - len(suffix)] + suffix
+
+
+def _instantiate_player(spec: PlayerSpec, worker_id: int):
+    player_class = _resolve_player_class(spec.player_class)
+    return player_class(
+        player_configuration=PlayerConfiguration(
+            _worker_username(spec.name, worker_id), None
+        ),
+        **(spec.kwargs or {})
+    )
+
+
+async def _play_job(job: _FarmJob) -> List[Tuple[int, Optional[int], BattleRecord]]:
+    indices = set()
+    for i, j, _ in job.assignments:
+        indices.add(i)
+        if j is not None:
+            indices.add(j)
+    players = {i: _instantiate_player(job.players[i], job.worker_id) for i in indices}
+
+    records = []
+    for i, j, n_battles in job.assignments:
+        player = players[i]
+        if j is None:
+            await player.ladder(n_battles)
+        else:
+            await player.battle_against(players[j], n_battles)
+            players[j].reset_battles()
+
+        records.append(
+            (
+                i,
+                j,
+                BattleRecord(
+                    player.n_won_battles, player.n_lost_battles, player.n_tied_battles
+                ),
+            )
+        )
+        player.reset_battles()
+
+    for player in players.values():
+        await player.stop_listening()
+    return records
+
+
+def _run_job(job: _FarmJob) -> List[Tuple[int, Optional[int], BattleRecord]]:
+    loop = new_event_loop(job.use_uvloop)
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(_play_job(job))
+    finally:
+        loop.close()
+
+
+class BattleFarm:
+    """Runs battles in several worker processes.
+
+    Battle quotas are split evenly between workers: each worker plays its share of
+    every requested matchup with its own copies of the players, so that throughput
+    scales with the number of workers until the showdown server becomes the
+    bottleneck.
+    """
+
+    def __init__(self, n_workers: Optional[int] = None, use_uvloop: bool = False):
+        """
+        :param n_workers: Number of worker processes. Defaults to the number of CPUs.
+        :type n_workers: int, optional
+        :param use_uvloop: Whether workers should run on uvloop when it is installed.
+            Defaults to False.
+        :type use_uvloop: bool
+        """
+        self._n_workers: int = n_workers or os.cpu_count() or 1
+        self._use_uvloop: bool = use_uvloop
+
+    def _run(
+        self, players: List[PlayerSpec], assignments: List[_Assignment]
+    ) -> Dict[Tuple[int, Optional[int]], BattleRecord]:
+        names = [player.name for player in players]
+        if len(set(names)) != len(names):
+            raise ValueError("Player spec names must be unique. Got %s" % names)
+
+        jobs = []
+        for worker_id in range(self._n_workers):
+            worker_assignments = []
+            for i, j, n_battles in assignments:
+                share = _split_evenly(n_battles, self._n_workers)[worker_id]
+                if share:
+                    worker_assignments.append((i, j, share))
+            if worker_assignments:
+                jobs.append(
+                    _FarmJob(worker_id, players, worker_assignments, self._use_uvloop)
+                )
+
+        usernames = [
+            _worker_username(name, job.worker_id) for job in jobs for name in names
+        ]
+        if len({to_id_str(username) for username in usernames}) != len(usernames):
+            raise ValueError(
+                "Player spec names must result in unique usernames. Got %s" % usernames
+            )
+
+        results: Dict[Tuple[int, Optional[int]], List[int]] = {
+            (i, j): [0, 0, 0] for i, j, _ in assignments
+        }
+        for worker_records in self._map(jobs):
+            for i, j, record in worker_records:
+                for k, value in enumerate(record):
+                    results[(i, j)][k] += value
+        return {key: BattleRecord(*value) for key, value in results.items()}
+
+    def _map(self, jobs: List[_FarmJob]) -> List[List]:
+        # Spawned workers do not inherit the parent's event loop or sockets
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(len(jobs)) as pool:
+            return pool.map(_run_job, jobs)
+
+    def battle_against(
+        self, player: PlayerSpec, opponent: PlayerSpec, n_battles: int
+    ) -> BattleRecord:
+        """Makes player play n_battles against opponent.
+
+        :param player: The player sending challenges.
+        :type player: PlayerSpec
+        :param opponent: The player accepting challenges.
+        :type opponent: PlayerSpec
+        :param n_battles: The total number of battles to play.
+        :type n_battles: int
+        :return: The results, from player's point of view.
+        :rtype: BattleRecord
+        """
+        return self._run([player, opponent], [(0, 1, n_battles)])[(0, 1)]
+
+    def cross_evaluate(
+        self, players: List[PlayerSpec], n_challenges: int
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """Makes every player play n_challenges battles against every other player.
+
+        :param players: The players to evaluate.
+        :type players: list of PlayerSpec
+        :param n_challenges: Number of battles played by each pair of players.
+        :type n_challenges: int
+        :return: The win rate of each player against each other player, indexed by
+            player names. Like in poke_env.player.utils.cross_evaluate, diagonal
+            entries are None.
+        :rtype: Dict[str, Dict[str, Optional[float]]]
+        """
+        pairs = [
+            (i, j, n_challenges)
+            for i in range(len(players))
+            for j in range(i + 1, len(players))
+        ]
+        records = self._run(players, pairs)
+
+        results: Dict[str, Dict[str, Optional[float]]] = {
+            p_1.name: {p_2.name: None for p_2 in players} for p_1 in players
+        }
+        for (i, j), record in records.items():
+            n_finished = sum(record)
+            if n_finished:
+                results[players[i].name][players[j].name] = (
+                    record.n_won_battles / n_finished
+                )
+                results[players[j].name][players[i].name] = (
+                    record.n_lost_battles / n_finished
+                )
+        return results
+
+    def ladder(self, player: PlayerSpec, n_games: int) -> BattleRecord:
+        """Makes copies of player play n_games ladder games in total.
+
+        :param player: The player to ladder with.
+        :type player: PlayerSpec
+        :param n_games: The total number of games to play.
+        :type n_games: int
+        :return: The aggregated results.
+        :rtype: BattleRecord
+        """
+        return self._run([player], [(0, None, n_games)])[(0, None)]
+
+    def self_play(self, player: PlayerSpec, n_battles: int) -> BattleRecord:
+        """Makes player play n_battles against a copy of itself.
+
+        :param player: The player.
+        :type player: PlayerSpec
+        :param n_battles: The total number of battles to play.
+        :type n_battles: int
+        :return: The results, from the challenging copy's point of view.
+        :rtype: BattleRecord
+        """
+        opponent = player._replace(name=player.name[:13] + " opp")
+        return self.battle_against(player, opponent, n_battles)
+
+    @property
+    def n_workers(self) -> int:
+        return self._n_workers
+
+
+def _player_specs_from_args(args: argparse.Namespace) -> List[PlayerSpec]:
+    kwargs = {
+        "battle_format": args.battle_format,
+        "max_concurrent_battles": args.max_concurrent_battles,
+        "log_level": args.log_level,
+    }
+    return [
+        PlayerSpec("%s %d" % (path.rsplit(".", 1)[-1][:12], i), path, kwargs)
+        for i, path in enumerate(args.players)
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Run battles in several worker processes."
+    )
+    parser.add_argument(
+        "mode", choices=["cross-evaluate", "ladder", "self-play"], help="What to run."
+    )
+    parser.add_argument(
+        "players", nargs="+", help="Import paths of the player classes to use."
+    )
+    parser.add_argument(
+        "--n-battles",
+        type=int,
+        default=100,
+        help="Battles per pair of players, or per player when laddering.",
+    )
+    parser.add_argument("--n-workers", type=int, default=None)
+    parser.add_argument("--max-concurrent-battles", type=int, default=10)
+    parser.add_argument("--battle-format", default="gen8randombattle")
+    parser.add_argument("--log-level", type=int, default=40)
+    parser.add_argument("--uvloop", action="store_true")
+    args = parser.parse_args(argv)
+
+    farm = BattleFarm(n_workers=args.n_workers, use_uvloop=args.uvloop)
+    specs = _player_specs_from_args(args)
+
+    if args.mode == "cross-evaluate":
+        from tabulate import tabulate
+
+        results = farm.cross_evaluate(specs, args.n_battles)
+        table = [["-"] + [spec.name for spec in specs]]
+        for p_1, p_1_results in results.items():
+            table.append([p_1] + [p_1_results[p_2] for p_2 in p_1_results])
+        print(tabulate(table))
+    else:
+        for spec in specs:
+            if args.mode == "ladder":
+                record = farm.ladder(spec, args.n_battles)
+            else:
+                record = farm.self_play(spec, args.n_battles)
+            print(
+                "%s: %d won, %d lost, %d tied"
+                % (
+                    spec.name,
+                    record.n_won_battles,
+                    record.n_lost_battles,
+                    record.n_tied_battles,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
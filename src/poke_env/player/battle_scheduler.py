@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""This module defines a slot-based scheduler controlling how many battles a player
+runs concurrently.
+"""
+
+import asyncio
+
+from asyncio import Event
+from asyncio import Future
+from collections import deque
+from time import perf_counter
+from typing import Deque
+from typing import Optional
+from typing import Set
+
+
+class BattleScheduler:
+    """Admission control for a player's battles.
+
+    The scheduler owns a fixed number of battle slots. A slot is reserved before a
+    battle is requested - by sending a challenge, accepting one or searching for a
+    ladder game - and is occupied by the resulting battle until it finishes. As soon
+    as a battle finishes, exactly one coroutine waiting for a slot is resumed, which
+    keeps max_concurrent_battles battles in flight for as long as there are battles
+    to play.
+
+    The scheduler also measures how busy its slots are over time.
+    """
+
+    def __init__(self, max_concurrent_battles: int = 1) -> None:
+        """
+        :param max_concurrent_battles: Number of battle slots. If 0, no limit will be
+            applied. Defaults to 1.
+        :type max_concurrent_battles: int
+        """
+        self._max_concurrent_battles: int = max_concurrent_battles
+
+        self._n_reserved: int = 0
+        self._running_battles: Set[str] = set()
+
+        self._idle: Event = Event()
+        self._idle.set()
+        self._slot_waiters: Deque[Future] = deque()
+
+        self._busy_slot_time: float = 0.0
+        self._last_update: Optional[float] = None
+        self._start_time: Optional[float] = None
+
+    def _has_free_slot(self) -> bool:
+        if not self._max_concurrent_battles:
+            return True
+        return (
+            self._n_reserved + len(self._running_battles)
+            < self._max_concurrent_battles
+        )
+
+    def _update_busy_slot_time(self) -> None:
+        now = perf_counter()
+        if self._last_update is not None:
+            self._busy_slot_time += len(self._running_battles) * (
+                now - self._last_update
+            )
+        else:
+            self._start_time = now
+        self._last_update = now
+
+    def _wake_up_slot_waiter(self) -> None:
+        while self._slot_waiters:
+            waiter = self._slot_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def battle_finished(self, battle_tag: str) -> None:
+        """Releases the slot occupied by a battle.
+
+        :param battle_tag: The finished battle's tag.
+        :type battle_tag: str
+        """
+        if battle_tag not in self._running_battles:
+            return
+
+        self._update_busy_slot_time()
+        self._running_battles.remove(battle_tag)
+
+        if not self._running_battles:
+            self._idle.set()
+        self._wake_up_slot_waiter()
+
+    def battle_started(self, battle_tag: str) -> None:
+        """Converts a slot reservation into a running battle.
+
+        Battles started without a prior reservation are tracked as well.
+
+        :param battle_tag: The new battle's tag.
+        :type battle_tag: str
+        """
+        if battle_tag in self._running_battles:
+            return
+
+        self._update_busy_slot_time()
+        if self._n_reserved:
+            self._n_reserved -= 1
+        self._running_battles.add(battle_tag)
+
+        self._idle.clear()
+
+    def cancel_reservation(self) -> None:
+        """Releases a slot reservation that will not result in a battle."""
+        if self._n_reserved:
+            self._n_reserved -= 1
+            self._wake_up_slot_waiter()
+
+    async def join(self) -> None:
+        """Waits until no battle is running."""
+        await self._idle.wait()
+
+    async def reserve(self) -> None:
+        """Waits for a free battle slot and reserves it."""
+        while not self._has_free_slot():
+            waiter = asyncio.get_event_loop().create_future()
+            self._slot_waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # This waiter was woken up: the slot goes to the next one
+                    self._wake_up_slot_waiter()
+                raise
+        self._n_reserved += 1
+
+    @property
+    def average_concurrent_battles(self) -> float:
+        """
+        :return: The average number of running battles since the first battle started.
+        :rtype: float
+        """
+        if self._start_time is None:
+            return 0.0
+        self._update_busy_slot_time()
+        elapsed = self._last_update - self._start_time  # pyre-ignore
+        if elapsed <= 0:
+            return float(len(self._running_battles))
+        return self._busy_slot_time / elapsed
+
+    @property
+    def max_concurrent_battles(self) -> int:
+        """
+        :return: The number of battle slots. 0 means no limit.
+        :rtype: int
+        """
+        return self._max_concurrent_battles
+
+    @property
+    def n_reserved_slots(self) -> int:
+        """
+        :return: The number of slots reserved for battles that have not started yet.
+        :rtype: int
+        """
+        return self._n_reserved
+
+    @property
+    def n_running_battles(self) -> int:
+        """
+        :return: The number of running battles.
+        :rtype: int
+        """
+        return len(self._running_battles)
+
+    @property
+    def utilization(self) -> Optional[float]:
+        """
+        :return: The fraction of slot time spent running battles since the first battle
+            started, or None if no limit is applied.
+        :rtype: float, optional
+        """
+        if not self._max_concurrent_battles:
+            return None
+        return self.average_concurrent_battles / self._max_concurrent_battles
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""This module defines a fixed, integer-indexed action space for double battles.
+"""
+
+import numpy as np  # pyre-ignore
+
+from typing import List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from poke_env.environment.double_battle import DoubleBattle
+from poke_env.player.battle_order import BattleOrder
+from poke_env.player.battle_order import DefaultBattleOrder
+from poke_env.player.battle_order import DoubleBattleOrder
+
+
+class DoublesActionSpace:
+    """Flat action space covering every order of a double battle request.
+
+    Each active pokemon slot has SLOT_SIZE actions:
+
+    action = 0:
+        The slot passes.
+    1 <= action < 81:
+        With k = action - 1, the k // 20th available move of the slot is used on
+        target TARGETS[(k // 4) % 5], with gimmick GIMMICKS[k % 4].
+    81 <= action < 87:
+        The action - 81th available switch of the slot is executed.
+
+    Joint actions are indexed as first_slot_action * SLOT_SIZE + second_slot_action,
+    for a total of SLOT_SIZE ** 2 actions.
+
+    Legal joint actions are computed once per request as a boolean mask, by
+    combining the legal actions of each slot with a static compatibility matrix
+    forbidding two gimmicks of the same kind or two switches to the same pokemon.
+    Decoding an index to an order is done in constant time, and sampling draws from
+    the mask without building any order beyond the one returned.
+    """
+
+    N_MOVES = 4
+    N_SWITCHES = 6
+    TARGETS = (
+        DoubleBattle.POKEMON_2_POSITION,
+        DoubleBattle.POKEMON_1_POSITION,
+        DoubleBattle.EMPTY_TARGET_POSITION,
+        DoubleBattle.OPPONENT_1_POSITION,
+        DoubleBattle.OPPONENT_2_POSITION,
+    )
+    GIMMICKS = (None, "mega", "z_move", "dynamax")
+
+    PASS = 0
+    MOVE_OFFSET = 1
+    SWITCH_OFFSET = MOVE_OFFSET + N_MOVES * len(TARGETS) * len(GIMMICKS)
+    SLOT_SIZE = SWITCH_OFFSET + N_SWITCHES
+    SIZE = SLOT_SIZE**2
+
+    def __init__(self):
+        self._compatibility = self._compatibility_matrix()
+        self._masks: WeakKeyDictionary = WeakKeyDictionary()
+
+    def __len__(self) -> int:
+        return self.SIZE
+
+    @classmethod
+    def _compatibility_matrix(cls) -> np.ndarray:
+        gimmicks = np.zeros(cls.SLOT_SIZE, dtype=np.int8)
+        moves = np.arange(cls.MOVE_OFFSET, cls.SWITCH_OFFSET)
+        gimmicks[moves] = (moves - cls.MOVE_OFFSET) % len(cls.GIMMICKS)
+
+        switches = np.full(cls.SLOT_SIZE, -1, dtype=np.int8)
+        switches[cls.SWITCH_OFFSET :] = np.arange(cls.N_SWITCHES)
+
+        same_gimmick = (gimmicks[:, None] == gimmicks[None, :]) & (
+            gimmicks[:, None] > 0
+        )
+        same_switch = (switches[:, None] == switches[None, :]) & (
+            switches[:, None] >= 0
+        )
+        return ~(same_gimmick | same_switch)
+
+    @classmethod
+    def move_action(cls, move_index: int, target: int, gimmick=None) -> int:
+        """Returns the slot action using a move.
+
+        :param move_index: The index of the move in the slot's available moves.
+        :type move_index: int
+        :param target: The showdown target of the move.
+        :type target: int
+        :param gimmick: The gimmick used with the move: None, "mega", "z_move" or
+            "dynamax". Defaults to None.
+        :type gimmick: str, optional
+        :return: The slot action.
+        :rtype: int
+        """
+        return (
+            cls.MOVE_OFFSET
+            + (move_index * len(cls.TARGETS) + cls.TARGETS.index(target))
+            * len(cls.GIMMICKS)
+            + cls.GIMMICKS.index(gimmick)
+        )
+
+    @classmethod
+    def switch_action(cls, switch_index: int) -> int:
+        """Returns the slot action switching to a pokemon.
+
+        :param switch_index: The index of the pokemon in the slot's available
+            switches.
+        :type switch_index: int
+        :return: The slot action.
+        :rtype: int
+        """
+        return cls.SWITCH_OFFSET + switch_index
+
+    @classmethod
+    def join_actions(cls, first_action: int, second_action: int) -> int:
+        """Returns the joint action index of two slot actions.
+
+        :param first_action: The action of the first slot.
+        :type first_action: int
+        :param second_action: The action of the second slot.
+        :type second_action: int
+        :return: The joint action.
+        :rtype: int
+        """
+        return first_action * cls.SLOT_SIZE + second_action
+
+    @classmethod
+    def split_action(cls, action: int) -> Tuple[int, int]:
+        """Returns the slot actions of a joint action.
+
+        :param action: The joint action.
+        :type action: int
+        :return: The actions of the first and second slots.
+        :rtype: tuple of int
+        """
+        return divmod(action, cls.SLOT_SIZE)  # pyre-ignore
+
+    def _slot_mask(self, battle: DoubleBattle, slot: int) -> np.ndarray:
+        mask = np.zeros(self.SLOT_SIZE, dtype=bool)
+        if any(battle.force_switch) and not battle.force_switch[slot]:
+            mask[self.PASS] = True
+            return mask
+
+        mon = battle.active_pokemon[slot]
+        if mon is not None and not battle.force_switch[slot]:
+            z_moves = set(mon.available_z_moves) if battle.can_z_move[slot] else set()
+            for i, move in enumerate(battle.available_moves[slot][: self.N_MOVES]):
+                for target in battle.get_possible_showdown_targets(move, mon):
+                    mask[self.move_action(i, target)] = True
+                    if battle.can_mega_evolve[slot]:
+                        mask[self.move_action(i, target, "mega")] = True
+                    if move in z_moves:
+                        mask[self.move_action(i, target, "z_move")] = True
+                if battle.can_dynamax[slot]:
+                    for target in battle.get_possible_showdown_targets(
+                        move, mon, dynamax=True
+                    ):
+                        mask[self.move_action(i, target, "dynamax")] = True
+
+        n_switches = min(len(battle.available_switches[slot]), self.N_SWITCHES)
+        mask[self.SWITCH_OFFSET : self.SWITCH_OFFSET + n_switches] = True
+
+        if not mask.any():
+            mask[self.PASS] = True
+        return mask
+
+    def _decode_slot_action(
+        self, battle: DoubleBattle, slot: int, action: int
+    ) -> Optional[BattleOrder]:
+        mon = battle.active_pokemon[slot]
+        if action == self.PASS:
+            return None
+        elif action < self.SWITCH_OFFSET:
+            move_index, gimmick = divmod(action - self.MOVE_OFFSET, len(self.GIMMICKS))
+            move_index, target = divmod(move_index, len(self.TARGETS))
+            gimmick = self.GIMMICKS[gimmick]
+            return BattleOrder(
+                battle.available_moves[slot][move_index],
+                actor=mon,
+                move_target=self.TARGETS[target],
+                mega=gimmick == "mega",
+                z_move=gimmick == "z_move",
+                dynamax=gimmick == "dynamax",
+            )
+        else:
+            return BattleOrder(
+                battle.available_switches[slot][action - self.SWITCH_OFFSET],
+                actor=mon,
+            )
+
+    def action_mask(self, battle: DoubleBattle) -> np.ndarray:
+        """Returns the mask of the legal joint actions in battle's current request.
+
+        The mask is computed once per request. When no combination of slot actions is
+        legal, only the action passing for both slots is, which is decoded as the
+        default order.
+
+        :param battle: The battle awaiting an order.
+        :type battle: DoubleBattle
+        :return: A boolean array of size SIZE.
+        :rtype: np.ndarray
+        """
+        cached = self._masks.get(battle)
+        if cached is not None and cached[0] == battle.rqid:
+            return cached[1]
+
+        mask = np.logical_and(
+            np.outer(self._slot_mask(battle, 0), self._slot_mask(battle, 1)),
+            self._compatibility,
+        ).ravel()
+        if not mask.any():
+            mask[self.join_actions(self.PASS, self.PASS)] = True
+
+        self._masks[battle] = (battle.rqid, mask)
+        return mask
+
+    def legal_actions(self, battle: DoubleBattle) -> np.ndarray:
+        """
+        :param battle: The battle awaiting an order.
+        :type battle: DoubleBattle
+        :return: The sorted indices of the legal joint actions.
+        :rtype: np.ndarray
+        """
+        return np.flatnonzero(self.action_mask(battle))
+
+    def sample(
+        self, battle: DoubleBattle, random_state: Optional[np.random.RandomState] = None
+    ) -> int:
+        """Returns a legal joint action, uniformly at random.
+
+        :param battle: The battle awaiting an order.
+        :type battle: DoubleBattle
+        :param random_state: The random state used for sampling. Defaults to numpy's
+            global random state.
+        :type random_state: np.random.RandomState, optional
+        :return: The joint action.
+        :rtype: int
+        """
+        if random_state is None:
+            random_state = np.random
+        legal_actions = self.legal_actions(battle)
+        return int(legal_actions[random_state.randint(len(legal_actions))])
+
+    def to_order(self, action: int, battle: DoubleBattle) -> BattleOrder:
+        """Converts a joint action to an order.
+
+        Orders of slots that pass are left empty. Following
+        DoubleBattleOrder.join_orders, a single order is always sent as the first
+        order.
+
+        :param action: The joint action. It should be legal in battle's current
+            request.
+        :type action: int
+        :param battle: The battle in which to act.
+        :type battle: DoubleBattle
+        :return: The order to send to the server.
+        :rtype: BattleOrder
+        """
+        orders: List[BattleOrder] = [
+            order
+            for order in (
+                self._decode_slot_action(battle, slot, slot_action)
+                for slot, slot_action in enumerate(self.split_action(action))
+            )
+            if order is not None
+        ]
+        if not orders:
+            return DefaultBattleOrder()
+        return DoubleBattleOrder(*orders)
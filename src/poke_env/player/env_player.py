@@ -3,17 +3,22 @@
 """
 
 from abc import ABC, abstractmethod, abstractproperty
+from asyncio import Future
+from asyncio import Queue
+from collections import deque
+from concurrent import futures
 from gym.core import Env  # pyre-ignore
 
-from queue import Queue
-from threading import Thread
-
-from typing import Any, Callable, List, Optional, Tuple, Union
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
 
 from poke_env.environment.abstract_battle import AbstractBattle
 from poke_env.environment.battle import Battle
+from poke_env.environment.double_battle import DoubleBattle
 from poke_env.player.battle_order import BattleOrder
+from poke_env.player.doubles_action_space import DoublesActionSpace
+from poke_env.player.league import League
 from poke_env.player.player import Player
+from poke_env.player.reward_engine import RewardEngine
 from poke_env.player_configuration import PlayerConfiguration
 from poke_env.server_configuration import ServerConfiguration
 from poke_env.teambuilder.teambuilder import Teambuilder
@@ -21,16 +26,21 @@ from poke_env.utils import to_id_str
 
 import asyncio
 import numpy as np  # pyre-ignore
-import time
 
 
 class EnvPlayer(Player, Env, ABC):  # pyre-ignore
-    """Player exposing the Open AI Gym Env API. Recommended use is with play_against."""
+    """Player exposing the Open AI Gym Env API. Recommended use is with play_against.
+
+    choose_move waits for actions on asyncio futures, so that the event loop keeps
+    running other coroutines while the agent decides. The gym API is exposed both as
+    coroutines, async_reset and async_step, to be awaited from the player's event loop,
+    and as the regular reset and step methods, which can be called from another thread
+    such as the one running play_against's env_algorithm.
+    """
 
     _ACTION_SPACE = None
     _DEFAULT_BATTLE_FORMAT = "gen8randombattle"
-    MAX_BATTLE_SWITCH_RETRY = 10000
-    PAUSE_BETWEEN_RETRIES = 0.001
+    RESET_TIMEOUT = 10.0
 
     def __init__(
         self,
@@ -84,10 +94,14 @@ class EnvPlayer(Player, Env, ABC):  # pyre-ignore
             start_timer_on_battle_start=start_timer_on_battle_start,
             team=team,
         )
-        self._actions = {}
+        self._action_masks: Dict[AbstractBattle, np.ndarray] = {}
+        self._actions: Dict[AbstractBattle, Future] = {}
         self._current_battle: AbstractBattle
-        self._observations = {}
-        self._reward_buffer = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._new_battles: Queue = Queue()
+        self._observation_waiters: Dict[AbstractBattle, Callable[[Any], None]] = {}
+        self._observations: Dict[AbstractBattle, Deque] = {}
+        self._reward_engine = RewardEngine()
         self._start_new_battle = False
 
     @abstractmethod
@@ -96,20 +110,153 @@ class EnvPlayer(Player, Env, ABC):  # pyre-ignore
     ) -> BattleOrder:  # pragma: no cover
         """Abstract method converting elements of the action space to move orders."""
 
+    def _action_mask(self, battle: AbstractBattle) -> np.ndarray:
+        """Returns a boolean mask of the actions that _action_to_move converts to the
+        corresponding order in battle's current request, rather than to a random one.
+
+        The default implementation allows every action.
+
+        :param battle: The battle awaiting an order.
+        :type battle: AbstractBattle
+        :return: The action mask.
+        :rtype: np.ndarray
+        """
+        return np.ones(len(self.action_space), dtype=bool)
+
     def _battle_finished_callback(self, battle: AbstractBattle) -> None:
-        self._observations[battle].put(self.embed_battle(battle))
+        self._action_masks.pop(battle, None)
+        if battle in self._observations:
+            self._put_observation(battle, self.embed_battle(battle))
+
+        action = self._actions.pop(battle, None)
+        if action is not None and not action.done():
+            action.set_result(self.choose_default_move())
+
+    def _get_observation(
+        self, battle: AbstractBattle, callback: Callable[[Any], None]
+    ) -> None:
+        """Calls callback with the next observation of battle, as soon as it is
+        available. Must be called from the player's event loop.
+        """
+        if self._observations[battle]:
+            callback(self._observations[battle].popleft())
+        else:
+            self._observation_waiters[battle] = callback
 
     def _init_battle(self, battle: AbstractBattle) -> None:
-        self._observations[battle] = Queue()
-        self._actions[battle] = Queue()
+        self._observations[battle] = deque()
+        self._new_battles.put_nowait(battle)
+
+    async def _next_observation(self, battle: AbstractBattle) -> Any:
+        observation = asyncio.get_event_loop().create_future()
+        self._get_observation(battle, observation.set_result)
+        try:
+            return await observation
+        except asyncio.CancelledError:
+            self._observation_waiters.pop(battle, None)
+            raise
+
+    def _put_observation(self, battle: AbstractBattle, observation: Any) -> None:
+        waiter = self._observation_waiters.pop(battle, None)
+        if waiter is None:
+            self._observations[battle].append(observation)
+        else:
+            waiter(observation)
+
+    def _run(self, coroutine, timeout: Optional[float] = None) -> Any:
+        """Runs a coroutine on the player's event loop from another thread.
+
+        :param coroutine: The coroutine to run.
+        :param timeout: Maximum waiting time, in seconds. Defaults to None.
+        :type timeout: float, optional
+        :raises: EnvironmentError if the player is not running battles or if the
+            timeout expires.
+        :return: The coroutine's result.
+        """
+        if self._loop is None:
+            raise EnvironmentError(
+                "%s is not running battles. Use play_against, or the async_reset and "
+                "async_step coroutines." % self.username
+            )
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(timeout)
+        except futures.TimeoutError:
+            future.cancel()
+            raise EnvironmentError(
+                "%s did not get a response in %ss." % (self.username, timeout)
+            )
+
+    def _send_action(self, action: int) -> None:
+        pending_action = self._actions.pop(self._current_battle, None)
+        if pending_action is not None and not pending_action.done():
+            pending_action.set_result(action)
+
+    def _transition(self, observation: Any) -> Tuple:
+        return (
+            observation,
+            self.compute_reward(self._current_battle),
+            self._current_battle.finished,
+            {"action_mask": self.get_action_mask(self._current_battle)},
+        )
+
+    async def async_reset(self) -> Any:
+        """Coroutine version of reset, to be awaited from the player's event loop.
 
-    def choose_move(self, battle: AbstractBattle) -> BattleOrder:
-        if battle not in self._observations or battle not in self._actions:
+        :return: The observation of the new current battle.
+        :rtype: Any
+        :raises: EnvironmentError
+        """
+        while True:
+            try:
+                battle = await asyncio.wait_for(
+                    self._new_battles.get(), self.RESET_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                battle = None
+
+            if battle is None:
+                # Put the marker back so that later calls fail immediately as well
+                self._new_battles.put_nowait(None)
+                raise EnvironmentError("User %s has no active battle." % self.username)
+            if not battle.finished:
+                break
+
+        self._current_battle = battle
+        return await self._next_observation(battle)
+
+    async def async_step(self, action: int) -> Tuple:
+        """Coroutine version of step, to be awaited from the player's event loop.
+
+        :param action: The action to perform.
+        :type action: int
+        :return: A tuple containing the next observation, the reward, a boolean
+            indicating wheter the episode is finished, and additional information. The
+            information dict contains the legal action mask of the next request under
+            the "action_mask" key.
+        :rtype: tuple
+        """
+        if self._current_battle.finished:
+            observation = await self.async_reset()
+        else:
+            self._send_action(action)
+            observation = await self._next_observation(self._current_battle)
+        return self._transition(observation)
+
+    async def choose_move(self, battle: AbstractBattle) -> BattleOrder:
+        if battle not in self._observations:
             self._init_battle(battle)
-        self._observations[battle].put(self.embed_battle(battle))
-        action = self._actions[battle].get()
 
-        return self._action_to_move(action, battle)
+        action = asyncio.get_event_loop().create_future()
+        self._actions[battle] = action
+        # Computed once per request, as the battle does not change until we answer
+        self._action_masks[battle] = self._action_mask(battle)
+        self._put_observation(battle, self.embed_battle(battle))
+
+        order = await action
+        if isinstance(order, BattleOrder):
+            return order
+        return self._action_to_move(order, battle)
 
     def close(self) -> None:
         """Unimplemented. Has no effect."""
@@ -143,24 +290,32 @@ class EnvPlayer(Player, Env, ABC):  # pyre-ignore
         :rtype: Any
         """
 
+    def get_action_mask(self, battle: AbstractBattle) -> np.ndarray:
+        """Returns the mask of the actions that are legal in battle's current request.
+
+        Masks are computed once per request. Battles that are finished or that are not
+        awaiting an order have no legal action.
+
+        :param battle: The battle.
+        :type battle: AbstractBattle
+        :return: A boolean array with one entry per action of the action space.
+        :rtype: np.ndarray
+        """
+        if battle in self._action_masks:
+            return self._action_masks[battle]
+        return np.zeros(len(self.action_space), dtype=bool)
+
     def reset(self) -> Any:
-        """Resets the internal environment state. The current battle will be set to an
-        active unfinished battle.
+        """Resets the internal environment state. The current battle will be set to the
+        next active unfinished battle.
 
         :return: The observation of the new current battle.
         :rtype: Any
-        :raies: EnvironmentError
+        :raises: EnvironmentError if no battle starts within RESET_TIMEOUT seconds, or
+            once play_against stopped starting battles.
         """
-        for _ in range(self.MAX_BATTLE_SWITCH_RETRY):
-            battles = dict(self._actions.items())
-            battles = [b for b in battles if not b.finished]
-            if battles:
-                self._current_battle = battles[0]
-                observation = self._observations[self._current_battle].get()
-                return observation
-            time.sleep(self.PAUSE_BETWEEN_RETRIES)
-        else:
-            raise EnvironmentError("User %s has no active battle." % self.username)
+        # The extra second lets async_reset time out by itself
+        return self._run(self.async_reset(), timeout=self.RESET_TIMEOUT + 1)
 
     def render(self, mode="human") -> None:
         """A one line rendering of the current state of the battle."""
@@ -241,37 +396,15 @@ class EnvPlayer(Player, Env, ABC):  # pyre-ignore
         :return: The reward.
         :rtype: float
         """
-        if battle not in self._reward_buffer:
-            self._reward_buffer[battle] = starting_value
-        current_value = 0
-
-        for mon in battle.team.values():
-            current_value += mon.current_hp_fraction * hp_value
-            if mon.fainted:
-                current_value -= fainted_value
-            elif mon.status is not None:
-                current_value -= status_value
-
-        current_value += (number_of_pokemons - len(battle.team)) * hp_value
-
-        for mon in battle.opponent_team.values():
-            current_value -= mon.current_hp_fraction * hp_value
-            if mon.fainted:
-                current_value += fainted_value
-            elif mon.status is not None:
-                current_value += status_value
-
-        current_value -= (number_of_pokemons - len(battle.opponent_team)) * hp_value
-
-        if battle.won:
-            current_value += victory_value
-        elif battle.lost:
-            current_value -= victory_value
-
-        to_return = current_value - self._reward_buffer[battle]
-        self._reward_buffer[battle] = current_value
-
-        return to_return
+        return self._reward_engine.compute_reward(
+            battle,
+            fainted_value=fainted_value,
+            hp_value=hp_value,
+            number_of_pokemons=number_of_pokemons,
+            starting_value=starting_value,
+            status_value=status_value,
+            victory_value=victory_value,
+        )
 
     def seed(self, seed=None) -> None:
         """Sets the numpy seed."""
@@ -283,23 +416,35 @@ class EnvPlayer(Player, Env, ABC):  # pyre-ignore
         :param action: The action to perform.
         :type action: int
         :return: A tuple containing the next observation, the reward, a boolean
-            indicating wheter the episode is finished, and additional information
+            indicating wheter the episode is finished, and additional information. The
+            information dict contains the legal action mask of the next request under
+            the "action_mask" key.
         :rtype: tuple
         """
-        if self._current_battle.finished:
-            observation = self.reset()
-        else:
-            self._actions[self._current_battle].put(action)
-            observation = self._observations[self._current_battle].get()
-        return (
-            observation,
-            self.compute_reward(self._current_battle),
-            self._current_battle.finished,
-            {},
-        )
+        if self._loop is None or self._current_battle.finished:
+            return self._run(self.async_step(action))
+
+        # Fast path, avoiding the creation of a task on the event loop
+        transition: futures.Future = futures.Future()
+
+        def on_observation(observation: Any) -> None:
+            try:
+                transition.set_result(self._transition(observation))
+            except Exception as exception:
+                transition.set_exception(exception)
+
+        def step_in_loop() -> None:
+            self._send_action(action)
+            self._get_observation(self._current_battle, on_observation)
+
+        self._loop.call_soon_threadsafe(step_in_loop)
+        return transition.result()
 
     def play_against(
-        self, env_algorithm: Callable, opponent: Player, env_algorithm_kwargs=None
+        self,
+        env_algorithm: Callable,
+        opponent: Union[Player, League],
+        env_algorithm_kwargs=None,
     ):
         """Executes a function controlling the player while facing opponent.
 
@@ -309,16 +454,21 @@ class EnvPlayer(Player, Env, ABC):  # pyre-ignore
         Additional arguments can be passed to the env_algorithm function with
         env_algorithm_kwargs.
 
-        Battles against opponent will be launched as long as env_algorithm is running.
-        When env_algorithm returns, the current active battle will be finished randomly
-        if it is not already.
+        env_algorithm runs in a separate thread, while battles against opponent are
+        launched on the player's event loop as long as env_algorithm is running. When
+        env_algorithm returns, the current active battle will be finished randomly if
+        it is not already.
+
+        opponent can also be a League, in which case the opponent of each battle is
+        sampled from the league's pool.
 
         :param env_algorithm: A function that controls the player. It must accept the
             player as first argument. Additional arguments can be passed with the
             env_algorithm_kwargs argument.
         :type env_algorithm: callable
-        :param opponent: A player against with the env player will player.
-        :type opponent: Player
+        :param opponent: A player against with the env player will player, or a
+            league of opponents.
+        :type opponent: Player or League
         :param env_algorithm_kwargs: Optional arguments to pass to the env_algorithm.
             Defaults to None.
         """
@@ -348,19 +498,37 @@ class EnvPlayer(Player, Env, ABC):  # pyre-ignore
                 except OSError:
                     break
 
-        loop = asyncio.get_event_loop()
+        async def play(player: EnvPlayer, opponent: Union[Player, League]):
+            algorithm = player._loop.run_in_executor(  # pyre-ignore
+                None, env_algorithm_wrapper, player, env_algorithm_kwargs
+            )
+            if isinstance(opponent, League):
+                await opponent.play(should_stop=lambda: not player._start_new_battle)
+            else:
+                while player._start_new_battle:
+                    await launch_battles(player, opponent)
+
+            # No more battles: pending and future resets fail immediately
+            player._new_battles.put_nowait(None)
+            await algorithm
 
         if env_algorithm_kwargs is None:
             env_algorithm_kwargs = {}
 
-        thread = Thread(
-            target=lambda: env_algorithm_wrapper(self, env_algorithm_kwargs)
-        )
-        thread.start()
+        self._loop = asyncio.get_event_loop()
+        self._new_battles = Queue()
+        try:
+            self._loop.run_until_complete(play(self, opponent))
+        finally:
+            self._loop = None
 
-        while self._start_new_battle:
-            loop.run_until_complete(launch_battles(self, opponent))
-        thread.join()
+    @property
+    def action_mask(self) -> np.ndarray:
+        """
+        :return: The legal action mask of the current battle's request.
+        :rtype: np.ndarray
+        """
+        return self.get_action_mask(self._current_battle)
 
     @abstractproperty
     def action_space(self) -> List:
@@ -372,6 +540,14 @@ class Gen4EnvSinglePlayer(EnvPlayer):  # pyre-ignore
     _ACTION_SPACE = list(range(4 + 6))
     _DEFAULT_BATTLE_FORMAT = "gen4randombattle"
 
+    def _action_mask(self, battle: Battle) -> np.ndarray:  # pyre-ignore
+        mask = np.zeros(len(self._ACTION_SPACE), dtype=bool)
+        n_moves = min(len(battle.available_moves), 4)
+        if not battle.force_switch:
+            mask[:n_moves] = True
+        mask[4 : 4 + len(battle.available_switches)] = True
+        return mask
+
     def _action_to_move(  # pyre-ignore
         self, action: int, battle: Battle
     ) -> BattleOrder:
@@ -426,6 +602,15 @@ class Gen6EnvSinglePlayer(EnvPlayer):  # pyre-ignore
     _ACTION_SPACE = list(range(2 * 4 + 6))
     _DEFAULT_BATTLE_FORMAT = "gen6randombattle"
 
+    def _action_mask(self, battle: Battle) -> np.ndarray:  # pyre-ignore
+        mask = np.zeros(len(self._ACTION_SPACE), dtype=bool)
+        n_moves = min(len(battle.available_moves), 4)
+        if not battle.force_switch:
+            mask[:n_moves] = True
+            mask[4 : 4 + n_moves] = battle.can_mega_evolve
+        mask[8 : 8 + len(battle.available_switches)] = True
+        return mask
+
     def _action_to_move(  # pyre-ignore
         self, action: int, battle: Battle
     ) -> BattleOrder:
@@ -488,6 +673,18 @@ class Gen7EnvSinglePlayer(EnvPlayer):  # pyre-ignore
     _ACTION_SPACE = list(range(3 * 4 + 6))
     _DEFAULT_BATTLE_FORMAT = "gen7randombattle"
 
+    def _action_mask(self, battle: Battle) -> np.ndarray:  # pyre-ignore
+        mask = np.zeros(len(self._ACTION_SPACE), dtype=bool)
+        n_moves = min(len(battle.available_moves), 4)
+        if not battle.force_switch:
+            mask[:n_moves] = True
+            if battle.can_z_move and battle.active_pokemon:
+                n_z_moves = len(battle.active_pokemon.available_z_moves)  # pyre-ignore
+                mask[4 : 4 + min(n_z_moves, 4)] = True
+            mask[8 : 8 + n_moves] = battle.can_mega_evolve
+        mask[12 : 12 + len(battle.available_switches)] = True
+        return mask
+
     def _action_to_move(  # pyre-ignore
         self, action: int, battle: Battle
     ) -> BattleOrder:
@@ -568,6 +765,19 @@ class Gen8EnvSinglePlayer(EnvPlayer):  # pyre-ignore
     _ACTION_SPACE = list(range(4 * 4 + 6))
     _DEFAULT_BATTLE_FORMAT = "gen8randombattle"
 
+    def _action_mask(self, battle: Battle) -> np.ndarray:  # pyre-ignore
+        mask = np.zeros(len(self._ACTION_SPACE), dtype=bool)
+        n_moves = min(len(battle.available_moves), 4)
+        if not battle.force_switch:
+            mask[:n_moves] = True
+            if battle.can_z_move and battle.active_pokemon:
+                n_z_moves = len(battle.active_pokemon.available_z_moves)  # pyre-ignore
+                mask[4 : 4 + min(n_z_moves, 4)] = True
+            mask[8 : 8 + n_moves] = battle.can_mega_evolve
+            mask[12 : 12 + n_moves] = battle.can_dynamax
+        mask[16 : 16 + len(battle.available_switches)] = True
+        return mask
+
     def _action_to_move(  # pyre-ignore
         self, action: int, battle: Battle
     ) -> BattleOrder:
@@ -657,3 +867,46 @@ class Gen8EnvSinglePlayer(EnvPlayer):  # pyre-ignore
                 executed.
         """
         return self._ACTION_SPACE
+
+
+class Gen8EnvDoublePlayer(EnvPlayer):  # pyre-ignore
+    _DOUBLES_ACTION_SPACE = DoublesActionSpace()
+    _ACTION_SPACE = list(range(DoublesActionSpace.SIZE))
+    _DEFAULT_BATTLE_FORMAT = "gen8randomdoublesbattle"
+
+    def _action_mask(self, battle: DoubleBattle) -> np.ndarray:  # pyre-ignore
+        return self._DOUBLES_ACTION_SPACE.action_mask(battle)
+
+    def _action_to_move(  # pyre-ignore
+        self, action: int, battle: DoubleBattle
+    ) -> BattleOrder:
+        """Converts actions to move orders, as described in DoublesActionSpace.
+
+        If the proposed action is illegal, a random legal action is performed.
+
+        :param action: The action to convert.
+        :type action: int
+        :param battle: The battle in which to act.
+        :type battle: DoubleBattle
+        :return: the order to send to the server.
+        :rtype: str
+        """
+        if not 0 <= action < DoublesActionSpace.SIZE:
+            action = self._DOUBLES_ACTION_SPACE.sample(battle)
+        else:
+            # Masks are cached when the request is received
+            mask = self._action_masks.get(battle)
+            if mask is None:
+                mask = self._action_mask(battle)
+            if not mask[action]:
+                action = self._DOUBLES_ACTION_SPACE.sample(battle)
+        return self._DOUBLES_ACTION_SPACE.to_order(action, battle)
+
+    @property
+    def action_space(self) -> List:
+        """The action space for gen 8 double battles.
+
+        Actions index the joint orders of both active pokemon, as described in
+        DoublesActionSpace.
+        """
+        return self._ACTION_SPACE
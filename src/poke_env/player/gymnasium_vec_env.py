@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""This module defines an adapter exposing a VecEnvPlayer as a gymnasium vector
+environment.
+
+gymnasium is an optional dependency, which can be installed with
+``pip install poke_env[gymnasium]``. The adapter follows the vector environment API
+of gymnasium 1.1 and later.
+"""
+
+import asyncio
+import numpy as np  # pyre-ignore
+import random
+
+from threading import Thread
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from poke_env.player.league import League
+from poke_env.player.player import Player
+from poke_env.player.vec_env_player import VecEnvPlayer
+
+try:
+    from gymnasium import spaces  # pyre-ignore
+    from gymnasium.utils import seeding  # pyre-ignore
+    from gymnasium.vector import AutoresetMode  # pyre-ignore
+    from gymnasium.vector import VectorEnv  # pyre-ignore
+    from gymnasium.vector.utils import batch_space  # pyre-ignore
+except ImportError as exception:  # pragma: no cover
+    raise ImportError(
+        "gymnasium 1.1 or later is required to use poke_env.player.gymnasium_vec_env. "
+        "It can be installed on python 3.8 or later with "
+        "pip install poke_env[gymnasium]."
+    ) from exception
+
+
+class GymnasiumVecEnv(VectorEnv):  # pyre-ignore
+    """Gymnasium vector environment playing a VecEnvPlayer's battles against an
+    opponent.
+
+    Each sub-environment is one of the player's battle slots. All battles are driven
+    concurrently by the player's event loop, which runs in a background thread, so
+    step and reset can be called from the training loop's thread.
+
+    Sub-environments are automatically reset: when a battle finishes, the slot's
+    observation is the first observation of its next battle, and the final
+    observation is stored in the info dict under the "final_obs" key, as in
+    gymnasium's same-step autoreset mode.
+    Battles reaching max_episode_steps are forfeited and reported as truncated.
+    The legal action mask of each slot is stored under the "action_mask" key.
+    """
+
+    metadata = {"render_modes": [], "autoreset_mode": AutoresetMode.SAME_STEP}
+
+    def __init__(
+        self,
+        player: VecEnvPlayer,
+        opponent: Union[Player, League],
+        observation_space: Any,
+        max_episode_steps: Optional[int] = None,
+    ):
+        """
+        :param player: The player whose battles are exposed. It must have been
+            created on the current thread's event loop.
+        :type player: VecEnvPlayer
+        :param opponent: The player's opponent, or a league of opponents. It should
+            be able to play n_envs battles concurrently.
+        :type opponent: Player or League
+        :param observation_space: The gymnasium space of the observations returned by
+            the player's embed_battle.
+        :type observation_space: gymnasium.Space
+        :param max_episode_steps: Number of steps after which battles are forfeited
+            and truncated. Defaults to None, never truncating battles.
+        :type max_episode_steps: int, optional
+        """
+        super(GymnasiumVecEnv, self).__init__()
+        self.num_envs = player.n_envs
+        self.closed = False
+        self.single_observation_space = observation_space
+        self.single_action_space = spaces.Discrete(len(player.action_space))
+        self.observation_space = batch_space(observation_space, n=self.num_envs)
+        self.action_space = batch_space(self.single_action_space, n=self.num_envs)
+
+        self._player = player
+        self._opponent = opponent
+        self._max_episode_steps = max_episode_steps
+        self._episode_steps = np.zeros(self.num_envs, dtype=np.int64)
+        self._np_random = None
+
+        self._loop = asyncio.get_event_loop()
+        self._loop_thread: Optional[Thread] = None
+        self._play_future = None
+        self._started = False
+
+    def _start(self) -> None:
+        self._loop_thread = Thread(target=self._loop.run_forever, daemon=True)
+        self._loop_thread.start()
+
+        self._player._loop = self._loop
+        self._player._start_new_battle = True
+        self._play_future = asyncio.run_coroutine_threadsafe(
+            self._player._play_battles(self._opponent), self._loop
+        )
+        self._started = True
+
+    async def _truncate(self, env_index: int) -> Tuple[Any, Any]:
+        final_observation = await self._player.async_forfeit(env_index)
+        return final_observation, await self._player._assign_new_battle(env_index)
+
+    def _infos(
+        self, slot_infos: List[Dict[str, Any]], final_observations: Dict[int, Any]
+    ) -> Dict[str, Any]:
+        infos: Dict[str, Any] = {}
+        for i, slot_info in enumerate(slot_infos):
+            if i in final_observations:
+                infos = self._add_info(
+                    infos, {"final_obs": final_observations[i], "final_info": {}}, i
+                )
+            infos = self._add_info(infos, {"action_mask": slot_info["action_mask"]}, i)
+        return infos
+
+    def close(self, **kwargs) -> None:
+        """Forfeits running battles, stops starting new ones and stops the event loop
+        thread."""
+        if self.closed:
+            return
+        if self._started:
+            self._player._run(self._player._stop_new_battles())
+            for i, battle in enumerate(self._player._env_battles):
+                if battle is not None and not battle.finished:
+                    self._player._run(self._player.async_forfeit(i))
+            self._play_future.cancel()  # pyre-ignore
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()  # pyre-ignore
+            self._player._loop = None
+        self.closed = True
+
+    def reset(
+        self,
+        *,
+        seed: Optional[Union[int, List[int]]] = None,
+        options: Optional[dict] = None,
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Starts a new battle in every sub-environment, forfeiting unfinished ones.
+
+        :param seed: Seed of the random number generators used by the player's random
+            fallbacks. If a list is given, its first element is used. Defaults to None.
+        :type seed: int or list of int, optional
+        :param options: Unused.
+        :type options: dict, optional
+        :return: The batched observations and the info dict.
+        :rtype: tuple
+        """
+        if isinstance(seed, list):
+            seed = seed[0]
+        if seed is not None or self._np_random is None:
+            self._np_random, seed = seeding.np_random(seed)
+            random.seed(seed)
+            np.random.seed(seed % 2**32)
+
+        if not self._started:
+            self._start()
+        for i, battle in enumerate(self._player._env_battles):
+            if battle is not None and not battle.finished:
+                self._player._run(self._player.async_forfeit(i))
+
+        observations = self._player.reset()
+        self._episode_steps[:] = 0
+        slot_infos = [
+            {"action_mask": self._player.get_action_mask(battle)}
+            for battle in self._player._env_battles
+        ]
+        return observations, self._infos(slot_infos, {})
+
+    def step(
+        self, actions: Any
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """Performs one action in each sub-environment.
+
+        :param actions: One action per sub-environment.
+        :type actions: np.ndarray
+        :return: The batched observations, rewards, terminations and truncations, and
+            the info dict.
+        :rtype: tuple
+        """
+        observations, rewards, dones, slot_infos = self._player.step(
+            [int(action) for action in actions]
+        )
+        self._episode_steps += 1
+
+        final_observations = {
+            i: info["terminal_observation"]
+            for i, info in enumerate(slot_infos)
+            if "terminal_observation" in info
+        }
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        if self._max_episode_steps is not None:
+            for i in np.flatnonzero(
+                ~dones & (self._episode_steps >= self._max_episode_steps)
+            ):
+                final_observations[i], observations[i] = self._player._run(
+                    self._truncate(i)
+                )
+                slot_infos[i]["action_mask"] = self._player.get_action_mask(
+                    self._player._env_battles[i]
+                )
+                truncated[i] = True
+
+        self._episode_steps[dones | truncated] = 0
+        return (
+            observations,
+            rewards,
+            dones,
+            truncated,
+            self._infos(slot_infos, final_observations),
+        )
+
+    @property
+    def np_random(self) -> np.random.Generator:
+        """
+        :return: The random number generator seeded by reset.
+        :rtype: np.random.Generator
+        """
+        if self._np_random is None:
+            self._np_random, _ = seeding.np_random()
+        return self._np_random
+
+    @property
+    def player(self) -> VecEnvPlayer:
+        """
+        :return: The player whose battles are exposed.
+        :rtype: VecEnvPlayer
+        """
+        return self._player
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""This module defines a fixed-bucket histogram recording decision latencies.
+"""
+
+import bisect
+import math
+
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+# Bucket upper bounds, in seconds
+DEFAULT_BOUNDS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class LatencyHistogram:
+    """Counts latencies in buckets of fixed upper bounds, as monitoring systems do.
+
+    Recording a latency is a binary search, and the histogram keeps a constant size
+    however many latencies are recorded. Quantiles are interpolated within buckets.
+    """
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS) -> None:
+        """
+        :param bounds: Increasing bucket upper bounds, in seconds. A last bucket
+            counts latencies above the last bound. Defaults to DEFAULT_BOUNDS, from
+            1ms to 60s.
+        :type bounds: sequence of float
+        """
+        if list(bounds) != sorted(bounds) or not bounds:
+            raise ValueError("Bounds must be a non-empty increasing sequence.")
+
+        self._bounds: List[float] = list(bounds)
+        self._counts: List[int] = [0] * (len(bounds) + 1)
+        self._max: float = 0.0
+        self._total: float = 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimates a latency quantile.
+
+        :param q: The quantile, between 0 and 1.
+        :type q: float
+        :return: The estimated quantile, in seconds. Latencies of a bucket are assumed
+            to be uniformly spread between its bounds, and the last bucket ends at the
+            maximum recorded latency. NaN if no latency was recorded.
+        :rtype: float
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1, got %s." % q)
+        if not self.count:
+            return math.nan
+
+        rank = q * self.count
+        cumulated = 0
+        for i, count in enumerate(self._counts):
+            if count and cumulated + count >= rank:
+                lower = self._bounds[i - 1] if i > 0 else 0.0
+                upper = self._bounds[i] if i < len(self._bounds) else self._max
+                upper = min(upper, self._max)
+                return lower + (upper - lower) * max(rank - cumulated, 0) / count
+            cumulated += count
+        return self._max
+
+    def record(self, latency: float) -> None:
+        """Records a latency.
+
+        :param latency: The latency, in seconds.
+        :type latency: float
+        """
+        self._counts[bisect.bisect_left(self._bounds, latency)] += 1
+        self._max = max(self._max, latency)
+        self._total += latency
+
+    @property
+    def bounds(self) -> List[float]:
+        """
+        :return: The bucket upper bounds, in seconds.
+        :rtype: List[float]
+        """
+        return list(self._bounds)
+
+    @property
+    def count(self) -> int:
+        """
+        :return: The number of recorded latencies.
+        :rtype: int
+        """
+        return sum(self._counts)
+
+    @property
+    def counts(self) -> List[int]:
+        """
+        :return: The number of latencies in each bucket. The last bucket counts
+            latencies above the last bound.
+        :rtype: List[int]
+        """
+        return list(self._counts)
+
+    @property
+    def max(self) -> float:
+        """
+        :return: The maximum recorded latency, in seconds.
+        :rtype: float
+        """
+        return self._max
+
+    @property
+    def mean(self) -> float:
+        """
+        :return: The mean latency, in seconds. NaN if no latency was recorded.
+        :rtype: float
+        """
+        if not self.count:
+            return math.nan
+        return self._total / self.count
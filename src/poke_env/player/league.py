@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""This module defines a self-play league, matching a learning player against a pool
+of opponents.
+"""
+
+import asyncio
+import numpy as np  # pyre-ignore
+import sys
+
+from asyncio import Future
+from itertools import islice
+from poke_env.environment.abstract_battle import AbstractBattle
+from poke_env.player.player import Player
+from poke_env.utils import to_id_str
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+
+class League:
+    """Plays a player's battles against a pool of opponents.
+
+    Opponents are other players - for instance, frozen snapshots of the learning
+    player's policy, built from copies of its model. Every opponent stays connected
+    and keeps accepting the player's challenges for as long as it is in the pool, so
+    the opponent of each battle can be chosen independently, without reconnecting nor
+    waiting for other opponents' battles to finish. Battles against different
+    opponents run concurrently, up to the player's max_concurrent_battles.
+
+    The opponent of each battle is sampled with prioritized fictitious self-play: the
+    probability of picking an opponent is proportional to a weighting of the player's
+    estimated win rate against it. Win rates are smoothed with one prior win and one
+    prior loss, and updated as battles finish. Available weightings are:
+
+    - "hard": (1 - win_rate) ** exponent, focusing on opponents the player struggles
+      against.
+    - "variance": win_rate * (1 - win_rate), focusing on opponents of similar
+      strength.
+    - "uniform": every opponent is equally likely, as in fictitious self-play.
+
+    A callable mapping a win rate to a non-negative weight can also be used.
+    """
+
+    WEIGHTINGS = ("hard", "uniform", "variance")
+
+    def __init__(
+        self,
+        player: Player,
+        opponents: Optional[Iterable[Player]] = None,
+        *,
+        exponent: float = 2.0,
+        random_state: Optional[np.random.RandomState] = None,
+        weighting: Union[str, Callable[[float], float]] = "hard",
+    ) -> None:
+        """
+        :param player: The player whose battles are played in the league.
+        :type player: Player
+        :param opponents: The initial pool of opponents. Defaults to None.
+        :type opponents: iterable of Player, optional
+        :param exponent: The exponent of the "hard" weighting. Defaults to 2.
+        :type exponent: float
+        :param random_state: The random state used to sample opponents. Defaults to
+            numpy's global random state.
+        :type random_state: np.random.RandomState, optional
+        :param weighting: The matchmaking weighting: "hard", "variance", "uniform" or
+            a callable mapping a win rate to a weight. Defaults to "hard".
+        :type weighting: str or callable
+        """
+        if not callable(weighting) and weighting not in self.WEIGHTINGS:
+            raise ValueError(
+                "Unknown weighting %s. Expected one of %s, or a callable."
+                % (weighting, ", ".join(self.WEIGHTINGS))
+            )
+
+        self._player = player
+        self._exponent = exponent
+        self._random_state = random_state if random_state is not None else np.random
+        self._weighting = weighting
+
+        self._opponents: Dict[str, Player] = {}
+        self._accepting: Dict[str, Future] = {}
+        self._results: Dict[str, List[int]] = {}
+        self._retired: Set[str] = set()
+
+        self._n_seen_battles = 0
+        self._unfinished_battles: Dict[str, AbstractBattle] = {}
+
+        for opponent in opponents or []:
+            self.add_opponent(opponent)
+
+    def _cancel_retired(self) -> None:
+        for username in self._retired:
+            accepting = self._accepting.pop(username, None)
+            if accepting is not None:
+                accepting.cancel()
+        self._retired.clear()
+
+    def _start_accepting(self) -> None:
+        player_username = to_id_str(self._player.username)
+        for username, opponent in self._opponents.items():
+            if username not in self._accepting:
+                self._accepting[username] = asyncio.ensure_future(
+                    opponent.accept_challenges(player_username, sys.maxsize)
+                )
+
+    def _update_results(self) -> None:
+        # Battles are only appended to the player's battles, unless they are reset
+        battles = self._player.battles
+        if len(battles) < self._n_seen_battles:
+            self._n_seen_battles = 0
+        for battle in islice(battles.values(), self._n_seen_battles, None):
+            self._unfinished_battles[battle.battle_tag] = battle
+        self._n_seen_battles = len(battles)
+
+        for battle_tag, battle in list(self._unfinished_battles.items()):
+            if not battle.finished:
+                continue
+            del self._unfinished_battles[battle_tag]
+
+            results = self._results.get(to_id_str(battle.opponent_username or ""))
+            if results is not None:
+                results[0 if battle.won else 1 if battle.lost else 2] += 1
+
+    def _weight(self, win_rate: float) -> float:
+        if callable(self._weighting):
+            return self._weighting(win_rate)
+        if self._weighting == "hard":
+            return (1 - win_rate) ** self._exponent
+        if self._weighting == "variance":
+            return win_rate * (1 - win_rate)
+        return 1.0
+
+    def add_opponent(self, opponent: Player) -> None:
+        """Adds an opponent to the pool.
+
+        If the league is playing, the opponent starts accepting challenges when the
+        next battle is requested.
+
+        :param opponent: The new opponent.
+        :type opponent: Player
+        """
+        username = to_id_str(opponent.username)
+        if username == to_id_str(self._player.username):
+            raise ValueError("The player can not be its own opponent.")
+        if username in self._opponents:
+            raise ValueError("%s is already in the league." % opponent.username)
+
+        self._opponents[username] = opponent
+        self._results.setdefault(username, [0, 0, 0])
+        self._retired.discard(username)
+
+    def close(self) -> None:
+        """Stops every opponent from accepting challenges."""
+        for accepting in self._accepting.values():
+            accepting.cancel()
+        self._accepting.clear()
+        self._retired.clear()
+
+    async def play(
+        self,
+        n_battles: Optional[int] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """Plays battles against opponents sampled from the pool, then waits for them
+        to finish.
+
+        A new battle is requested as soon as one of the player's battle slots is
+        free, until n_battles battles have been played or should_stop returns True.
+
+        :param n_battles: Number of battles to play. Defaults to None, playing until
+            should_stop returns True.
+        :type n_battles: int, optional
+        :param should_stop: Called whenever a battle slot is free. Battles stop being
+            requested once it returns True. Defaults to None.
+        :type should_stop: callable, optional
+        """
+        player = self._player
+        scheduler = player.battle_scheduler
+        await player.logged_in.wait()
+
+        n_started = 0
+        while n_battles is None or n_started < n_battles:
+            await scheduler.reserve()
+            self._update_results()
+            if should_stop is not None and should_stop():
+                scheduler.cancel_reservation()
+                break
+
+            opponent = self.sample_opponent()
+            self._start_accepting()
+            await opponent.logged_in.wait()
+            await player._request_battle(
+                lambda: player._challenge(to_id_str(opponent.username), player.format),
+                opponent.username,
+            )
+
+            # Challenges to removed opponents have been accepted by now
+            self._cancel_retired()
+            n_started += 1
+
+        await scheduler.join()
+        self._update_results()
+
+    def remove_opponent(self, username: str) -> Player:
+        """Removes an opponent from the pool. Its running battles are played until
+        they finish, and its results are kept.
+
+        :param username: The opponent's username.
+        :type username: str
+        :return: The removed opponent.
+        :rtype: Player
+        """
+        username = to_id_str(username)
+        opponent = self._opponents.pop(username)
+        self._retired.add(username)
+        return opponent
+
+    def sample_opponent(self) -> Player:
+        """Samples an opponent according to the matchmaking probabilities.
+
+        :return: The sampled opponent.
+        :rtype: Player
+        """
+        if not self._opponents:
+            raise ValueError("The league has no opponent.")
+        usernames, probabilities = zip(*self.matchmaking_probabilities.items())
+        index = self._random_state.choice(len(usernames), p=probabilities)
+        return self._opponents[usernames[index]]
+
+    @property
+    def matchmaking_probabilities(self) -> Dict[str, float]:
+        """
+        :return: The probability of each opponent in the pool to be picked for the
+            next battle, by username. If every weight is zero, opponents are equally
+            likely.
+        :rtype: Dict[str, float]
+        """
+        weights = {
+            username: max(self._weight(win_rate), 0.0)
+            for username, win_rate in self.win_rates.items()
+        }
+        total = sum(weights.values())
+        if total <= 0:
+            return {username: 1 / len(weights) for username in weights}
+        return {username: weight / total for username, weight in weights.items()}
+
+    @property
+    def opponents(self) -> Dict[str, Player]:
+        """
+        :return: The opponents in the pool, by username.
+        :rtype: Dict[str, Player]
+        """
+        return dict(self._opponents)
+
+    @property
+    def player(self) -> Player:
+        """
+        :return: The player whose battles are played in the league.
+        :rtype: Player
+        """
+        return self._player
+
+    @property
+    def results(self) -> Dict[str, Tuple[int, int, int]]:
+        """
+        :return: The player's wins, losses and ties against every opponent that was
+            in the pool, by username.
+        :rtype: Dict[str, Tuple[int, int, int]]
+        """
+        self._update_results()
+        return {username: tuple(r) for username, r in self._results.items()}
+
+    @property
+    def win_rates(self) -> Dict[str, float]:
+        """
+        :return: The player's smoothed win rate against each opponent in the pool, by
+            username. Ties count as half a win.
+        :rtype: Dict[str, float]
+        """
+        self._update_results()
+        win_rates = {}
+        for username in self._opponents:
+            wins, losses, ties = self._results[username]
+            win_rates[username] = (wins + ties / 2 + 1) / (wins + losses + ties + 2)
+        return win_rates
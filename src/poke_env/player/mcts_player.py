@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""This module defines a Monte Carlo tree search player baseline, searching over an
+approximate forward model of battles.
+"""
+
+import asyncio
+import math
+import random
+
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from poke_env.environment.abstract_battle import AbstractBattle
+from poke_env.environment.battle import Battle
+from poke_env.environment.damage_calculator import DamageCalculator
+from poke_env.environment.forward_model import ForwardModel
+from poke_env.environment.forward_model import SimulationState
+from poke_env.environment.set_inference import SetInference
+from poke_env.player.battle_order import BattleOrder
+from poke_env.player.player import Player
+from poke_env.player_configuration import PlayerConfiguration
+from poke_env.server_configuration import ServerConfiguration
+from poke_env.teambuilder.teambuilder import Teambuilder
+
+# Visits and summed values of each action, by action
+_ActionStatistics = Dict[Optional[int], List[float]]
+
+
+class _Node:
+    """Open loop search node, reached by a sequence of joint actions. Each side's
+    statistics are kept separately, as sides choose their actions simultaneously."""
+
+    __slots__ = ("children", "statistics")
+
+    def __init__(self) -> None:
+        self.children: Dict[Tuple[Optional[int], Optional[int]], "_Node"] = {}
+        self.statistics: Tuple[_ActionStatistics, _ActionStatistics] = ({}, {})
+
+
+def _select(
+    statistics: _ActionStatistics,
+    actions: List[Optional[int]],
+    side: int,
+    exploration: float,
+    rng: random.Random,
+) -> Optional[int]:
+    if len(actions) == 1:
+        return actions[0]
+
+    unvisited = [action for action in actions if action not in statistics]
+    if unvisited:
+        return rng.choice(unvisited)
+
+    log_visits = math.log(sum(statistics[action][0] for action in actions))
+    best_action, best_score = None, -math.inf
+    for action in actions:
+        visits, value = statistics[action]
+        mean = value / visits if side == 0 else 1 - value / visits
+        score = mean + exploration * math.sqrt(log_visits / visits)
+        if score > best_score:
+            best_action, best_score = action, score
+    return best_action
+
+
+def _rollout(
+    model: ForwardModel,
+    state: SimulationState,
+    rng: random.Random,
+    rollout_depth: int,
+    epsilon: float,
+) -> float:
+    for _ in range(rollout_depth):
+        if model.is_terminal(state):
+            break
+        model.step(
+            state,
+            model.policy(state, 0, rng, epsilon),
+            model.policy(state, 1, rng, epsilon),
+            rng,
+        )
+    return model.value(state)
+
+
+def _search(
+    model: ForwardModel,
+    time_budget: float,
+    max_rollouts: Optional[int],
+    exploration: float,
+    rollout_depth: int,
+    epsilon: float,
+    seed: Optional[int],
+) -> Tuple[Dict[int, Tuple[int, float]], int]:
+    """Runs a decoupled UCT search from the model's root state, until the time budget
+    is spent or max_rollouts rollouts were run.
+
+    Returns the visits and summed values of the player's root actions, and the number
+    of rollouts.
+    """
+    deadline = perf_counter() + time_budget
+    rng = random.Random(seed)
+    root_state = model.root_state
+    root_actions: List[List[Optional[int]]] = [
+        list(model.root_actions),
+        [None] if model.root_forced else model.legal_actions(root_state, 1),
+    ]
+    root = _Node()
+
+    n_rollouts = 0
+    while (max_rollouts is None or n_rollouts < max_rollouts) and (
+        perf_counter() < deadline
+    ):
+        state = root_state.copy()
+        node = root
+        path = []
+        while not model.is_terminal(state):
+            actions = (
+                root_actions
+                if node is root
+                else [model.legal_actions(state, side) for side in (0, 1)]
+            )
+            joint_action = (
+                _select(node.statistics[0], actions[0], 0, exploration, rng),
+                _select(node.statistics[1], actions[1], 1, exploration, rng),
+            )
+            path.append((node, joint_action))
+            model.step(state, joint_action[0], joint_action[1], rng)
+
+            child = node.children.get(joint_action)
+            if child is None:
+                node.children[joint_action] = _Node()
+                break
+            node = child
+
+        value = _rollout(model, state, rng, rollout_depth, epsilon)
+        for node, joint_action in path:
+            for side in (0, 1):
+                statistics = node.statistics[side].setdefault(
+                    joint_action[side], [0, 0.0]
+                )
+                statistics[0] += 1
+                statistics[1] += value
+        n_rollouts += 1
+
+    return (
+        {
+            action: (int(visits), value)
+            for action, (visits, value) in root.statistics[0].items()
+            if action is not None
+        },
+        n_rollouts,
+    )
+
+
+class MCTSPlayer(Player):
+    """A Monte Carlo tree search baseline for singles battles.
+
+    Each turn, a ForwardModel is compiled from the battle, and a decoupled UCT search
+    is run over it until time_budget seconds are spent: the player's and the
+    opponent's actions are selected independently with UCB1 in open loop nodes, and
+    new nodes are evaluated with a rollout of at most rollout_depth turns, both sides
+    following the model's epsilon-greedy policy. The most visited action is played.
+
+    Searches run outside of the event loop, so that other battles progress while a
+    decision is pending. With n_workers greater than 1, independent searches run in
+    parallel in a process pool and their root statistics are summed. Dynamax, mega
+    evolutions and z-moves are not used, and double battles are played randomly.
+    """
+
+    def __init__(
+        self,
+        player_configuration: Optional[PlayerConfiguration] = None,
+        *,
+        avatar: Optional[int] = None,
+        battle_format: str = "gen8randombattle",
+        calculator: Optional[DamageCalculator] = None,
+        choose_move_executor: Optional[Executor] = None,
+        decision_budget: Optional[float] = None,
+        epsilon: float = 0.1,
+        exploration: float = 0.7,
+        log_level: Optional[int] = None,
+        max_concurrent_battles: int = 1,
+        max_rollouts: Optional[int] = None,
+        n_workers: int = 1,
+        rollout_depth: int = 10,
+        seed: Optional[int] = None,
+        server_configuration: Optional[ServerConfiguration] = None,
+        set_inference: Optional[SetInference] = None,
+        start_timer_on_battle_start: bool = False,
+        start_listening: bool = True,
+        team: Optional[Union[str, Teambuilder]] = None,
+        time_budget: float = 1.0,
+    ) -> None:
+        """
+        :param player_configuration: Player configuration. If empty, defaults to an
+            automatically generated username with no password. This option must be set
+            if the server configuration requires authentication.
+        :type player_configuration: PlayerConfiguration, optional
+        :param avatar: Player avatar id. Optional.
+        :type avatar: int, optional
+        :param battle_format: Name of the battle format this player plays. Defaults to
+            gen8randombattle.
+        :type battle_format: str
+        :param calculator: The damage calculator used by forward models. Defaults to a
+            DamageCalculator with default parameters.
+        :type calculator: DamageCalculator, optional
+        :param choose_move_executor: Executor running searches when n_workers is 1.
+            Defaults to None, using the event loop's default executor.
+        :type choose_move_executor: Executor, optional
+        :param decision_budget: Time, in seconds, after which a decision is late.
+            Searches stop before, even if time_budget is not spent. Defaults to None,
+            for no budget.
+        :type decision_budget: float, optional
+        :param epsilon: Probability of random actions in rollouts. Defaults to 0.1.
+        :type epsilon: float
+        :param exploration: UCB1's exploration coefficient. Defaults to 0.7.
+        :type exploration: float
+        :param log_level: The player's logger level.
+        :type log_level: int. Defaults to logging's default level.
+        :param max_concurrent_battles: Maximum number of battles this player will play
+            concurrently. If 0, no limit will be applied. Defaults to 1.
+        :type max_concurrent_battles: int
+        :param max_rollouts: Maximum number of rollouts per search. Defaults to None,
+            only limiting searches by time_budget.
+        :type max_rollouts: int, optional
+        :param n_workers: Number of parallel searches, at least 1. Defaults to 1,
+            searching in the calling process.
+        :type n_workers: int
+        :param rollout_depth: Maximum number of turns simulated by rollouts. Defaults
+            to 10.
+        :type rollout_depth: int
+        :param seed: Seed of the searches' random generators. Defaults to None.
+        :type seed: int, optional
+        :param server_configuration: Server configuration. Defaults to Localhost Server
+            Configuration.
+        :type server_configuration: ServerConfiguration, optional
+        :param set_inference: Used to infer the unknown moves of opponent pokemons.
+            Defaults to None.
+        :type set_inference: SetInference, optional
+        :param start_listening: Whether to start listening to the server. Defaults to
+            True.
+        :type start_listening: bool
+        :param start_timer_on_battle_start: Whether to automatically start the battle
+            timer on battle start. Defaults to False.
+        :type start_timer_on_battle_start: bool
+        :param team: The team to use for formats requiring a team. Can be a showdown
+            team string, a showdown packed team string, of a ShowdownTeam object.
+            Defaults to None.
+        :type team: str or Teambuilder, optional
+        :param time_budget: Time spent searching each decision, in seconds. Defaults
+            to 1.
+        :type time_budget: float
+        """
+        if n_workers < 1:
+            raise ValueError("n_workers must be at least 1, got %d." % n_workers)
+
+        super(MCTSPlayer, self).__init__(
+            player_configuration=player_configuration,
+            avatar=avatar,
+            battle_format=battle_format,
+            choose_move_executor=choose_move_executor,
+            decision_budget=decision_budget,
+            log_level=log_level,
+            max_concurrent_battles=max_concurrent_battles,
+            server_configuration=server_configuration,
+            start_timer_on_battle_start=start_timer_on_battle_start,
+            start_listening=start_listening,
+            team=team,
+        )
+        self._calculator = calculator or DamageCalculator()
+        self._epsilon = epsilon
+        self._exploration = exploration
+        self._max_rollouts = max_rollouts
+        self._n_workers = n_workers
+        self._rollout_depth = rollout_depth
+        self._set_inference = set_inference
+        self._time_budget = time_budget
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._last_n_rollouts = 0
+        self._random = random.Random(seed)
+
+    def _merge_results(
+        self, results: List[Tuple[Dict[int, Tuple[int, float]], int]]
+    ) -> Dict[int, Tuple[int, float]]:
+        statistics: Dict[int, Tuple[int, float]] = {}
+        for worker_statistics, _ in results:
+            for action, (visits, value) in worker_statistics.items():
+                total_visits, total_value = statistics.get(action, (0, 0.0))
+                statistics[action] = (total_visits + visits, total_value + value)
+        self._last_n_rollouts = sum(n_rollouts for _, n_rollouts in results)
+        return statistics
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self._n_workers)
+        return self._executor
+
+    def _search_jobs(
+        self, model: ForwardModel, time_budget: Optional[float]
+    ) -> List[Tuple[Any, ...]]:
+        """Returns the arguments of each worker's search."""
+        args = (
+            self._time_budget if time_budget is None else time_budget,
+            self._max_rollouts,
+            self._exploration,
+            self._rollout_depth,
+            self._epsilon,
+        )
+        return [
+            (model, *args, self._random.getrandbits(32)) for _ in range(self._n_workers)
+        ]
+
+    async def async_search(
+        self, model: ForwardModel, time_budget: Optional[float] = None
+    ) -> Dict[int, Tuple[int, float]]:
+        """Searches the player's best root action in a forward model, without
+        blocking the event loop.
+
+        :param model: The forward model.
+        :type model: ForwardModel
+        :param time_budget: Time spent searching, in seconds. Defaults to the
+            player's time_budget.
+        :type time_budget: float, optional
+        :return: The number of visits and summed values of each explored root action.
+        :rtype: Dict[int, Tuple[int, float]]
+        """
+        jobs = self._search_jobs(model, time_budget)
+        if self._n_workers == 1:
+            results = [
+                await asyncio.get_event_loop().run_in_executor(
+                    self.choose_move_executor, _search, *jobs[0]
+                )
+            ]
+        else:
+            executor = self._process_pool()
+            results = await asyncio.gather(
+                *[asyncio.wrap_future(executor.submit(_search, *job)) for job in jobs]
+            )
+        return self._merge_results(list(results))
+
+    async def choose_move(self, battle: AbstractBattle) -> BattleOrder:
+        if not isinstance(battle, Battle):
+            return self.choose_random_move(battle)
+
+        model = ForwardModel(
+            battle, calculator=self._calculator, set_inference=self._set_inference
+        )
+        actions = model.root_actions
+        if not actions:
+            return self.choose_random_move(battle)
+
+        time_budget = self._time_budget
+        remaining_decision_time = self.remaining_decision_time(battle)
+        if remaining_decision_time is not None:
+            time_budget = min(time_budget, remaining_decision_time)
+        statistics = await self.async_search(model, time_budget)
+        action = max(actions, key=lambda a: statistics.get(a, (0, 0.0))[0])
+        if action >= ForwardModel.SWITCH_OFFSET:
+            return self.create_order(
+                list(battle.team.values())[action - ForwardModel.SWITCH_OFFSET]
+            )
+
+        move_id = model.move_id(0, model.root_state.active[0], action)
+        for move in battle.available_moves:
+            if move.id == move_id:
+                return self.create_order(move)
+        return self.choose_random_move(battle)
+
+    def close(self) -> None:
+        """Shuts down the process pool running parallel searches, if any."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def search(
+        self, model: ForwardModel, time_budget: Optional[float] = None
+    ) -> Dict[int, Tuple[int, float]]:
+        """Searches the player's best root action in a forward model.
+
+        :param model: The forward model.
+        :type model: ForwardModel
+        :param time_budget: Time spent searching, in seconds. Defaults to the
+            player's time_budget.
+        :type time_budget: float, optional
+        :return: The number of visits and summed values of each explored root action.
+        :rtype: Dict[int, Tuple[int, float]]
+        """
+        jobs = self._search_jobs(model, time_budget)
+        if self._n_workers == 1:
+            results = [_search(*jobs[0])]
+        else:
+            executor = self._process_pool()
+            futures = [executor.submit(_search, *job) for job in jobs]
+            results = [future.result() for future in futures]
+        return self._merge_results(results)
+
+    @property
+    def last_n_rollouts(self) -> int:
+        """
+        :return: The number of rollouts run by the last search, over all workers.
+        :rtype: int
+        """
+        return self._last_n_rollouts
@@ -3,19 +3,25 @@
 """
 
 import asyncio
+import copy
 import orjson
 import random
 
 from abc import ABC
 from abc import abstractmethod
-from asyncio import Condition
 from asyncio import Event
+from asyncio import Future
 from asyncio import Queue
-from asyncio import Semaphore
+from concurrent.futures import Executor
+from inspect import isawaitable
 from time import perf_counter
+from typing import Any
+from typing import Awaitable
+from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
 from poke_env.environment.abstract_battle import AbstractBattle
@@ -24,6 +30,8 @@ from poke_env.environment.double_battle import DoubleBattle
 from poke_env.environment.move import Move
 from poke_env.environment.pokemon import Pokemon
 from poke_env.exceptions import ShowdownException
+from poke_env.player.battle_scheduler import BattleScheduler
+from poke_env.player.latency_histogram import LatencyHistogram
 from poke_env.player.player_network_interface import PlayerNetwork
 from poke_env.player.battle_order import (
     BattleOrder,
@@ -50,12 +58,32 @@ class Player(PlayerNetwork, ABC):
     # chance of being showdown's default order to prevent infinite loops
     DEFAULT_CHOICE_CHANCE = 1 / 1000
 
+    # Event loop and connection state, left out when players are pickled to choose
+    # moves in worker processes
+    _UNPICKLED_ATTRIBUTES = frozenset(
+        {
+            "_battle_locks",
+            "_battle_requests",
+            "_battle_scheduler",
+            "_battle_start_futures",
+            "_battles",
+            "_challenge_queue",
+            "_choose_move_executor",
+            "_listening_coroutine",
+            "_logged_in",
+            "_sending_lock",
+            "_websocket",
+        }
+    )
+
     def __init__(
         self,
         player_configuration: Optional[PlayerConfiguration] = None,
         *,
         avatar: Optional[int] = None,
         battle_format: str = "gen8randombattle",
+        choose_move_executor: Optional[Executor] = None,
+        decision_budget: Optional[float] = None,
         log_level: Optional[int] = None,
         max_concurrent_battles: int = 1,
         server_configuration: Optional[ServerConfiguration] = None,
@@ -73,6 +101,23 @@ class Player(PlayerNetwork, ABC):
         :param battle_format: Name of the battle format this player plays. Defaults to
             gen8randombattle.
         :type battle_format: str
+        :param choose_move_executor: Executor running synchronous choose_move calls,
+            so that slow decisions do not block other battles. choose_move then
+            receives a snapshot of the battle. With a process pool, the player
+            is pickled without its connection and battles, and changes choose_move
+            makes to it are lost. Coroutine choose_move implementations still run in
+            the event loop. Defaults to None, running choose_move in the event loop.
+        :type choose_move_executor: Executor, optional
+        :param decision_budget: Time, in seconds, allowed for each move decision.
+            Only awaitable decisions - coroutine choose_move implementations, awaitables
+            returned by choose_move and decisions running in choose_move_executor - are
+            abandoned for choose_fallback_move's order once it is exceeded. Synchronous
+            choose_move calls running in the event loop are never cut off: their
+            overruns are only logged and counted, and they should check
+            remaining_decision_time to stay within budget. Set choose_move_executor to
+            enforce the budget on synchronous policies. Defaults to None, for no
+            budget.
+        :type decision_budget: float, optional
         :param log_level: The player's logger level.
         :type log_level: int. Defaults to logging's default level.
         :param max_concurrent_battles: Maximum number of battles this player will play
@@ -106,18 +151,25 @@ class Player(PlayerNetwork, ABC):
             start_listening=start_listening,
         )
 
+        self._choose_move_executor: Optional[Executor] = choose_move_executor
+        self._decision_budget: Optional[float] = decision_budget
         self._format: str = battle_format
         self._max_concurrent_battles: int = max_concurrent_battles
         self._start_timer_on_battle_start: bool = start_timer_on_battle_start
 
         self._battles: Dict[str, AbstractBattle] = {}
-        self._battle_semaphore: Semaphore = Semaphore(0)
-
-        self._battle_start_condition: Condition = Condition()
-        self._battle_count_queue: Queue = Queue(max_concurrent_battles)
-        self._battle_end_condition: Condition = Condition()
+        self._battle_locks: Dict[str, asyncio.Lock] = {}
+        self._battle_requests: List[Tuple[Optional[str], Future]] = []
+        self._battle_start_futures: Dict[str, Future] = {}
+        self._battle_scheduler: BattleScheduler = BattleScheduler(
+            max_concurrent_battles
+        )
         self._challenge_queue: Queue = Queue()
 
+        self._decision_budget_overruns: Dict[str, int] = {}
+        self._decision_deadlines: Dict[str, float] = {}
+        self._decision_latencies: Dict[str, LatencyHistogram] = {}
+
         if isinstance(team, Teambuilder):
             self._team = team
         elif isinstance(team, str):
@@ -127,9 +179,52 @@ class Player(PlayerNetwork, ABC):
 
         self.logger.debug("Player initialisation finished")
 
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            key: value
+            for key, value in self.__dict__.items()
+            if key not in self._UNPICKLED_ATTRIBUTES
+        }
+
     def _battle_finished_callback(self, battle: AbstractBattle) -> None:
         pass
 
+    def _record_decision_latency(self, phase: str, latency: float) -> None:
+        if phase not in self._decision_latencies:
+            self._decision_latencies[phase] = LatencyHistogram()
+            self._decision_budget_overruns[phase] = 0
+        self._decision_latencies[phase].record(latency)
+        if self._decision_budget is not None and latency > self._decision_budget:
+            self._decision_budget_overruns[phase] += 1
+
+    def _battle_finished(self, battle: AbstractBattle) -> None:
+        """Marks battle as finished, releasing its battle slot.
+
+        :param battle: The finished battle.
+        :type battle: AbstractBattle
+        """
+        self._battle_scheduler.battle_finished(battle.battle_tag)
+        self._battle_locks.pop(battle.battle_tag, None)
+        self._battle_finished_callback(battle)
+
+    def _battle_started(self, battle: AbstractBattle) -> None:
+        """Registers a newly created battle and wakes up coroutines waiting for it.
+
+        Messages received for a battle before its initialisation message has been
+        processed wait on a future specific to their battle tag: only those are
+        resumed.
+
+        :param battle: The newly created battle.
+        :type battle: AbstractBattle
+        """
+        self._battles[battle.battle_tag] = battle
+
+        future = self._battle_start_futures.pop(battle.battle_tag, None)
+        if future is not None and not future.done():
+            future.set_result(battle)
+
+        self._battle_scheduler.battle_started(battle.battle_tag)
+
     async def _create_battle(self, split_message: List[str]) -> AbstractBattle:
         """Returns battle object corresponding to received message.
 
@@ -159,34 +254,52 @@ class Player(PlayerNetwork, ABC):
                         username=self.username,
                         logger=self.logger,
                     )
-                await self._battle_count_queue.put(None)
-                if battle_tag in self._battles:
-                    self._battle_count_queue.get()
-                    return self._battles[battle_tag]
-                async with self._battle_start_condition:
-                    self._battle_semaphore.release()
-                    self._battle_start_condition.notify_all()
-                    self._battles[battle_tag] = battle
+                self._battle_started(battle)
 
                 if self._start_timer_on_battle_start:
                     await self._send_message("/timer on", battle.battle_tag)
 
                 return battle
-
-            return self._battles[battle_tag]
         else:
             self.logger.critical(
                 "Unmanaged battle initialisation message received: %s", split_message
             )
             raise ShowdownException()
 
+    def _log_scheduling_summary(
+        self, activity: str, n_battles: int, start_time: float
+    ) -> None:
+        utilization = self._battle_scheduler.utilization
+        self.logger.info(
+            "%s (%d battles) finished in %fs - %.2f battles on average, %s slot "
+            "utilization",
+            activity,
+            n_battles,
+            perf_counter() - start_time,
+            self._battle_scheduler.average_concurrent_battles,
+            "unbounded" if utilization is None else "%.1f%%" % (100 * utilization),
+        )
+
     async def _get_battle(self, battle_tag: str) -> AbstractBattle:
+        """Returns the battle corresponding to battle_tag, waiting for its creation if
+        needed.
+
+        :param battle_tag: The battle tag, as found at the start of battle messages.
+        :type battle_tag: str
+        :return: The corresponding battle object.
+        :rtype: AbstractBattle
+        """
         battle_tag = battle_tag[1:]
-        while True:
-            if battle_tag in self._battles:
-                return self._battles[battle_tag]
-            async with self._battle_start_condition:
-                await self._battle_start_condition.wait()
+        if battle_tag in self._battles:
+            return self._battles[battle_tag]
+
+        if battle_tag not in self._battle_start_futures:
+            self._battle_start_futures[
+                battle_tag
+            ] = asyncio.get_event_loop().create_future()
+
+        # Shielding prevents a cancelled waiter from cancelling the shared future
+        return await asyncio.shield(self._battle_start_futures[battle_tag])
 
     async def _handle_battle_message(self, split_messages: List[List[str]]) -> None:
         """Handles a battle message.
@@ -195,110 +308,128 @@ class Player(PlayerNetwork, ABC):
         :type split_message: str
         """
         # Battle messages can be multiline
-        if (
+        is_init = (
             len(split_messages) > 1
             and len(split_messages[1]) > 1
             and split_messages[1][1] == "init"
-        ):
-            battle_info = split_messages[0][0].split("-")
-            battle = await self._create_battle(battle_info)
-            split_messages.pop(0)
-        else:
-            battle = await self._get_battle(split_messages[0][0])
-
-        for split_message in split_messages[1:]:
-            if len(split_message) <= 1:
-                continue
-            elif split_message[1] in self.MESSAGES_TO_IGNORE:
-                pass
-            elif split_message[1] == "request":
-                if split_message[2]:
-                    request = orjson.loads(split_message[2])
-                    battle._parse_request(request)
-                    if battle.move_on_next_request:
-                        await self._handle_battle_request(battle)
-                        battle.move_on_next_request = False
-            elif split_message[1] == "title":
-                player_1, player_2 = split_message[2].split(" vs. ")
-                battle.players = player_1, player_2
-            elif split_message[1] == "win" or split_message[1] == "tie":
-                if split_message[1] == "win":
-                    battle._won_by(split_message[2])
-                else:
-                    battle._tied()
-                await self._battle_count_queue.get()
-                self._battle_count_queue.task_done()
-                self._battle_finished_callback(battle)
-                async with self._battle_end_condition:
-                    self._battle_end_condition.notify_all()
-            elif split_message[1] == "error":
-                self.logger.log(
-                    25, "Error message received: %s", "|".join(split_message)
-                )
-                if split_message[2].startswith(
-                    "[Invalid choice] Sorry, too late to make a different move"
-                ):
-                    if battle.trapped:
+        )
+        if not is_init:
+            await self._get_battle(split_messages[0][0])
+        battle_tag = split_messages[0][0][1:]
+        is_new_battle = is_init and battle_tag not in self._battles
+
+        # Decisions can be awaited, or run outside of the event loop: later messages
+        # of the battle wait for them, so that the battle is updated and decided in
+        # order. Initialisation messages take the lock before creating the battle,
+        # which resumes the messages waiting for it
+        lock = self._battle_locks.setdefault(battle_tag, asyncio.Lock())
+        await lock.acquire()
+
+        try:
+            if is_init:
+                battle = await self._create_battle(split_messages[0][0].split("-"))
+                split_messages.pop(0)
+            else:
+                battle = await self._get_battle(split_messages[0][0])
+
+            for split_message in split_messages[1:]:
+                if len(split_message) <= 1:
+                    continue
+                elif split_message[1] in self.MESSAGES_TO_IGNORE:
+                    pass
+                elif split_message[1] == "request":
+                    if split_message[2]:
+                        request = orjson.loads(split_message[2])
+                        battle._parse_request(request)
+                        if battle.move_on_next_request:
+                            await self._handle_battle_request(battle)
+                            battle.move_on_next_request = False
+                elif split_message[1] == "title":
+                    player_1, player_2 = split_message[2].split(" vs. ")
+                    battle.players = player_1, player_2
+                elif split_message[1] == "win" or split_message[1] == "tie":
+                    if split_message[1] == "win":
+                        battle._won_by(split_message[2])
+                    else:
+                        battle._tied()
+                    self._battle_finished(battle)
+                elif split_message[1] == "error":
+                    self.logger.log(
+                        25, "Error message received: %s", "|".join(split_message)
+                    )
+                    if split_message[2].startswith(
+                        "[Invalid choice] Sorry, too late to make a different move"
+                    ):
+                        if battle.trapped:
+                            await self._handle_battle_request(battle)
+                    elif split_message[2].startswith(
+                        "[Unavailable choice] Can't switch: The active Pokémon is "
+                        "trapped"
+                    ) or split_message[2].startswith(
+                        "[Invalid choice] Can't switch: The active Pokémon is trapped"
+                    ):
+                        battle.trapped = True
                         await self._handle_battle_request(battle)
-                elif split_message[2].startswith(
-                    "[Unavailable choice] Can't switch: The active Pokémon is "
-                    "trapped"
-                ) or split_message[2].startswith(
-                    "[Invalid choice] Can't switch: The active Pokémon is trapped"
-                ):
-                    battle.trapped = True
+                    elif split_message[2].startswith(
+                        "[Invalid choice] Can't switch: You can't switch to an active "
+                        "Pokémon"
+                    ):
+                        await self._handle_battle_request(battle, maybe_default_order=True)
+                    elif split_message[2].startswith(
+                        "[Invalid choice] Can't switch: You can't switch to a fainted "
+                        "Pokémon"
+                    ):
+                        await self._handle_battle_request(battle, maybe_default_order=True)
+                    elif split_message[2].startswith(
+                        "[Invalid choice] Can't move: Invalid target for"
+                    ):
+                        await self._handle_battle_request(battle, maybe_default_order=True)
+                    elif split_message[2].startswith(
+                        "[Invalid choice] Can't move: You can't choose a target for"
+                    ):
+                        await self._handle_battle_request(battle, maybe_default_order=True)
+                    elif split_message[2].startswith(
+                        "[Invalid choice] Can't move: "
+                    ) and split_message[2].endswith("needs a target"):
+                        await self._handle_battle_request(battle, maybe_default_order=True)
+                    elif (
+                        split_message[2].startswith("[Invalid choice] Can't move: Your")
+                        and " doesn't have a move matching " in split_message[2]
+                    ):
+                        await self._handle_battle_request(battle, maybe_default_order=True)
+                    elif split_message[2].startswith(
+                        "[Invalid choice] Incomplete choice: "
+                    ):
+                        await self._handle_battle_request(battle, maybe_default_order=True)
+                    elif split_message[2].startswith(
+                        "[Unavailable choice]"
+                    ) and split_message[2].endswith("is disabled"):
+                        battle.move_on_next_request = True
+                    elif split_message[2].startswith(
+                        "[Invalid choice] Can't move: You sent more choices than unfainted"
+                        " Pokémon."
+                    ):
+                        await self._handle_battle_request(battle, maybe_default_order=True)
+                    else:
+                        self.logger.critical("Unexpected error message: %s", split_message)
+                elif split_message[1] == "turn":
+                    battle.end_turn(int(split_message[2]))
                     await self._handle_battle_request(battle)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't switch: You can't switch to an active "
-                    "Pokémon"
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't switch: You can't switch to a fainted "
-                    "Pokémon"
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't move: Invalid target for"
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't move: You can't choose a target for"
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't move: "
-                ) and split_message[2].endswith("needs a target"):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif (
-                    split_message[2].startswith("[Invalid choice] Can't move: Your")
-                    and " doesn't have a move matching " in split_message[2]
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Incomplete choice: "
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Unavailable choice]"
-                ) and split_message[2].endswith("is disabled"):
-                    battle.move_on_next_request = True
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't move: You sent more choices than unfainted"
-                    " Pokémon."
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
+                elif split_message[1] == "teampreview":
+                    await self._handle_battle_request(
+                        battle, from_teampreview_request=True
+                    )
+                elif split_message[1] == "bigerror":
+                    self.logger.warning("Received 'bigerror' message: %s", split_message)
                 else:
-                    self.logger.critical("Unexpected error message: %s", split_message)
-            elif split_message[1] == "turn":
-                battle.end_turn(int(split_message[2]))
-                await self._handle_battle_request(battle)
-            elif split_message[1] == "teampreview":
-                await self._handle_battle_request(battle, from_teampreview_request=True)
-            elif split_message[1] == "bigerror":
-                self.logger.warning("Received 'bigerror' message: %s", split_message)
-            else:
-                battle._parse_message(split_message)
+                    battle._parse_message(split_message)
+
+            if is_new_battle:
+                # The battle's players are known once its initialisation message has
+                # been processed
+                self._resolve_battle_request(battle)
+        finally:
+            lock.release()
 
     async def _handle_battle_request(
         self,
@@ -311,12 +442,184 @@ class Player(PlayerNetwork, ABC):
         elif battle.teampreview:
             if not from_teampreview_request:
                 return
+            start = perf_counter()
             message = self.teampreview(battle)
+            self._record_decision_latency("teampreview", perf_counter() - start)
         else:
-            message = self.choose_move(battle).message
+            order = await self._choose_move_within_budget(battle)
+            if order is None:
+                # The battle ended while the order was being chosen
+                return
+            message = order.message
 
         await self._send_message(message, battle.battle_tag)
 
+    async def _choose_move_within_budget(
+        self, battle: AbstractBattle
+    ) -> Optional[BattleOrder]:
+        """Chooses a move, enforcing the decision budget on awaitable decisions and
+        recording the decision's latency.
+
+        :param battle: The battle.
+        :type battle: AbstractBattle
+        :return: The order to send, or None if the battle finished in the meantime.
+        :rtype: BattleOrder, optional
+        """
+        force_switch = battle.force_switch
+        if isinstance(force_switch, list):
+            force_switch = any(force_switch)
+        phase = "switch" if force_switch else "move"
+
+        start = perf_counter()
+        if self._decision_budget is not None:
+            self._decision_deadlines[battle.battle_tag] = start + self._decision_budget
+
+        fallback = False
+        try:
+            order = self._dispatch_choose_move(battle)
+            if isawaitable(order):
+                if self._decision_budget is None:
+                    order = await order
+                else:
+                    remaining = start + self._decision_budget - perf_counter()
+                    try:
+                        order = await asyncio.wait_for(order, max(remaining, 0))
+                    except asyncio.TimeoutError:
+                        self.logger.warning(
+                            "Decision budget exceeded in battle %s: playing fallback "
+                            "move",
+                            battle.battle_tag,
+                        )
+                        order = self.choose_fallback_move(battle)
+                        fallback = True
+                if battle.finished:
+                    return None
+        finally:
+            self._decision_deadlines.pop(battle.battle_tag, None)
+
+        latency = perf_counter() - start
+        self._record_decision_latency(phase, latency)
+        if (
+            not fallback
+            and self._decision_budget is not None
+            and latency > self._decision_budget
+        ):
+            self.logger.warning(
+                "Decision in battle %s took %.3fs, over the %.3fs decision budget",
+                battle.battle_tag,
+                latency,
+                self._decision_budget,
+            )
+        return order
+
+    def _dispatch_choose_move(
+        self, battle: AbstractBattle
+    ) -> Union[BattleOrder, Awaitable[BattleOrder]]:
+        """Calls choose_move, in choose_move_executor if there is one and
+        choose_move is synchronous.
+
+        :param battle: The battle.
+        :type battle: AbstractBattle
+        :return: The order, or an awaitable of the order.
+        :rtype: BattleOrder, or awaitable of BattleOrder
+        """
+        if self._choose_move_executor is None or asyncio.iscoroutinefunction(
+            self.choose_move
+        ):
+            return self.choose_move(battle)
+        return asyncio.get_event_loop().run_in_executor(
+            self._choose_move_executor, self.choose_move, self._snapshot_battle(battle)
+        )
+
+    async def _request_battle(
+        self, request: Callable[[], Awaitable[Any]], opponent: Optional[str] = None
+    ) -> AbstractBattle:
+        """Sends a battle request for a reserved battle slot and waits for the
+        resulting battle.
+
+        If the request fails, or is cancelled before its battle starts, the slot
+        reservation is released.
+
+        :param request: Sends the battle request when called.
+        :type request: callable returning an awaitable
+        :param opponent: The requested battle's opponent, or None if any opponent can
+            be matched, as when searching for a ladder game. Defaults to None.
+        :type opponent: str, optional
+        :return: The requested battle.
+        :rtype: AbstractBattle
+        """
+        opponent = to_id_str(opponent) if opponent is not None else None
+        future = asyncio.get_event_loop().create_future()
+        pending_request = (opponent, future)
+        self._battle_requests.append(pending_request)
+
+        try:
+            await request()
+            return await future
+        except (Exception, asyncio.CancelledError):
+            self._battle_scheduler.cancel_reservation()
+            raise
+        finally:
+            if pending_request in self._battle_requests:
+                self._battle_requests.remove(pending_request)
+
+    def _resolve_battle_request(self, battle: AbstractBattle) -> None:
+        """Resumes the oldest pending battle request matching a new battle.
+
+        Requests sent to the battle's opponent are matched first, then requests
+        accepting any opponent. Battles matching no request, such as battles
+        requested elsewhere, leave pending requests waiting.
+
+        :param battle: The new battle.
+        :type battle: AbstractBattle
+        """
+        opponent = battle.opponent_username
+        if opponent is not None:
+            opponent = to_id_str(opponent)
+
+        pending = [request for request in self._battle_requests if not request[1].done()]
+        matches = [request for request in pending if request[0] == opponent]
+        matches += [request for request in pending if request[0] is None]
+        if matches:
+            self._battle_requests.remove(matches[0])
+            matches[0][1].set_result(battle)
+
+    @staticmethod
+    def _snapshot_battle(battle: AbstractBattle) -> AbstractBattle:
+        """Copies a battle, so that decisions made outside of the event loop are not
+        affected by messages processed in the meantime.
+
+        The copy shares the battle's logger, and its pokemons have no observers, so
+        that it can be pickled.
+
+        :param battle: The battle.
+        :type battle: AbstractBattle
+        :return: The copy.
+        :rtype: AbstractBattle
+        """
+        memo: Dict[int, Any] = {id(battle.logger): battle.logger}
+
+        # Pokemons can be held directly, or in containers, by any of the battle's
+        # attributes
+        attributes = [
+            getattr(battle, name)
+            for cls in type(battle).__mro__
+            for name in getattr(cls, "__slots__", ())
+            if hasattr(battle, name)
+        ]
+        attributes.extend(getattr(battle, "__dict__", {}).values())
+        for attribute in attributes:
+            if isinstance(attribute, dict):
+                values = list(attribute.values())
+            elif isinstance(attribute, (list, set, tuple)):
+                values = list(attribute)
+            else:
+                values = [attribute]
+            for mon in values:
+                if isinstance(mon, Pokemon):
+                    memo[id(mon._observers)] = []
+        return copy.deepcopy(battle, memo)
+
     async def _handle_challenge_request(self, split_message: List[str]) -> None:
         """Handles an individual challenge."""
         challenging_player = split_message[2].strip()
@@ -373,22 +676,48 @@ class Player(PlayerNetwork, ABC):
                     or (opponent == username)
                     or (isinstance(opponent, list) and (username in opponent))
                 ):
-                    await self._accept_challenge(username)
-                    await self._battle_semaphore.acquire()
+                    await self._battle_scheduler.reserve()
+                    await self._request_battle(
+                        lambda: self._accept_challenge(username), username
+                    )
                     break
-        await self._battle_count_queue.join()
+        await self._battle_scheduler.join()
 
     @abstractmethod
-    def choose_move(self, battle: AbstractBattle) -> BattleOrder:  # pragma: no cover
+    def choose_move(
+        self, battle: AbstractBattle
+    ) -> Union[BattleOrder, Awaitable[BattleOrder]]:  # pragma: no cover
         """Abstract method to choose a move in a battle.
 
+        Implementations can also be coroutines, or return awaitables: the resulting
+        order is sent once they complete. Messages of the battle received in the
+        meantime are only processed afterwards, so that the battle does not change
+        while a move is being chosen.
+
         :param battle: The battle.
         :type battle: AbstractBattle
         :return: The move order.
-        :rtype: str
+        :rtype: BattleOrder, or awaitable of BattleOrder
         """
         pass
 
+    def choose_fallback_move(self, battle: AbstractBattle) -> BattleOrder:
+        """Returns a cheap order, played when a decision exceeds the decision budget.
+
+        Defaults to the available move with the highest base power, or a random order
+        if no move is available or in double battles.
+
+        :param battle: The battle.
+        :type battle: AbstractBattle
+        :return: The fallback order.
+        :rtype: BattleOrder
+        """
+        if isinstance(battle, Battle) and battle.available_moves:
+            return self.create_order(
+                max(battle.available_moves, key=lambda move: move.base_power)
+            )
+        return self.choose_random_move(battle)
+
     def choose_default_move(self, *args, **kwargs) -> DefaultBattleOrder:
         """Returns showdown's default move order.
 
@@ -588,7 +917,9 @@ class Player(PlayerNetwork, ABC):
     async def ladder(self, n_games):
         """Make the player play games on the ladder.
 
-        n_games defines how many battles will be played.
+        n_games defines how many battles will be played. A new game is searched for as
+        soon as a battle slot is available and the previous search has resulted in a
+        battle.
 
         :param n_games: Number of battles that will be played
         :type n_games: int
@@ -597,19 +928,10 @@ class Player(PlayerNetwork, ABC):
         start_time = perf_counter()
 
         for _ in range(n_games):
-            async with self._battle_start_condition:
-                await self._search_ladder_game(self._format)
-                await self._battle_start_condition.wait()
-                while self._battle_count_queue.full():
-                    async with self._battle_end_condition:
-                        await self._battle_end_condition.wait()
-                await self._battle_semaphore.acquire()
-        await self._battle_count_queue.join()
-        self.logger.info(
-            "Laddering (%d battles) finished in %fs",
-            n_games,
-            perf_counter() - start_time,
-        )
+            await self._battle_scheduler.reserve()
+            await self._request_battle(lambda: self._search_ladder_game(self._format))
+        await self._battle_scheduler.join()
+        self._log_scheduling_summary("Laddering", n_games, start_time)
 
     async def battle_against(self, opponent: "Player", n_battles: int) -> None:
         """Make the player play n_battles against opponent.
@@ -656,14 +978,12 @@ class Player(PlayerNetwork, ABC):
         start_time = perf_counter()
 
         for _ in range(n_challenges):
-            await self._challenge(opponent, self._format)
-            await self._battle_semaphore.acquire()
-        await self._battle_count_queue.join()
-        self.logger.info(
-            "Challenges (%d battles) finished in %fs",
-            n_challenges,
-            perf_counter() - start_time,
-        )
+            await self._battle_scheduler.reserve()
+            await self._request_battle(
+                lambda: self._challenge(opponent, self._format), opponent
+            )
+        await self._battle_scheduler.join()
+        self._log_scheduling_summary("Challenges", n_challenges, start_time)
 
     def random_teampreview(self, battle: AbstractBattle) -> str:
         """Returns a random valid teampreview order for the given battle.
@@ -677,6 +997,22 @@ class Player(PlayerNetwork, ABC):
         random.shuffle(members)
         return "/team " + "".join([str(c) for c in members])
 
+    def remaining_decision_time(self, battle: AbstractBattle) -> Optional[float]:
+        """Returns the time left before a pending decision exceeds the decision budget.
+
+        Long-running policies can use it to bound their computations.
+
+        :param battle: The battle whose decision is pending.
+        :type battle: AbstractBattle
+        :return: The remaining time, in seconds, or None if there is no decision
+            budget or no pending decision for this battle.
+        :rtype: float, optional
+        """
+        deadline = self._decision_deadlines.get(battle.battle_tag)
+        if deadline is None:
+            return None
+        return max(deadline - perf_counter(), 0.0)
+
     def reset_battles(self) -> None:
         """Resets the player's inner battle tracker."""
         for battle in list(self._battles.values()):
@@ -685,6 +1021,7 @@ class Player(PlayerNetwork, ABC):
                     "Can not reset player's battles while they are still running"
                 )
         self._battles = {}
+        self._battle_locks = {}
 
     def teampreview(self, battle: AbstractBattle) -> str:
         """Returns a teampreview order for the given battle.
@@ -733,10 +1070,54 @@ class Player(PlayerNetwork, ABC):
             order, actor=actor, mega=mega, move_target=move_target, z_move=z_move, dynamax=dynamax
         )
 
+    @property
+    def battle_scheduler(self) -> BattleScheduler:
+        """
+        :return: The scheduler controlling this player's battle slots.
+        :rtype: BattleScheduler
+        """
+        return self._battle_scheduler
+
     @property
     def battles(self) -> Dict[str, AbstractBattle]:
         return self._battles
 
+    @property
+    def choose_move_executor(self) -> Optional[Executor]:
+        """
+        :return: The executor running synchronous choose_move calls, if any.
+        :rtype: Executor, optional
+        """
+        return self._choose_move_executor
+
+    @property
+    def decision_budget(self) -> Optional[float]:
+        """
+        :return: The decision budget, in seconds, or None if there is no budget. It
+            only cuts off awaitable decisions and decisions running in
+            choose_move_executor.
+        :rtype: float, optional
+        """
+        return self._decision_budget
+
+    @property
+    def decision_budget_overruns(self) -> Dict[str, int]:
+        """
+        :return: The number of decisions that took longer than the decision budget,
+            by battle phase, among "move", "switch" and "teampreview".
+        :rtype: Dict[str, int]
+        """
+        return dict(self._decision_budget_overruns)
+
+    @property
+    def decision_latencies(self) -> Dict[str, LatencyHistogram]:
+        """
+        :return: Histograms of decision latencies, by battle phase, among "move",
+            "switch" and "teampreview".
+        :rtype: Dict[str, LatencyHistogram]
+        """
+        return dict(self._decision_latencies)
+
     @property
     def format(self) -> str:
         return self._format
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""This module defines rating systems fitting player strengths from game results.
+
+Games are represented as numpy arrays of shape (n_games, 3), each row containing the
+indices of both players and the outcome of the game for the first one: 1 for a win,
+0 for a loss and 0.5 for a tie.
+"""
+
+import numpy as np  # pyre-ignore
+
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+
+def _validate_games(games: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    games = np.asarray(games, dtype=np.float64)
+    if games.ndim != 2 or games.shape[1] != 3:
+        raise ValueError(
+            "Games must be an array of shape (n_games, 3), got shape %s."
+            % (games.shape,)
+        )
+
+    first, second, outcomes = (
+        games[:, 0].astype(np.int64),
+        games[:, 1].astype(np.int64),
+        games[:, 2],
+    )
+    if (first < 0).any() or (second < 0).any():
+        raise ValueError("Player indices must be non-negative.")
+    if (first == second).any():
+        raise ValueError("Players can not play against themselves.")
+    if ((outcomes < 0) | (outcomes > 1)).any():
+        raise ValueError("Outcomes must be between 0 and 1.")
+    return first, second, outcomes
+
+
+def games_from_cross_evaluation(
+    results: Dict[str, Dict[str, Optional[float]]], n_challenges: int
+) -> Tuple[List[str], np.ndarray]:
+    """Converts the win rates returned by cross_evaluate into games.
+
+    Battles that are neither won nor lost by either player are counted as ties.
+
+    :param results: The win rates returned by cross_evaluate.
+    :type results: Dict[str, Dict[str, Optional[float]]]
+    :param n_challenges: The number of battles played by each pair of players.
+    :type n_challenges: int
+    :return: The usernames of the players, in index order, and the games.
+    :rtype: tuple of list of str and np.ndarray
+    """
+    usernames = list(results)
+    rows = []
+    for i, username in enumerate(usernames):
+        for j in range(i + 1, len(usernames)):
+            win_rate = results[username][usernames[j]]
+            loss_rate = results[usernames[j]][username]
+            if win_rate is None or loss_rate is None:
+                continue
+            n_wins = int(round(win_rate * n_challenges))
+            n_losses = int(round(loss_rate * n_challenges))
+            n_ties = max(n_challenges - n_wins - n_losses, 0)
+            rows.append(
+                np.repeat(
+                    [[i, j, 1.0], [i, j, 0.0], [i, j, 0.5]],
+                    [n_wins, n_losses, n_ties],
+                    axis=0,
+                )
+            )
+
+    if not rows:
+        return usernames, np.empty((0, 3))
+    return usernames, np.concatenate(rows)
+
+
+class BradleyTerryRatings:
+    """Maximum likelihood Bradley-Terry strengths, fitted from accumulated results.
+
+    A player of strength s_i beats a player of strength s_j with probability
+    s_i / (s_i + s_j). Games only update per-pair win and game counts, so adding
+    games is cheap; strengths are refitted lazily when accessed, starting from the
+    previous fit.
+
+    Strengths are fitted with Newton updates of all log-strengths at once. To keep
+    them finite for players that won or lost all their games, every player is given
+    prior_games virtual games against a reference player of strength 1, half of them
+    won. Strengths are thus expressed relative to that reference player.
+    """
+
+    def __init__(
+        self,
+        n_players: int = 0,
+        *,
+        max_iterations: int = 100,
+        prior_games: float = 2.0,
+        tolerance: float = 1e-10,
+    ) -> None:
+        """
+        :param n_players: The initial number of players. Players are added as games
+            involving new indices are added. Defaults to 0.
+        :type n_players: int
+        :param max_iterations: Maximum number of updates per fit. Defaults to 100.
+        :type max_iterations: int
+        :param prior_games: Number of virtual games of each player against the
+            reference player. Must be positive. Defaults to 2.
+        :type prior_games: float
+        :param tolerance: The fit stops once no log-strength changes by more than
+            tolerance. Defaults to 1e-10.
+        :type tolerance: float
+        """
+        if prior_games <= 0:
+            raise ValueError("prior_games must be positive.")
+
+        self._max_iterations = max_iterations
+        self._prior_games = prior_games
+        self._tolerance = tolerance
+
+        self._games = np.zeros((n_players, n_players))
+        self._wins = np.zeros((n_players, n_players))
+        self._strengths = np.ones(n_players)
+        self._fitted = True
+        self._n_iterations = 0
+
+    def _fit(self) -> None:
+        games = self._games + self._games.T
+        wins = self._wins.sum(axis=1) + self._prior_games / 2
+        log_strengths = np.log(self._strengths)
+        log_likelihood = self._log_likelihood(log_strengths, games, wins)
+
+        self._n_iterations = 0
+        while len(log_strengths) and self._n_iterations < self._max_iterations:
+            self._n_iterations += 1
+
+            # Newton step on log-strengths, the prior making the hessian definite
+            p = 1 / (1 + np.exp(log_strengths[None, :] - log_strengths[:, None]))
+            p_reference = 1 / (1 + np.exp(-log_strengths))
+            gradient = wins - (games * p).sum(axis=1) - self._prior_games * p_reference
+            curvatures = games * p * (1 - p)
+            hessian = curvatures - np.diag(
+                curvatures.sum(axis=1)
+                + self._prior_games * p_reference * (1 - p_reference)
+            )
+            step = -np.linalg.solve(hessian, gradient)
+
+            # Backtracking keeps far away starting points from overshooting
+            scale = 1.0
+            while True:
+                candidate = log_strengths + scale * step
+                candidate_log_likelihood = self._log_likelihood(candidate, games, wins)
+                if candidate_log_likelihood >= log_likelihood or scale < 1e-4:
+                    break
+                scale /= 2
+
+            log_strengths, log_likelihood = candidate, candidate_log_likelihood
+            if np.abs(scale * step).max() < self._tolerance:
+                break
+
+        self._strengths = np.exp(log_strengths)
+        self._fitted = True
+
+    def _log_likelihood(
+        self, log_strengths: np.ndarray, games: np.ndarray, wins: np.ndarray
+    ) -> float:
+        differences = log_strengths[None, :] - log_strengths[:, None]
+        return float(
+            wins @ log_strengths
+            - (games * np.logaddexp(0, differences)).sum() / 2
+            - (games.sum(axis=1) @ log_strengths) / 2
+            - self._prior_games * np.logaddexp(0, log_strengths).sum()
+        )
+
+    def _resize(self, n_players: int) -> None:
+        padding = n_players - self.n_players
+        if padding <= 0:
+            return
+        self._games = np.pad(self._games, (0, padding))
+        self._wins = np.pad(self._wins, (0, padding))
+        self._strengths = np.concatenate([self._strengths, np.ones(padding)])
+
+    def add_games(self, games: np.ndarray) -> None:
+        """Adds game results.
+
+        :param games: The games, as an array of shape (n_games, 3).
+        :type games: np.ndarray
+        """
+        first, second, outcomes = _validate_games(games)
+        if not len(outcomes):
+            return
+
+        self._resize(max(first.max(), second.max()) + 1)
+        np.add.at(self._games, (first, second), 1)
+        np.add.at(self._wins, (first, second), outcomes)
+        np.add.at(self._wins, (second, first), 1 - outcomes)
+        self._fitted = False
+
+    def predict(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """Returns the expected outcomes of games between pairs of players.
+
+        :param first: The indices of the first players.
+        :type first: np.ndarray
+        :param second: The indices of the second players.
+        :type second: np.ndarray
+        :return: The probabilities of the first players winning.
+        :rtype: np.ndarray
+        """
+        strengths = self.strengths
+        return strengths[first] / (strengths[first] + strengths[second])
+
+    @property
+    def n_games(self) -> int:
+        """
+        :return: The number of games added.
+        :rtype: int
+        """
+        return int(self._games.sum())
+
+    @property
+    def n_iterations(self) -> int:
+        """
+        :return: The number of updates performed by the last fit.
+        :rtype: int
+        """
+        return self._n_iterations
+
+    @property
+    def n_players(self) -> int:
+        """
+        :return: The number of players.
+        :rtype: int
+        """
+        return len(self._strengths)
+
+    @property
+    def ratings(self) -> np.ndarray:
+        """
+        :return: The strengths, on the Elo scale. The reference player is rated 0.
+        :rtype: np.ndarray
+        """
+        return 400 * np.log10(self.strengths)
+
+    @property
+    def strengths(self) -> np.ndarray:
+        """
+        :return: The strength of each player, relative to the reference player.
+        :rtype: np.ndarray
+        """
+        if not self._fitted:
+            self._fit()
+        return self._strengths.copy()
+
+
+class EloRatings:
+    """Online Elo ratings.
+
+    Games are processed in order, by batches of batch_size games: the rating updates
+    of a batch are computed simultaneously from the ratings before the batch, and
+    summed per player. With a batch size of 1, updates are the usual sequential Elo
+    updates.
+    """
+
+    def __init__(
+        self,
+        n_players: int = 0,
+        *,
+        batch_size: int = 64,
+        initial_rating: float = 1500.0,
+        k_factor: float = 32.0,
+    ) -> None:
+        """
+        :param n_players: The initial number of players. Players are added as games
+            involving new indices are added. Defaults to 0.
+        :type n_players: int
+        :param batch_size: Number of games whose updates are computed simultaneously.
+            Defaults to 64.
+        :type batch_size: int
+        :param initial_rating: The rating of new players. Defaults to 1500.
+        :type initial_rating: float
+        :param k_factor: The maximum rating change per game. Defaults to 32.
+        :type k_factor: float
+        """
+        self._batch_size = batch_size
+        self._initial_rating = initial_rating
+        self._k_factor = k_factor
+
+        self._ratings = np.full(n_players, initial_rating)
+        self._n_games = 0
+
+    def add_games(self, games: np.ndarray) -> None:
+        """Adds game results, updating ratings.
+
+        :param games: The games, as an array of shape (n_games, 3).
+        :type games: np.ndarray
+        """
+        first, second, outcomes = _validate_games(games)
+        if not len(outcomes):
+            return
+
+        n_players = max(first.max(), second.max()) + 1
+        if n_players > self.n_players:
+            self._ratings = np.concatenate(
+                [
+                    self._ratings,
+                    np.full(n_players - self.n_players, self._initial_rating),
+                ]
+            )
+
+        for start in range(0, len(outcomes), self._batch_size):
+            batch = slice(start, start + self._batch_size)
+            deltas = self._k_factor * (
+                outcomes[batch] - self.predict(first[batch], second[batch])
+            )
+            np.add.at(self._ratings, first[batch], deltas)
+            np.add.at(self._ratings, second[batch], -deltas)
+        self._n_games += len(outcomes)
+
+    def predict(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """Returns the expected outcomes of games between pairs of players.
+
+        :param first: The indices of the first players.
+        :type first: np.ndarray
+        :param second: The indices of the second players.
+        :type second: np.ndarray
+        :return: The expected scores of the first players.
+        :rtype: np.ndarray
+        """
+        return 1 / (1 + 10 ** ((self._ratings[second] - self._ratings[first]) / 400))
+
+    @property
+    def n_games(self) -> int:
+        """
+        :return: The number of games added.
+        :rtype: int
+        """
+        return self._n_games
+
+    @property
+    def n_players(self) -> int:
+        """
+        :return: The number of players.
+        :rtype: int
+        """
+        return len(self._ratings)
+
+    @property
+    def ratings(self) -> np.ndarray:
+        """
+        :return: The rating of each player.
+        :rtype: np.ndarray
+        """
+        return self._ratings.copy()
+
+    @property
+    def strengths(self) -> np.ndarray:
+        """
+        :return: The ratings, converted to Bradley-Terry strengths relative to a
+            player of initial rating.
+        :rtype: np.ndarray
+        """
+        return 10 ** ((self._ratings - self._initial_rating) / 400)
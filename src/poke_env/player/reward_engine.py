@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""This module defines an incremental reward engine, used by
+EnvPlayer.reward_computing_helper.
+"""
+
+from collections import OrderedDict
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from poke_env.environment.abstract_battle import AbstractBattle
+from poke_env.environment.pokemon import Pokemon
+
+
+class _BattleTally:
+    """Unweighted state components of a battle, updated as its pokemons change."""
+
+    __slots__ = (
+        "contributions",
+        "fainted",
+        "hp",
+        "last_components",
+        "n_pokemons",
+        "observers",
+        "status",
+    )
+
+    def __init__(self) -> None:
+        # Sums over each side - ours first - of hp fractions, fainted pokemons and
+        # statused pokemons
+        self.hp: List[float] = [0.0, 0.0]
+        self.fainted: List[int] = [0, 0]
+        self.status: List[int] = [0, 0]
+        self.n_pokemons: List[int] = [0, 0]
+
+        self.contributions: Dict[Pokemon, Tuple[float, int, int]] = {}
+        self.observers: Dict[Pokemon, object] = {}
+        self.last_components: Optional[Dict[str, float]] = None
+
+
+class RewardEngine:
+    """Computes rewards as differences between consecutive weighted state values.
+
+    The state value of a battle is made of four components: the remaining hp, the
+    fainted pokemons and the statused pokemons of both teams, and the battle's outcome.
+    Instead of iterating over both teams on every call, the engine registers as an
+    observer of each pokemon the first time it sees it, and updates unweighted per-team
+    sums whenever a pokemon's hp or status changes. Computing a reward then only
+    weights these sums, whatever the weights used.
+
+    Battles are evicted once the reward of their final state has been computed. At
+    most max_battles battles are tracked, evicting the least recently used first.
+    """
+
+    COMPONENTS = ("hp", "fainted", "status", "victory")
+
+    def __init__(self, max_battles: int = 1024, max_finished_battles: int = 4096):
+        """
+        :param max_battles: Maximum number of battles tracked at the same time.
+            Defaults to 1024.
+        :type max_battles: int
+        :param max_finished_battles: Number of evicted finished battles remembered,
+            whose subsequent rewards are zero. Defaults to 4096.
+        :type max_finished_battles: int
+        """
+        self._max_battles = max_battles
+        self._max_finished_battles = max_finished_battles
+        self._tallies: "OrderedDict[AbstractBattle, _BattleTally]" = OrderedDict()
+        self._finished_battles: "OrderedDict[str, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tallies)
+
+    @staticmethod
+    def _contribution(mon: Pokemon) -> Tuple[float, int, int]:
+        if mon.fainted:
+            return mon.current_hp_fraction, 1, 0
+        return mon.current_hp_fraction, 0, int(mon.status is not None)
+
+    def _register(self, tally: _BattleTally, mon: Pokemon, side: int) -> None:
+        def observer(mon: Pokemon) -> None:
+            self._update(tally, mon, side)
+
+        tally.contributions[mon] = (0.0, 0, 0)
+        tally.observers[mon] = observer
+        mon._observers.append(observer)
+        self._update(tally, mon, side)
+
+    def _tally(self, battle: AbstractBattle) -> _BattleTally:
+        tally = self._tallies.get(battle)
+        if tally is None:
+            while len(self._tallies) >= self._max_battles:
+                self.forget(next(iter(self._tallies)))
+            tally = self._tallies[battle] = _BattleTally()
+        else:
+            self._tallies.move_to_end(battle)
+
+        # Teams only grow: new pokemons are registered when their size changes
+        for side, team in enumerate((battle.team, battle.opponent_team)):
+            if len(team) != tally.n_pokemons[side]:
+                for mon in team.values():
+                    if mon not in tally.contributions:
+                        self._register(tally, mon, side)
+                tally.n_pokemons[side] = len(team)
+        return tally
+
+    @staticmethod
+    def _update(tally: _BattleTally, mon: Pokemon, side: int) -> None:
+        if mon not in tally.contributions:
+            return
+        hp, fainted, status = RewardEngine._contribution(mon)
+        old_hp, old_fainted, old_status = tally.contributions[mon]
+        tally.contributions[mon] = (hp, fainted, status)
+
+        tally.hp[side] += hp - old_hp
+        tally.fainted[side] += fainted - old_fainted
+        tally.status[side] += status - old_status
+
+    def compute_reward(
+        self,
+        battle: AbstractBattle,
+        *,
+        fainted_value: float = 0.0,
+        hp_value: float = 0.0,
+        number_of_pokemons: int = 6,
+        starting_value: float = 0.0,
+        status_value: float = 0.0,
+        victory_value: float = 1.0,
+    ) -> float:
+        """Returns the difference between battle's current state value and its value
+        at the previous call. See EnvPlayer.reward_computing_helper for details.
+
+        :param battle: The battle for which to compute rewards.
+        :type battle: AbstractBattle
+        :return: The reward.
+        :rtype: float
+        """
+        return sum(
+            self.compute_reward_breakdown(
+                battle,
+                fainted_value=fainted_value,
+                hp_value=hp_value,
+                number_of_pokemons=number_of_pokemons,
+                starting_value=starting_value,
+                status_value=status_value,
+                victory_value=victory_value,
+            ).values()
+        )
+
+    def compute_reward_breakdown(
+        self,
+        battle: AbstractBattle,
+        *,
+        fainted_value: float = 0.0,
+        hp_value: float = 0.0,
+        number_of_pokemons: int = 6,
+        starting_value: float = 0.0,
+        status_value: float = 0.0,
+        victory_value: float = 1.0,
+    ) -> Dict[str, float]:
+        """Returns the reward of each state value component. Components sum to the
+        reward returned by compute_reward.
+
+        The starting value is subtracted from the first reward of each battle, under
+        the "starting" key.
+
+        :param battle: The battle for which to compute rewards.
+        :type battle: AbstractBattle
+        :return: The reward of each component.
+        :rtype: Dict[str, float]
+        """
+        if battle.battle_tag in self._finished_battles:
+            return {component: 0.0 for component in self.COMPONENTS}
+
+        tally = self._tally(battle)
+        missing = [number_of_pokemons - n for n in tally.n_pokemons]
+        components = {
+            "hp": hp_value * (tally.hp[0] + missing[0] - tally.hp[1] - missing[1]),
+            "fainted": fainted_value * (tally.fainted[1] - tally.fainted[0]),
+            "status": status_value * (tally.status[1] - tally.status[0]),
+            "victory": victory_value
+            if battle.won
+            else -victory_value
+            if battle.lost
+            else 0.0,
+        }
+
+        if tally.last_components is None:
+            breakdown = dict(components)
+            breakdown["starting"] = -starting_value
+        else:
+            breakdown = {
+                component: components[component] - tally.last_components[component]
+                for component in self.COMPONENTS
+            }
+        tally.last_components = components
+
+        if battle.finished:
+            self.forget(battle)
+            self._finished_battles[battle.battle_tag] = None
+            if len(self._finished_battles) > self._max_finished_battles:
+                self._finished_battles.popitem(last=False)
+
+        return breakdown
+
+    def forget(self, battle: AbstractBattle) -> None:
+        """Stops tracking battle.
+
+        :param battle: The battle to forget.
+        :type battle: AbstractBattle
+        """
+        tally = self._tallies.pop(battle, None)
+        if tally is None:
+            return
+        for mon, observer in tally.observers.items():
+            mon._observers.remove(observer)
@@ -0,0 +1,637 @@
+# -*- coding: utf-8 -*-
+"""This module defines a declarative rule engine for heuristic players: rules are
+predicates and scores over features of candidate orders, computed once per turn.
+"""
+
+import numpy as np  # pyre-ignore
+
+from collections import namedtuple
+from concurrent.futures import Executor
+from functools import partial
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+from poke_env.environment.abstract_battle import AbstractBattle
+from poke_env.environment.battle import Battle
+from poke_env.environment.move_category import MoveCategory
+from poke_env.environment.pokemon import Pokemon
+from poke_env.environment.side_condition import SideCondition
+from poke_env.player.baselines import _type_advantage
+from poke_env.player.battle_order import BattleOrder
+from poke_env.player.player import Player
+from poke_env.player_configuration import PlayerConfiguration
+from poke_env.server_configuration import ServerConfiguration
+from poke_env.teambuilder.teambuilder import Teambuilder
+
+Rule = namedtuple("Rule", ["name", "predicate", "score"])
+"""A heuristic rule. Represented with a tuple with three entries:
+
+- name: the rule's name, unique within a rule set.
+- predicate: a function of a FeatureTable, returning whether the rule applies to each
+  candidate order as a boolean array, or a boolean applying to all of them.
+- score: the score added to candidates the rule applies to. Either a float, or a
+  function of a FeatureTable returning an array of scores.
+
+Rules built from module-level functions, or functools.partial objects wrapping them,
+can be pickled, eg. to be sent to other processes.
+"""
+
+ENTRY_HAZARDS = {
+    "spikes": SideCondition.SPIKES,
+    "stealthrock": SideCondition.STEALTH_ROCK,
+    "stickyweb": SideCondition.STICKY_WEB,
+    "toxicspikes": SideCondition.TOXIC_SPIKES,
+}
+
+ANTI_HAZARDS_MOVES = {"defog", "rapidspin"}
+
+
+def _stat_estimation(mon: Pokemon, stat: str) -> float:
+    # Stats boosts value
+    if mon.boosts[stat] > 1:
+        boost = (2 + mon.boosts[stat]) / 2
+    else:
+        boost = 2 / (2 - mon.boosts[stat])
+    return ((2 * mon.base_stats[stat] + 31) + 5) * boost
+
+
+def _speed_advantage(mon: Pokemon, opponent: Pokemon) -> float:
+    return float(np.sign(mon.base_stats["spe"] - opponent.base_stats["spe"]))
+
+
+class FeatureTable:
+    """Features of a turn's candidate orders, as arrays with one entry per candidate.
+
+    Features are accessed as attributes, eg. features.damage. Turn features, such as
+    n_remaining_mons, have the same value for every candidate. Features are:
+
+    - Candidate features: is_move, is_switch, is_dynamax, damage (an estimation of the
+      move's damage), relative_damage (damage divided by the highest damage),
+      is_entry_hazard (the move sets an entry hazard the opponent does not have yet),
+      is_hazard_removal, is_setup (the move boosts the user's stats by two stages or
+      more, and they are not maxed), and mon_hp_fraction, mon_type_advantage and
+      mon_speed_advantage, describing the pokemon on the field after the order
+      against the opponent's active pokemon.
+    - Turn features: active_hp_fraction, active_type_advantage,
+      active_speed_advantage, active_min_defensive_boost, active_offensive_boost
+      (the boost of the active pokemon's main attacking stat), opponent_hp_fraction,
+      can_dynamax, n_full_hp_mons, n_remaining_mons, n_opponent_remaining_mons and
+      has_side_conditions.
+
+    Type advantages are the best multiplier of the pokemon's types on the opponent's
+    minus the reverse, and speed advantages are 1, 0 or -1 depending on base speeds.
+    """
+
+    def __init__(
+        self, orders: Sequence[BattleOrder], features: Dict[str, np.ndarray]
+    ) -> None:
+        """
+        :param orders: The candidate orders.
+        :type orders: sequence of BattleOrder
+        :param features: Feature arrays, by name. Each array has one entry per
+            candidate.
+        :type features: Dict[str, np.ndarray]
+        """
+        self._cache: Dict[Callable, np.ndarray] = {}
+        self._features = features
+        self._orders = list(orders)
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        # Only called for missing attributes, ie. features
+        try:
+            return self.__dict__["_features"][name]
+        except KeyError:
+            raise AttributeError(f"Unknown feature: {name}")
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._features[name]
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    @staticmethod
+    def _move_features(
+        moves: List, active: Pokemon, opponent: Pokemon, battle: Battle
+    ) -> Dict[str, np.ndarray]:
+        if not moves:
+            return {
+                "damage": np.zeros(0),
+                "is_entry_hazard": np.zeros(0, dtype=bool),
+                "is_hazard_removal": np.zeros(0, dtype=bool),
+                "is_setup": np.zeros(0, dtype=bool),
+            }
+
+        # Rough estimation of damage ratio
+        physical_ratio = _stat_estimation(active, "atk") / _stat_estimation(
+            opponent, "def"
+        )
+        special_ratio = _stat_estimation(active, "spa") / _stat_estimation(
+            opponent, "spd"
+        )
+        damage = np.array(
+            [
+                move.base_power
+                * (1.5 if move.type in active.types else 1)
+                * (
+                    physical_ratio
+                    if move.category == MoveCategory.PHYSICAL
+                    else special_ratio
+                )
+                * move.accuracy
+                * move.expected_hits
+                * opponent.damage_multiplier(move)
+                for move in moves
+            ],
+            dtype=float,
+        )
+        is_entry_hazard = np.array(
+            [
+                move.id in ENTRY_HAZARDS
+                and ENTRY_HAZARDS[move.id] not in battle.opponent_side_conditions
+                for move in moves
+            ]
+        )
+        is_hazard_removal = np.array([move.id in ANTI_HAZARDS_MOVES for move in moves])
+        is_setup = np.array(
+            [
+                bool(move.boosts)
+                and sum(move.boosts.values()) >= 2
+                and move.target == "self"
+                and min(active.boosts[s] for s, v in move.boosts.items() if v > 0) < 6
+                for move in moves
+            ]
+        )
+        return {
+            "damage": damage,
+            "is_entry_hazard": is_entry_hazard,
+            "is_hazard_removal": is_hazard_removal,
+            "is_setup": is_setup,
+        }
+
+    def cached(self, function: Callable[["FeatureTable"], np.ndarray]) -> np.ndarray:
+        """Computes a derived feature once per table.
+
+        Rules sharing intermediate values, such as matchups, can compute them with
+        cached so that they are evaluated once per turn.
+
+        :param function: The function computing the derived feature from the table.
+        :type function: Callable[[FeatureTable], np.ndarray]
+        :return: The derived feature.
+        :rtype: np.ndarray
+        """
+        if function not in self._cache:
+            self._cache[function] = function(self)
+        return self._cache[function]
+
+    @classmethod
+    def from_battle(cls, battle: Battle) -> "FeatureTable":
+        """Computes the features of a singles battle's available orders.
+
+        Moves are candidates with and without dynamax when the player can dynamax.
+
+        :param battle: The battle.
+        :type battle: Battle
+        :return: The features.
+        :rtype: FeatureTable
+        """
+        active = battle.active_pokemon
+        opponent = battle.opponent_active_pokemon
+
+        moves = list(battle.available_moves) if active and opponent else []
+        switches = list(battle.available_switches) if opponent else []
+        dynamax_moves = moves if battle.can_dynamax else []
+        orders = (
+            [BattleOrder(move) for move in moves]
+            + [BattleOrder(move, dynamax=True) for move in dynamax_moves]
+            + [BattleOrder(mon) for mon in switches]
+        )
+        n_moves = len(moves) + len(dynamax_moves)
+        kinds = np.array(
+            [0] * len(moves) + [1] * len(dynamax_moves) + [2] * len(switches)
+        )
+
+        features: Dict[str, np.ndarray] = {
+            "is_move": kinds < 2,
+            "is_switch": kinds == 2,
+            "is_dynamax": kinds == 1,
+        }
+        move_features = cls._move_features(moves, active, opponent, battle)
+        for name, values in move_features.items():
+            features[name] = np.concatenate(
+                [values] * (2 if dynamax_moves else 1)
+                + [np.zeros(len(switches), dtype=values.dtype)]
+            )
+        features["relative_damage"] = features["damage"] / max(
+            features["damage"].max(initial=0.0), 1e-9
+        )
+
+        mons = [active] * n_moves + switches
+        features["mon_hp_fraction"] = np.array(
+            [mon.current_hp_fraction for mon in mons], dtype=float
+        )
+        features["mon_type_advantage"] = np.array(
+            [_type_advantage(mon.types, opponent.types) for mon in mons], dtype=float
+        )
+        features["mon_speed_advantage"] = np.array(
+            [_speed_advantage(mon, opponent) for mon in mons], dtype=float
+        )
+
+        team = list(battle.team.values())
+        turn_features = {
+            "can_dynamax": bool(battle.can_dynamax),
+            "has_side_conditions": bool(battle.side_conditions),
+            "n_full_hp_mons": sum(mon.current_hp_fraction == 1 for mon in team),
+            "n_remaining_mons": sum(not mon.fainted for mon in team),
+            "n_opponent_remaining_mons": 6
+            - sum(mon.fainted for mon in battle.opponent_team.values()),
+            "opponent_hp_fraction": opponent.current_hp_fraction if opponent else 0.0,
+        }
+        if active and opponent:
+            stats = {
+                stat: active.stats.get(stat) or active.base_stats[stat]
+                for stat in ("atk", "spa")
+            }
+            main_stat = "atk" if stats["atk"] >= stats["spa"] else "spa"
+            turn_features.update(
+                {
+                    "active_hp_fraction": active.current_hp_fraction,
+                    "active_min_defensive_boost": min(
+                        active.boosts["def"], active.boosts["spd"]
+                    ),
+                    "active_offensive_boost": active.boosts[main_stat],
+                    "active_speed_advantage": _speed_advantage(active, opponent),
+                    "active_type_advantage": _type_advantage(
+                        active.types, opponent.types
+                    ),
+                }
+            )
+        else:
+            turn_features.update(
+                {
+                    "active_hp_fraction": 0.0,
+                    "active_min_defensive_boost": 0,
+                    "active_offensive_boost": 0,
+                    "active_speed_advantage": 0.0,
+                    "active_type_advantage": 0.0,
+                }
+            )
+        for name, value in turn_features.items():
+            features[name] = np.full(len(orders), value)
+
+        return cls(orders, features)
+
+    @property
+    def names(self) -> List[str]:
+        """
+        :return: The features' names.
+        :rtype: List[str]
+        """
+        return list(self._features)
+
+    @property
+    def orders(self) -> List[BattleOrder]:
+        """
+        :return: The candidate orders.
+        :rtype: List[BattleOrder]
+        """
+        return list(self._orders)
+
+
+class RuleSet:
+    """An ordered set of rules, scoring candidate orders.
+
+    A candidate's score is the sum of the scores of the rules applying to it. Each
+    rule is evaluated once per turn, over all candidates at once. Rule sets are
+    immutable: variants are derived with replace and without.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        """
+        :param rules: The rules.
+        :type rules: sequence of Rule
+        """
+        names = [rule.name for rule in rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Rule names must be unique, got %s." % names)
+
+        self._rules = tuple(rules)
+
+    def __iter__(self):
+        return iter(self._rules)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def contributions(self, features: FeatureTable) -> np.ndarray:
+        """Evaluates each rule on each candidate.
+
+        Weighted variants of a rule set can be evaluated at once by multiplying a
+        matrix of rule weights with the contributions.
+
+        :param features: The candidates' features.
+        :type features: FeatureTable
+        :return: The score each rule adds to each candidate, of shape (number of
+            rules, number of candidates).
+        :rtype: np.ndarray
+        """
+        contributions = np.zeros((len(self._rules), len(features)))
+        for i, rule in enumerate(self._rules):
+            score = rule.score(features) if callable(rule.score) else rule.score
+            contributions[i] = np.where(rule.predicate(features), score, 0.0)
+        return contributions
+
+    def replace(self, name: str, **fields) -> "RuleSet":
+        """Returns a copy of the rule set with a modified rule.
+
+        :param name: The name of the rule to modify.
+        :type name: str
+        :param fields: New values of the rule's fields, among predicate and score.
+        :return: The modified rule set.
+        :rtype: RuleSet
+        """
+        if name not in self.names:
+            raise ValueError("Unknown rule: %s" % name)
+        return RuleSet(
+            [rule._replace(**fields) if rule.name == name else rule for rule in self]
+        )
+
+    def scores(self, features: FeatureTable) -> np.ndarray:
+        """
+        :param features: The candidates' features.
+        :type features: FeatureTable
+        :return: The score of each candidate.
+        :rtype: np.ndarray
+        """
+        return self.contributions(features).sum(axis=0)
+
+    def without(self, *names: str) -> "RuleSet":
+        """
+        :param names: The names of the rules to remove.
+        :type names: str
+        :return: A copy of the rule set without these rules.
+        :rtype: RuleSet
+        """
+        return RuleSet([rule for rule in self if rule.name not in names])
+
+    @property
+    def names(self) -> List[str]:
+        """
+        :return: The rules' names, in order.
+        :rtype: List[str]
+        """
+        return [rule.name for rule in self._rules]
+
+
+# Predicates and scores of simple_heuristics_rules. They are module-level functions,
+# parametrized with functools.partial, so that rule sets can be pickled
+
+
+def _matchup(
+    f: FeatureTable, hp_fraction_coefficient: float, speed_tier_coefficient: float
+) -> np.ndarray:
+    return (
+        f.mon_type_advantage
+        + speed_tier_coefficient * f.mon_speed_advantage
+        + hp_fraction_coefficient * (f.mon_hp_fraction - f.opponent_hp_fraction)
+    )
+
+
+def _active_matchup(
+    f: FeatureTable, hp_fraction_coefficient: float, speed_tier_coefficient: float
+) -> np.ndarray:
+    return (
+        f.active_type_advantage
+        + speed_tier_coefficient * f.active_speed_advantage
+        + hp_fraction_coefficient * (f.active_hp_fraction - f.opponent_hp_fraction)
+    )
+
+
+def _switch_out(
+    f: FeatureTable, matchup: Callable, active_matchup: Callable, threshold: float
+) -> np.ndarray:
+    good_switch = f.is_switch & (f.cached(matchup) > 0)
+    reason = (
+        (f.active_min_defensive_boost <= -3)
+        | (f.active_offensive_boost <= -3)
+        | (f.cached(active_matchup) < threshold)
+    )
+    return good_switch & reason
+
+
+def _switch_out_score(f: FeatureTable, matchup: Callable) -> np.ndarray:
+    return 1000 + f.cached(matchup)
+
+
+def _entry_hazards(f: FeatureTable) -> np.ndarray:
+    return f.is_entry_hazard & (f.n_opponent_remaining_mons >= 3)
+
+
+def _hazard_removal(f: FeatureTable) -> np.ndarray:
+    return f.is_hazard_removal & f.has_side_conditions & (f.n_remaining_mons >= 2)
+
+
+def _setup(f: FeatureTable, active_matchup: Callable) -> np.ndarray:
+    return f.is_setup & (f.active_hp_fraction == 1) & (f.cached(active_matchup) > 0)
+
+
+def _is_move(f: FeatureTable) -> np.ndarray:
+    return f.is_move
+
+
+def _relative_damage(f: FeatureTable) -> np.ndarray:
+    return f.relative_damage
+
+
+def _should_dynamax(f: FeatureTable, active_matchup: Callable) -> np.ndarray:
+    return (
+        ((f.n_full_hp_mons == 1) & (f.active_hp_fraction == 1))
+        | (
+            (f.cached(active_matchup) > 0)
+            & (f.active_hp_fraction == 1)
+            & (f.opponent_hp_fraction == 1)
+        )
+        | (f.n_remaining_mons == 1)
+    )
+
+
+def _dynamax(f: FeatureTable, should_dynamax: Callable) -> np.ndarray:
+    return f.is_dynamax & f.cached(should_dynamax)
+
+
+def _hold_dynamax(f: FeatureTable, should_dynamax: Callable) -> np.ndarray:
+    return f.is_dynamax & ~f.cached(should_dynamax)
+
+
+def _is_switch(f: FeatureTable) -> np.ndarray:
+    return f.is_switch
+
+
+def _switch_score(f: FeatureTable, matchup: Callable) -> np.ndarray:
+    return f.cached(matchup) - 100
+
+
+def simple_heuristics_rules(
+    *,
+    hp_fraction_coefficient: float = 0.4,
+    speed_tier_coefficient: float = 0.1,
+    switch_out_matchup_threshold: float = -2,
+) -> RuleSet:
+    """Returns SimpleHeuristicsPlayer's heuristics, as a rule set.
+
+    Rules scores are priorities: switching out of bad matchups comes first, then
+    entry hazards, hazard removal, setup moves and finally the most damaging move.
+    Switches that are not switch outs are only chosen when no move is available.
+
+    :param hp_fraction_coefficient: Weight of hp fractions in matchups. Defaults to
+        0.4.
+    :type hp_fraction_coefficient: float
+    :param speed_tier_coefficient: Weight of speed advantages in matchups. Defaults to
+        0.1.
+    :type speed_tier_coefficient: float
+    :param switch_out_matchup_threshold: Matchup under which the active pokemon
+        switches out. Defaults to -2.
+    :type switch_out_matchup_threshold: float
+    :return: The rule set.
+    :rtype: RuleSet
+    """
+
+    matchup = partial(
+        _matchup,
+        hp_fraction_coefficient=hp_fraction_coefficient,
+        speed_tier_coefficient=speed_tier_coefficient,
+    )
+    active_matchup = partial(
+        _active_matchup,
+        hp_fraction_coefficient=hp_fraction_coefficient,
+        speed_tier_coefficient=speed_tier_coefficient,
+    )
+    should_dynamax = partial(_should_dynamax, active_matchup=active_matchup)
+
+    return RuleSet(
+        [
+            Rule(
+                "switch_out",
+                partial(
+                    _switch_out,
+                    matchup=matchup,
+                    active_matchup=active_matchup,
+                    threshold=switch_out_matchup_threshold,
+                ),
+                partial(_switch_out_score, matchup=matchup),
+            ),
+            Rule("entry_hazards", _entry_hazards, 300.0),
+            Rule("hazard_removal", _hazard_removal, 200.0),
+            Rule("setup", partial(_setup, active_matchup=active_matchup), 100.0),
+            Rule("damage", _is_move, _relative_damage),
+            Rule("dynamax", partial(_dynamax, should_dynamax=should_dynamax), 0.5),
+            Rule(
+                "hold_dynamax",
+                partial(_hold_dynamax, should_dynamax=should_dynamax),
+                -0.5,
+            ),
+            Rule("switch", _is_switch, partial(_switch_score, matchup=matchup)),
+        ]
+    )
+
+
+class RuleBasedPlayer(Player):
+    """A heuristic player choosing the order with the highest rule set score.
+
+    Each turn, features of the available orders are computed once, and the rule set
+    is evaluated over all of them at once. By default, rules follow
+    SimpleHeuristicsPlayer's heuristics. Double battles are played randomly.
+    """
+
+    def __init__(
+        self,
+        player_configuration: Optional[PlayerConfiguration] = None,
+        *,
+        avatar: Optional[int] = None,
+        battle_format: str = "gen8randombattle",
+        choose_move_executor: Optional[Executor] = None,
+        decision_budget: Optional[float] = None,
+        log_level: Optional[int] = None,
+        max_concurrent_battles: int = 1,
+        rules: Optional[RuleSet] = None,
+        server_configuration: Optional[ServerConfiguration] = None,
+        start_timer_on_battle_start: bool = False,
+        start_listening: bool = True,
+        team: Optional[Union[str, Teambuilder]] = None,
+    ) -> None:
+        """
+        :param player_configuration: Player configuration. If empty, defaults to an
+            automatically generated username with no password. This option must be set
+            if the server configuration requires authentication.
+        :type player_configuration: PlayerConfiguration, optional
+        :param avatar: Player avatar id. Optional.
+        :type avatar: int, optional
+        :param battle_format: Name of the battle format this player plays. Defaults to
+            gen8randombattle.
+        :type battle_format: str
+        :param choose_move_executor: Executor running choose_move calls, so that
+            decisions do not block other battles. With a process pool, the rule set
+            must be picklable. Defaults to None, running choose_move in the event
+            loop.
+        :type choose_move_executor: Executor, optional
+        :param decision_budget: Time, in seconds, after which a decision running in
+            choose_move_executor is abandoned for choose_fallback_move's order.
+            Decisions running in the event loop are not cut off. Defaults to None,
+            for no budget.
+        :type decision_budget: float, optional
+        :param log_level: The player's logger level.
+        :type log_level: int. Defaults to logging's default level.
+        :param max_concurrent_battles: Maximum number of battles this player will play
+            concurrently. If 0, no limit will be applied. Defaults to 1.
+        :type max_concurrent_battles: int
+        :param rules: The rule set scoring orders. Defaults to
+            simple_heuristics_rules().
+        :type rules: RuleSet, optional
+        :param server_configuration: Server configuration. Defaults to Localhost Server
+            Configuration.
+        :type server_configuration: ServerConfiguration, optional
+        :param start_listening: Whether to start listening to the server. Defaults to
+            True.
+        :type start_listening: bool
+        :param start_timer_on_battle_start: Whether to automatically start the battle
+            timer on battle start. Defaults to False.
+        :type start_timer_on_battle_start: bool
+        :param team: The team to use for formats requiring a team. Can be a showdown
+            team string, a showdown packed team string, of a ShowdownTeam object.
+            Defaults to None.
+        :type team: str or Teambuilder, optional
+        """
+        super(RuleBasedPlayer, self).__init__(
+            player_configuration=player_configuration,
+            avatar=avatar,
+            battle_format=battle_format,
+            choose_move_executor=choose_move_executor,
+            decision_budget=decision_budget,
+            log_level=log_level,
+            max_concurrent_battles=max_concurrent_battles,
+            server_configuration=server_configuration,
+            start_timer_on_battle_start=start_timer_on_battle_start,
+            start_listening=start_listening,
+            team=team,
+        )
+        self._rules = rules if rules is not None else simple_heuristics_rules()
+
+    def choose_move(self, battle: AbstractBattle) -> BattleOrder:
+        if not isinstance(battle, Battle):
+            return self.choose_random_move(battle)
+
+        features = FeatureTable.from_battle(battle)
+        if not len(features):
+            return self.choose_random_move(battle)
+        return features.orders[int(np.argmax(self._rules.scores(features)))]
+
+    @property
+    def rules(self) -> RuleSet:
+        """
+        :return: The rule set scoring orders.
+        :rtype: RuleSet
+        """
+        return self._rules
@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+"""This module defines a transport exchanging transitions and actions between battle
+worker processes and a learner process through shared memory.
+
+Each SharedMemoryTransport links one worker, running an EnvPlayer, to the learner. It
+is made of two preallocated single-producer single-consumer ring buffers: the worker
+writes observations, action masks, rewards and dones to the first one, and the
+learner writes actions to the second one. Records are fixed-size numpy arrays living
+in a ``multiprocessing.shared_memory`` segment, so nothing is pickled and the learner
+reads transitions without copying them.
+
+A transport is created by the learner, and attached to by the worker with its spec,
+which is a small picklable tuple:
+
+.. code-block:: python
+
+    transport = SharedMemoryTransport(observation_shape=(10,), n_actions=22)
+    worker = multiprocessing.Process(
+        target=run_worker, args=(transport.spec,)
+    )  # run_worker calls player.play_against(shared_memory_env_algorithm, ...)
+
+Shared memory requires python 3.8 or later.
+"""
+
+import numpy as np  # pyre-ignore
+import time
+
+from collections import namedtuple
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover
+    shared_memory = None
+
+RingBufferSpec = namedtuple("RingBufferSpec", ["name", "capacity", "fields"])
+"""Description of a shared memory ring buffer, used to attach to it from another
+process. Represented with a tuple with three entries: the shared memory segment name,
+the number of records and the record fields, as (name, shape, dtype string) tuples."""
+
+TransportSpec = namedtuple("TransportSpec", ["transitions", "actions"])
+"""Description of a SharedMemoryTransport, used to attach to it from another process.
+Represented with a tuple with two entries: the specs of the transition and action
+ring buffers."""
+
+STOP_ACTION = -1
+"""Action sent by the learner to stop a worker's env algorithm."""
+
+_ALIGNMENT = 64
+_HEADER_SIZE = _ALIGNMENT
+_MAX_POLL_INTERVAL = 1e-3
+
+
+def _aligned(size: int) -> int:
+    return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class SharedMemoryRingBuffer:
+    """Single-producer single-consumer ring buffer of fixed-size records, stored in a
+    shared memory segment.
+
+    The segment starts with two counters - the number of records written and read -
+    followed by one array per field, holding capacity records. Each counter is only
+    written by one side. The producer fills a slot before publishing it by
+    incrementing the write counter, and the consumer reads the slot in place and
+    releases it by incrementing the read counter.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        fields: Sequence[Tuple[str, Tuple[int, ...], Any]],
+        *,
+        name: Optional[str] = None,
+        create: bool = True,
+    ):
+        """
+        :param capacity: Number of records the buffer holds.
+        :type capacity: int
+        :param fields: Record fields, as (name, shape, dtype) tuples.
+        :type fields: sequence of tuples
+        :param name: The shared memory segment name. Must be set when attaching to an
+            existing buffer. Defaults to a name chosen by the system.
+        :type name: str, optional
+        :param create: Whether to create the shared memory segment, or to attach to an
+            existing one. Defaults to True.
+        :type create: bool
+        :raises: RuntimeError if shared memory is not available.
+        """
+        if shared_memory is None:  # pragma: no cover
+            raise RuntimeError("Shared memory transport requires python 3.8 or later.")
+        if capacity < 1:
+            raise ValueError("capacity must be positive. Received %d" % capacity)
+
+        self._capacity = capacity
+        self._fields = tuple(
+            (field, tuple(shape), np.dtype(dtype).str) for field, shape, dtype in fields
+        )
+
+        offsets = []
+        size = _HEADER_SIZE
+        for _, shape, dtype in self._fields:
+            offsets.append(size)
+            size += _aligned(
+                capacity
+                * int(np.prod(shape, dtype=np.int64))
+                * np.dtype(dtype).itemsize
+            )
+
+        self._shared_memory = shared_memory.SharedMemory(
+            name=name, create=create, size=size
+        )
+        self._owner = create
+
+        buffer = self._shared_memory.buf
+        self._counters = np.ndarray((2,), dtype=np.int64, buffer=buffer)
+        if create:
+            self._counters[:] = 0
+        self._arrays = {
+            field: np.ndarray(
+                (capacity, *shape), dtype=np.dtype(dtype), buffer=buffer, offset=offset
+            )
+            for (field, shape, dtype), offset in zip(self._fields, offsets)
+        }
+
+    def __enter__(self) -> "SharedMemoryRingBuffer":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    def __len__(self) -> int:
+        return int(self._counters[0] - self._counters[1])
+
+    @classmethod
+    def attach(cls, spec: RingBufferSpec) -> "SharedMemoryRingBuffer":
+        """Attaches to a ring buffer created in another process.
+
+        :param spec: The ring buffer's spec.
+        :type spec: RingBufferSpec
+        :return: The attached ring buffer.
+        :rtype: SharedMemoryRingBuffer
+        """
+        return cls(spec.capacity, spec.fields, name=spec.name, create=False)
+
+    def _wait(self, ready, timeout: Optional[float]) -> None:
+        if ready():
+            return
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = 0.0
+        while not ready():
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("Timed out waiting on shared memory ring buffer.")
+            time.sleep(interval)
+            interval = min(max(interval * 2, 1e-6), _MAX_POLL_INTERVAL)
+
+    def close(self) -> None:
+        """Closes this process' access to the buffer. Arrays returned by get must not
+        be used afterwards."""
+        self._counters = None
+        self._arrays = {}
+        self._shared_memory.close()
+
+    def get(self, timeout: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Returns the oldest unreleased record, waiting for one to be written if the
+        buffer is empty.
+
+        The returned arrays are views of the shared memory segment: they are only
+        valid until the record is released.
+
+        :param timeout: Maximum waiting time, in seconds. Defaults to None, waiting
+            indefinitely.
+        :type timeout: float, optional
+        :return: The record's fields.
+        :rtype: Dict[str, np.ndarray]
+        :raises: TimeoutError if no record is written in time.
+        """
+        self._wait(lambda: self._counters[0] > self._counters[1], timeout)
+        slot = self._counters[1] % self._capacity
+        return {field: array[slot] for field, array in self._arrays.items()}
+
+    def put(self, timeout: Optional[float] = None, **values) -> None:
+        """Writes a record, waiting for a slot to be released if the buffer is full.
+
+        :param timeout: Maximum waiting time, in seconds. Defaults to None, waiting
+            indefinitely.
+        :type timeout: float, optional
+        :param values: The record's fields.
+        :raises: TimeoutError if no slot is released in time.
+        """
+        self._wait(
+            lambda: self._counters[0] - self._counters[1] < self._capacity, timeout
+        )
+        slot = self._counters[0] % self._capacity
+        for field, array in self._arrays.items():
+            array[slot] = values[field]
+        self._counters[0] += 1
+
+    def release(self) -> None:
+        """Releases the record returned by the last call to get."""
+        if self._counters[0] == self._counters[1]:
+            raise ValueError("No record to release.")
+        self._counters[1] += 1
+
+    def unlink(self) -> None:
+        """Destroys the shared memory segment. It should be called once, by the
+        process which created the buffer, when every process has closed it."""
+        self._shared_memory.unlink()
+
+    @property
+    def capacity(self) -> int:
+        """
+        :return: The number of records the buffer holds.
+        :rtype: int
+        """
+        return self._capacity
+
+    @property
+    def spec(self) -> RingBufferSpec:
+        """
+        :return: The spec used to attach to the buffer from another process.
+        :rtype: RingBufferSpec
+        """
+        return RingBufferSpec(self._shared_memory.name, self._capacity, self._fields)
+
+
+class SharedMemoryTransport:
+    """Pair of shared memory ring buffers linking a battle worker and a learner.
+
+    The worker puts transitions and gets actions, while the learner gets transitions
+    and puts actions.
+    """
+
+    def __init__(
+        self,
+        observation_shape: Optional[Tuple[int, ...]] = None,
+        n_actions: Optional[int] = None,
+        *,
+        capacity: int = 64,
+        observation_dtype: Any = np.float32,
+        spec: Optional[TransportSpec] = None,
+    ):
+        """
+        :param observation_shape: Shape of observations returned by embed_battle.
+            Required unless spec is set.
+        :type observation_shape: tuple of int, optional
+        :param n_actions: Size of the action space. Required unless spec is set.
+        :type n_actions: int, optional
+        :param capacity: Number of transitions and actions each ring buffer holds.
+            Defaults to 64.
+        :type capacity: int
+        :param observation_dtype: Observations' dtype. Defaults to np.float32.
+        :type observation_dtype: numpy dtype
+        :param spec: Spec of an existing transport to attach to. Defaults to None,
+            creating a new transport.
+        :type spec: TransportSpec, optional
+        """
+        if spec is not None:
+            self._transitions = SharedMemoryRingBuffer.attach(spec.transitions)
+            self._actions = SharedMemoryRingBuffer.attach(spec.actions)
+        else:
+            if observation_shape is None or n_actions is None:
+                raise ValueError(
+                    "observation_shape and n_actions are required to create a "
+                    "transport."
+                )
+            self._transitions = SharedMemoryRingBuffer(
+                capacity,
+                [
+                    ("observation", tuple(observation_shape), observation_dtype),
+                    ("action_mask", (n_actions,), np.bool_),
+                    ("reward", (), np.float32),
+                    ("done", (), np.bool_),
+                ],
+            )
+            self._actions = SharedMemoryRingBuffer(capacity, [("action", (), np.int64)])
+        self._owner = spec is None
+
+    def __enter__(self) -> "SharedMemoryTransport":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    @classmethod
+    def attach(cls, spec: TransportSpec) -> "SharedMemoryTransport":
+        """Attaches to a transport created in another process.
+
+        :param spec: The transport's spec.
+        :type spec: TransportSpec
+        :return: The attached transport.
+        :rtype: SharedMemoryTransport
+        """
+        return cls(spec=spec)
+
+    def close(self) -> None:
+        """Closes this process' access to the transport."""
+        self._transitions.close()
+        self._actions.close()
+
+    def get_action(self, timeout: Optional[float] = None) -> int:
+        """Returns the next action sent by the learner. Called by the worker.
+
+        :param timeout: Maximum waiting time, in seconds. Defaults to None, waiting
+            indefinitely.
+        :type timeout: float, optional
+        :return: The action.
+        :rtype: int
+        """
+        action = int(self._actions.get(timeout)["action"])
+        self._actions.release()
+        return action
+
+    def get_transition(self, timeout: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Returns the oldest transition sent by the worker, without copying it. Called
+        by the learner.
+
+        The returned arrays are only valid until release_transition is called.
+
+        :param timeout: Maximum waiting time, in seconds. Defaults to None, waiting
+            indefinitely.
+        :type timeout: float, optional
+        :return: The transition's observation, action_mask, reward and done.
+        :rtype: Dict[str, np.ndarray]
+        """
+        return self._transitions.get(timeout)
+
+    def put_action(self, action: int, timeout: Optional[float] = None) -> None:
+        """Sends an action to the worker. Called by the learner.
+
+        :param action: The action, or STOP_ACTION to stop the worker.
+        :type action: int
+        :param timeout: Maximum waiting time, in seconds. Defaults to None, waiting
+            indefinitely.
+        :type timeout: float, optional
+        """
+        self._actions.put(timeout, action=action)
+
+    def put_transition(
+        self,
+        observation: Any,
+        action_mask: Any,
+        reward: float,
+        done: bool,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """Sends a transition to the learner. Called by the worker.
+
+        :param observation: The observation.
+        :type observation: np.ndarray
+        :param action_mask: The legal action mask.
+        :type action_mask: np.ndarray
+        :param reward: The reward.
+        :type reward: float
+        :param done: Whether the battle is finished.
+        :type done: bool
+        :param timeout: Maximum waiting time, in seconds. Defaults to None, waiting
+            indefinitely.
+        :type timeout: float, optional
+        """
+        self._transitions.put(
+            timeout,
+            observation=observation,
+            action_mask=action_mask,
+            reward=reward,
+            done=done,
+        )
+
+    def release_transition(self) -> None:
+        """Releases the transition returned by the last call to get_transition."""
+        self._transitions.release()
+
+    def unlink(self) -> None:
+        """Destroys the transport's shared memory. It should be called once, by the
+        process which created the transport."""
+        self._transitions.unlink()
+        self._actions.unlink()
+
+    @property
+    def spec(self) -> TransportSpec:
+        """
+        :return: The spec used to attach to the transport from another process.
+        :rtype: TransportSpec
+        """
+        return TransportSpec(self._transitions.spec, self._actions.spec)
+
+
+def shared_memory_env_algorithm(player: Any, transport_spec: TransportSpec) -> None:
+    """Env algorithm forwarding an EnvPlayer's transitions to a learner through a
+    shared memory transport, to be used with EnvPlayer.play_against in the worker
+    process.
+
+    The first observation of each battle is sent with a reward of 0. After a
+    transition whose done flag is set, the next battle's first observation is sent
+    without waiting for an action. The algorithm returns when the learner sends
+    STOP_ACTION.
+
+    :param player: The env player.
+    :type player: EnvPlayer
+    :param transport_spec: The spec of the transport created by the learner.
+    :type transport_spec: TransportSpec
+    """
+    transport = SharedMemoryTransport.attach(transport_spec)
+    try:
+        while True:
+            observation = player.reset()
+            transport.put_transition(observation, player.action_mask, 0.0, False)
+
+            done = False
+            while not done:
+                action = transport.get_action()
+                if action == STOP_ACTION:
+                    return
+                observation, reward, done, info = player.step(action)
+                transport.put_transition(observation, info["action_mask"], reward, done)
+    finally:
+        transport.close()
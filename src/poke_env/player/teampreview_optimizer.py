@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""This module defines a team preview optimizer, choosing which pokemons to bring and
+lead with from type and base stat matchups.
+"""
+
+import numpy as np  # pyre-ignore
+
+from functools import lru_cache
+from itertools import combinations
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+from poke_env.data import TYPE_CHART
+from poke_env.environment.abstract_battle import AbstractBattle
+from poke_env.environment.double_battle import DoubleBattle
+from poke_env.environment.move_category import MoveCategory
+from poke_env.environment.pokemon import Pokemon
+from poke_env.environment.pokemon_type import PokemonType
+
+_TYPES = list(PokemonType)
+_TYPE_INDEX = {pokemon_type: i for i, pokemon_type in enumerate(_TYPES)}
+_NO_TYPE = len(_TYPES)
+
+# Attacking type x defending type. Missing defending types are neutral, and missing
+# attacking types, used as padding, are never the best attack
+_TYPE_CHART = np.zeros((_NO_TYPE + 1, _NO_TYPE + 1))
+_TYPE_CHART[:_NO_TYPE, :_NO_TYPE] = [
+    [TYPE_CHART[attacking.name][defending.name] for defending in _TYPES]
+    for attacking in _TYPES
+]
+_TYPE_CHART[:_NO_TYPE, _NO_TYPE] = 1.0
+
+# Immunities count as strong resistances, so that matchups stay finite
+_MIN_EFFECTIVENESS = 1 / 8
+
+_STATS = ("hp", "atk", "def", "spa", "spd", "spe")
+
+
+def _attacking_types(mon: Pokemon, use_moves: bool) -> List[int]:
+    types = set()
+    if use_moves:
+        types = {
+            _TYPE_INDEX[move.type]
+            for move in mon.moves.values()
+            if move.category != MoveCategory.STATUS and move.type in _TYPE_INDEX
+        }
+    if not types:
+        types = {_TYPE_INDEX[t] for t in mon.types if t is not None}
+    return sorted(types)
+
+
+def _defending_types(mon: Pokemon) -> List[int]:
+    return [_TYPE_INDEX[t] if t is not None else _NO_TYPE for t in mon.types]
+
+
+def _pressure(
+    attacking_types: List[List[int]],
+    attack_stats: np.ndarray,
+    defending_types: List[List[int]],
+    defense_stats: np.ndarray,
+) -> np.ndarray:
+    """Estimates the fraction of hp each attacker takes from each defender per hit,
+    up to a constant factor.
+    """
+    width = max(len(types) for types in attacking_types)
+    attacks = np.array(
+        [types + [_NO_TYPE] * (width - len(types)) for types in attacking_types]
+    )
+    defenses = np.array(defending_types)
+
+    effectiveness = (
+        _TYPE_CHART[attacks[:, None, :], defenses[None, :, 0, None]]
+        * _TYPE_CHART[attacks[:, None, :], defenses[None, :, 1, None]]
+    ).max(axis=2)
+
+    # Stats are ordered as _STATS
+    bulk = defense_stats[None, :, 0]
+    physical = attack_stats[:, None, 1] / (bulk * defense_stats[None, :, 2])
+    special = attack_stats[:, None, 3] / (bulk * defense_stats[None, :, 4])
+    return np.maximum(effectiveness, _MIN_EFFECTIVENESS) * np.maximum(physical, special)
+
+
+@lru_cache(2 ** 6)
+def _selections(
+    n_members: int, team_size: int, n_leads: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Enumerates the ways to bring team_size of n_members pokemons, n_leads of them
+    leading.
+
+    Returns boolean masks of brought and leading pokemons, of shape (n_selections,
+    n_members).
+    """
+    brought, leading = [], []
+    for leads in combinations(range(n_members), n_leads):
+        others = [i for i in range(n_members) if i not in leads]
+        for back in combinations(others, team_size - n_leads):
+            brought.append([i in leads or i in back for i in range(n_members)])
+            leading.append([i in leads for i in range(n_members)])
+    return np.array(brought, dtype=bool), np.array(leading, dtype=bool)
+
+
+class TeamPreviewOptimizer:
+    """Chooses the pokemons brought to a battle, and its leads, at team preview.
+
+    A matchup matrix scores each of the player's pokemons against each opponent
+    pokemon, from type effectiveness and base stats: the log2 ratio of the damage
+    each deals to the other, plus a bonus for the faster pokemon. Known damaging moves
+    are used for the player's pokemons, and STAB types for opponents.
+
+    Every way to bring team_size pokemons, n_leads of them leading, is then scored at
+    once: a selection's score is the average, over opponent pokemons, of the best
+    matchup among brought pokemons, plus lead_weight times the same average among
+    leads and depth_weight times the average matchup of brought pokemons. In VGC
+    formats, that is 15 pairs of leads times 6 pairs of back pokemons.
+
+    Players can use it by overriding teampreview::
+
+        def teampreview(self, battle):
+            return self.optimizer.teampreview(battle)
+    """
+
+    def __init__(
+        self,
+        *,
+        depth_weight: float = 0.25,
+        lead_weight: float = 0.5,
+        speed_weight: float = 0.5,
+    ) -> None:
+        """
+        :param depth_weight: Weight of the average matchup of brought pokemons in
+            selection scores. Defaults to 0.25.
+        :type depth_weight: float
+        :param lead_weight: Weight of leads' matchups in selection scores. Defaults to
+            0.5.
+        :type lead_weight: float
+        :param speed_weight: Matchup bonus of the faster pokemon, and malus of the
+            slower one. Defaults to 0.5.
+        :type speed_weight: float
+        """
+        self._depth_weight = depth_weight
+        self._lead_weight = lead_weight
+        self._speed_weight = speed_weight
+
+    def matchup_matrix(
+        self, team: Sequence[Pokemon], opponents: Sequence[Pokemon]
+    ) -> np.ndarray:
+        """Scores each pokemon of a team against each opponent pokemon.
+
+        :param team: The player's pokemons.
+        :type team: sequence of Pokemon
+        :param opponents: The opponent's pokemons.
+        :type opponents: sequence of Pokemon
+        :return: The matchups, of shape (len(team), len(opponents)). Positive values
+            favor the player's pokemon.
+        :rtype: np.ndarray
+        """
+        if not team or not opponents:
+            return np.zeros((len(team), len(opponents)))
+
+        team_stats = np.array(
+            [[mon.base_stats[stat] for stat in _STATS] for mon in team], dtype=float
+        )
+        opponent_stats = np.array(
+            [[mon.base_stats[stat] for stat in _STATS] for mon in opponents],
+            dtype=float,
+        )
+
+        dealt = _pressure(
+            [_attacking_types(mon, True) for mon in team],
+            team_stats,
+            [_defending_types(mon) for mon in opponents],
+            opponent_stats,
+        )
+        taken = _pressure(
+            [_attacking_types(mon, False) for mon in opponents],
+            opponent_stats,
+            [_defending_types(mon) for mon in team],
+            team_stats,
+        ).T
+        speed = np.sign(team_stats[:, None, 5] - opponent_stats[None, :, 5])
+        return np.log2(dealt / taken) + self._speed_weight * speed
+
+    def order(self, battle: AbstractBattle) -> List[int]:
+        """Chooses the pokemons brought to a battle and their order.
+
+        :param battle: The battle, at team preview.
+        :type battle: AbstractBattle
+        :return: The positions of the player's pokemons in battle.team, starting at 1:
+            leads, then other brought pokemons and finally pokemons left out.
+        :rtype: List[int]
+        """
+        team = list(battle.team.values())
+        opponents = list(battle.opponent_team.values())
+        if not team or not opponents:
+            return list(range(1, len(team) + 1))
+
+        team_size = min(battle.max_team_size or len(team), len(team))
+        n_leads = min(2 if isinstance(battle, DoubleBattle) else 1, team_size)
+
+        matchups = self.matchup_matrix(team, opponents)
+        brought, leading = _selections(len(team), team_size, n_leads)
+        scores = self.score_selections(matchups, brought, leading)
+        best = int(np.argmax(scores))
+
+        # Within each group, stronger pokemons come first
+        strength = matchups.mean(axis=1)
+        groups = (
+            leading[best],
+            brought[best] & ~leading[best],
+            ~brought[best],
+        )
+        order = []
+        for group in groups:
+            members = np.flatnonzero(group)
+            order.extend(int(i) + 1 for i in members[np.argsort(-strength[members])])
+        return order
+
+    def score_selections(
+        self, matchups: np.ndarray, brought: np.ndarray, leading: np.ndarray
+    ) -> np.ndarray:
+        """Scores selections of pokemons.
+
+        :param matchups: Matchup matrix, as returned by matchup_matrix.
+        :type matchups: np.ndarray
+        :param brought: Boolean masks of the pokemons brought by each selection, of
+            shape (n_selections, len(team)).
+        :type brought: np.ndarray
+        :param leading: Boolean masks of the pokemons leading in each selection, of
+            shape (n_selections, len(team)).
+        :type leading: np.ndarray
+        :return: The score of each selection.
+        :rtype: np.ndarray
+        """
+        candidates = matchups[None, :, :]
+        coverage = np.where(brought[:, :, None], candidates, -np.inf).max(axis=1)
+        leads = np.where(leading[:, :, None], candidates, -np.inf).max(axis=1)
+        depth = brought @ matchups.mean(axis=1) / brought.sum(axis=1)
+        return (
+            coverage.mean(axis=1)
+            + self._lead_weight * leads.mean(axis=1)
+            + self._depth_weight * depth
+        )
+
+    def teampreview(self, battle: AbstractBattle) -> str:
+        """Returns the teampreview order of the best selection.
+
+        :param battle: The battle, at team preview.
+        :type battle: AbstractBattle
+        :return: The teampreview order.
+        :rtype: str
+        """
+        return "/team " + "".join(str(i) for i in self.order(battle))
+
+    @property
+    def depth_weight(self) -> float:
+        """
+        :return: Weight of the average matchup of brought pokemons in selection
+            scores.
+        :rtype: float
+        """
+        return self._depth_weight
+
+    @property
+    def lead_weight(self) -> float:
+        """
+        :return: Weight of leads' matchups in selection scores.
+        :rtype: float
+        """
+        return self._lead_weight
+
+    @property
+    def speed_weight(self) -> float:
+        """
+        :return: Matchup bonus of the faster pokemon.
+        :rtype: float
+        """
+        return self._speed_weight
@@ -7,45 +7,74 @@ import numpy as np  # pyre-ignore
 
 from abc import ABC
 from abc import abstractmethod
+from asyncio import Future
 from poke_env.environment.abstract_battle import AbstractBattle
 from poke_env.player.battle_order import BattleOrder
 from poke_env.player.player import Player
+from poke_env.player.trajectory_sink import Trajectory
+from poke_env.player.trajectory_sink import TrajectorySink
 from poke_env.player_configuration import PlayerConfiguration
 from poke_env.server_configuration import ServerConfiguration
 from poke_env.teambuilder.teambuilder import Teambuilder
 from poke_env.utils import to_id_str
+from typing import Any
+from typing import Awaitable
 from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
 
 class TrainablePlayer(Player, ABC):
-    """This is an experimental API."""
+    """This is an experimental API.
+
+    When max_batch_size is greater than 1, decisions of concurrent battles are batched:
+    states of battles awaiting an order are collected until max_batch_size states,
+    or every running battle's state, are pending, or until batch_timeout seconds
+    passed since the first one. states_to_actions is then called once on the whole
+    batch.
+
+    When a trajectory sink is set, the (state, action) pairs of each battle are moved
+    to the sink as soon as the battle finishes, and replay receives an iterator over
+    the sink's trajectories instead of the training data dict. The sink is not cleared
+    between calls to train_against.
+    """
 
     def __init__(
         self,
         player_configuration: PlayerConfiguration,
         *,
         avatar: Optional[int] = None,
+        batch_timeout: float = 0.005,
         battle_format: str,
         log_level: Optional[int] = None,
+        max_batch_size: int = 1,
         max_concurrent_battles: int = 1,
         model=None,
         server_configuration: ServerConfiguration,
         start_timer_on_battle_start: bool = False,
         start_listening: bool = True,
         team: Optional[Union[str, Teambuilder]] = None,
+        trajectory_sink: Optional[TrajectorySink] = None,
     ) -> None:
         """
         :param player_configuration: Player configuration.
         :type player_configuration: PlayerConfiguration
         :param avatar: Player avatar id. Optional.
         :type avatar: int, optional
+        :param batch_timeout: Maximum time, in seconds, a decision waits for other
+            battles' decisions to be batched with. Defaults to 0.005.
+        :type batch_timeout: float
         :param battle_format: Name of the battle format this player plays.
         :type battle_format: str
         :param log_level: The player's logger level.
         :type log_level: int. Defaults to logging's default level.
+        :param max_batch_size: Maximum number of decisions batched together. If 1,
+            decisions are not batched and choose_move returns orders directly.
+            Defaults to 1.
+        :type max_batch_size: int
         :param max_concurrent_battles: Maximum number of battles this player will play
             concurrently. If 0, no limit will be applied. Defaults to 1.
         :type max_concurrent_battles: int
@@ -61,6 +90,9 @@ class TrainablePlayer(Player, ABC):
             team string, a showdown packed team string, of a ShowdownTeam object.
             Defaults to None.
         :type team: str or Teambuilder, optional
+        :param trajectory_sink: Storage receiving the trajectories of finished battles.
+            Defaults to None, keeping them in the training data until replay.
+        :type trajectory_sink: TrajectorySink, optional
         """
         super(TrainablePlayer, self).__init__(
             player_configuration=player_configuration,
@@ -77,12 +109,83 @@ class TrainablePlayer(Player, ABC):
             model = self.init_model()
         self.model = model
         self._training_data = {}
+        self._trajectory_sink = trajectory_sink
+
+        self._batch_timeout = batch_timeout
+        self._max_batch_size = max_batch_size
+        self._pending_decisions: List[Tuple[Any, AbstractBattle, Future]] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
 
+        self._n_batches = 0
         self._n_replays = 0
 
+    def _battle_finished_callback(self, battle: AbstractBattle) -> None:
+        if self._trajectory_sink is not None and self._training_data.get(battle):
+            states, actions = zip(*self._training_data.pop(battle))
+            self._trajectory_sink.add(
+                Trajectory(battle.battle_tag, battle.won, list(states), list(actions))
+            )
+
+    async def _batched_choose_move(self, battle: AbstractBattle) -> BattleOrder:
+        state = self.battle_to_state(battle)
+        decision = asyncio.get_event_loop().create_future()
+        self._pending_decisions.append((state, battle, decision))
+
+        if len(self._pending_decisions) >= min(
+            self._max_batch_size, max(self._battle_scheduler.n_running_battles, 1)
+        ):
+            self._flush_decisions()
+        elif self._batch_timer is None:
+            self._batch_timer = asyncio.get_event_loop().call_later(
+                self._batch_timeout, self._flush_decisions
+            )
+
+        action = await decision
+        return self._record_decision(state, action, battle)
+
+    def _flush_decisions(self) -> None:
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+
+        pending, self._pending_decisions = self._pending_decisions, []
+        if not pending:
+            return
+
+        states, battles, decisions = zip(*pending)
+        try:
+            actions = self.states_to_actions(list(states), list(battles))
+        except Exception as exception:
+            for decision in decisions:
+                if not decision.done():
+                    decision.set_exception(exception)
+            return
+        self._n_batches += 1
+
+        for decision, action in zip(decisions, actions):
+            if not decision.done():
+                decision.set_result(action)
+
     def _manage_error_in(self, battle: AbstractBattle):
         self._training_data[battle].pop()
 
+    def _replay_data(self) -> Union[Dict, Iterator[Trajectory]]:
+        if self._trajectory_sink is not None:
+            return self._trajectory_sink.iter_trajectories()
+        return self._training_data
+
+    def _record_decision(
+        self, state: Any, action: Any, battle: AbstractBattle
+    ) -> BattleOrder:
+        move = self.action_to_move(action, battle)
+
+        if battle not in self._training_data:
+            self._training_data[battle] = []
+
+        self._training_data[battle].append((state, action))
+
+        return move
+
     @staticmethod
     def init_model():
         pass
@@ -100,20 +203,36 @@ class TrainablePlayer(Player, ABC):
         pass
 
     @abstractmethod
-    def replay(self, battle_history: Dict):
+    def replay(self, battle_history: Union[Dict, Iterator[Trajectory]]):
         pass
 
-    def choose_move(self, battle: AbstractBattle) -> BattleOrder:
+    def choose_move(
+        self, battle: AbstractBattle
+    ) -> Union[BattleOrder, Awaitable[BattleOrder]]:
+        if self._max_batch_size > 1:
+            return self._batched_choose_move(battle)
+
         state = self.battle_to_state(battle)
         action = self.state_to_action(state, battle)
-        move = self.action_to_move(action, battle)
+        return self._record_decision(state, action, battle)
 
-        if battle not in self._training_data:
-            self._training_data[battle] = []
+    def states_to_actions(self, states: List, battles: List[AbstractBattle]) -> List:
+        """Computes the actions of a batch of states, in a single call.
 
-        self._training_data[battle].append((state, action))
+        It should be overridden to run the model once on the whole batch. The default
+        implementation calls state_to_action on each state.
 
-        return move
+        :param states: The states of the battles awaiting an order.
+        :type states: list
+        :param battles: The corresponding battles.
+        :type battles: list of AbstractBattle
+        :return: One action per state.
+        :rtype: list
+        """
+        return [
+            self.state_to_action(state, battle)
+            for state, battle in zip(states, battles)
+        ]
 
     async def train_against(
         self, opponent: "TrainablePlayer", n_battles=100, train_opponent: bool = False
@@ -133,9 +252,9 @@ class TrainablePlayer(Player, ABC):
             ),
         )
 
-        self.replay(self._training_data)
+        self.replay(self._replay_data())
         if train_opponent:
-            opponent.replay(opponent._training_data)
+            opponent.replay(opponent._replay_data())
 
         self._n_replays += 1
 
@@ -143,6 +262,18 @@ class TrainablePlayer(Player, ABC):
     def training_data(self) -> Dict[AbstractBattle, List]:
         return self._training_data
 
+    @property
+    def trajectory_sink(self) -> Optional[TrajectorySink]:
+        return self._trajectory_sink
+
+    @property
+    def max_batch_size(self) -> int:
+        return self._max_batch_size
+
+    @property
+    def n_batches(self) -> int:
+        return self._n_batches
+
     @property
     def n_replays(self) -> int:
         return self._n_replays
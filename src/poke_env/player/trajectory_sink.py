@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""This module defines storage backends for the trajectories of finished battles.
+
+TrainablePlayer hands the (state, action) pairs of each battle to its trajectory sink
+as soon as the battle finishes, and replays from the sink's streaming iterator. Two
+backends are available: RingBufferTrajectorySink keeps the last trajectories in
+memory, while MemmapTrajectorySink appends them to chunked, memory-mapped numpy files
+so that datasets are bounded by disk rather than memory.
+"""
+
+import json
+import numpy as np  # pyre-ignore
+import os
+
+from abc import ABC
+from abc import abstractmethod
+from collections import deque
+from collections import namedtuple
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+Trajectory = namedtuple("Trajectory", ["battle_tag", "won", "states", "actions"])
+"""The decisions taken in a battle. Represented with a tuple with four entries: the
+battle tag, whether the battle was won - None for ties - and the sequences of states
+and actions."""
+
+
+class TrajectorySink(ABC):
+    """Storage for the trajectories of finished battles."""
+
+    def __iter__(self) -> Iterator[Trajectory]:
+        return self.iter_trajectories()
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """The number of stored trajectories."""
+
+    @abstractmethod
+    def add(self, trajectory: Trajectory) -> None:
+        """Stores a trajectory.
+
+        :param trajectory: The trajectory to store.
+        :type trajectory: Trajectory
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Removes every stored trajectory."""
+
+    @abstractmethod
+    def iter_trajectories(self) -> Iterator[Trajectory]:
+        """Iterates over stored trajectories, from oldest to newest.
+
+        :return: An iterator over the stored trajectories.
+        :rtype: Iterator[Trajectory]
+        """
+
+
+class RingBufferTrajectorySink(TrajectorySink):
+    """In memory sink keeping the last capacity trajectories."""
+
+    def __init__(self, capacity: int = 10000):
+        """
+        :param capacity: Maximum number of trajectories kept. When full, the oldest
+            trajectory is dropped. Defaults to 10000.
+        :type capacity: int
+        """
+        self._trajectories: Deque[Trajectory] = deque(maxlen=capacity)
+
+    def __len__(self) -> int:
+        return len(self._trajectories)
+
+    def add(self, trajectory: Trajectory) -> None:
+        self._trajectories.append(trajectory)
+
+    def clear(self) -> None:
+        self._trajectories.clear()
+
+    def iter_trajectories(self) -> Iterator[Trajectory]:
+        return iter(list(self._trajectories))
+
+    @property
+    def capacity(self) -> int:
+        """
+        :return: The maximum number of trajectories kept.
+        :rtype: int
+        """
+        return self._trajectories.maxlen  # pyre-ignore
+
+
+class MemmapTrajectorySink(TrajectorySink):
+    """Append-only on-disk sink, storing steps in chunked memory-mapped numpy files.
+
+    States and actions must be convertible to numpy arrays of a fixed shape and dtype,
+    inferred from the first stored trajectory. Steps of all trajectories are stored
+    contiguously in chunk files of chunk_size steps each, and an index file records
+    each trajectory's battle tag, outcome, first step and length. Only the chunks
+    being written to or read from are mapped in memory.
+
+    A sink created on a directory that already holds trajectories appends to them.
+    Trajectories whose writing was interrupted are discarded.
+    Trajectories are read back one at a time, as regular numpy arrays.
+    """
+
+    _INDEX_FILE = "trajectories.jsonl"
+    _METADATA_FILE = "metadata.json"
+
+    def __init__(self, directory: str, chunk_size: int = 65536):
+        """
+        :param directory: The directory trajectories are stored in. It is created if
+            it does not exist.
+        :type directory: str
+        :param chunk_size: The number of steps per chunk file. Defaults to 65536.
+        :type chunk_size: int
+        """
+        self._directory = directory
+        self._chunk_size = chunk_size
+        self._fields: Optional[Dict[str, Any]] = None
+        self._index: List[Dict[str, Any]] = []
+        self._n_steps = 0
+
+        self._write_chunk_id: Optional[int] = None
+        self._write_chunks: Dict[str, np.ndarray] = {}
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _chunk_path(self, field: str, chunk_id: int) -> str:
+        return os.path.join(self._directory, "%s_%06d.npy" % (field, chunk_id))
+
+    def _load(self) -> None:
+        metadata_path = os.path.join(self._directory, self._METADATA_FILE)
+        if not os.path.exists(metadata_path):
+            return
+
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+        self._chunk_size = metadata["chunk_size"]
+        self._fields = {
+            field: (tuple(shape), dtype)
+            for field, (shape, dtype) in metadata["fields"].items()
+        }
+
+        # Trajectories are indexed once their steps are written: steps of a
+        # trajectory whose writing was interrupted are not indexed, and overwritten
+        index_path = os.path.join(self._directory, self._INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+
+        with open(index_path) as f:
+            lines = [line for line in f if line.strip()]
+        self._index = [json.loads(line) for line in lines if line.endswith("\n")]
+        if len(self._index) < len(lines):
+            # The last entry was only partly written
+            with open(index_path, "w") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in self._index)
+        if self._index:
+            self._n_steps = self._index[-1]["start"] + self._index[-1]["length"]
+
+    def _open_write_chunk(self, chunk_id: int) -> None:
+        for chunk in self._write_chunks.values():
+            chunk.flush()
+
+        self._write_chunks = {}
+        for field, (shape, dtype) in self._fields.items():  # pyre-ignore
+            path = self._chunk_path(field, chunk_id)
+            if os.path.exists(path):
+                self._write_chunks[field] = np.load(path, mmap_mode="r+")
+            else:
+                self._write_chunks[field] = np.lib.format.open_memmap(
+                    path, mode="w+", dtype=dtype, shape=(self._chunk_size, *shape)
+                )
+        self._write_chunk_id = chunk_id
+
+    def _read_steps(self, start: int, length: int) -> Dict[str, np.ndarray]:
+        parts: Dict[str, List[np.ndarray]] = {field: [] for field in self._fields}
+        chunks: Dict[str, np.ndarray] = {}
+        chunk_id = None
+        step = start
+        while step < start + length:
+            if step // self._chunk_size != chunk_id:
+                chunk_id = step // self._chunk_size
+                chunks = {
+                    field: np.load(self._chunk_path(field, chunk_id), mmap_mode="r")
+                    for field in self._fields  # pyre-ignore
+                }
+            offset = step - chunk_id * self._chunk_size
+            n = min(self._chunk_size - offset, start + length - step)
+            for field, chunk in chunks.items():
+                parts[field].append(np.array(chunk[offset : offset + n]))
+            step += n
+        return {
+            field: np.concatenate(field_parts) for field, field_parts in parts.items()
+        }
+
+    def _write_metadata(self, states: np.ndarray, actions: np.ndarray) -> None:
+        self._fields = {
+            "states": (states.shape[1:], states.dtype.str),
+            "actions": (actions.shape[1:], actions.dtype.str),
+        }
+        with open(os.path.join(self._directory, self._METADATA_FILE), "w") as f:
+            json.dump({"chunk_size": self._chunk_size, "fields": self._fields}, f)
+
+    def add(self, trajectory: Trajectory) -> None:
+        """Appends a trajectory to the sink's files.
+
+        :param trajectory: The trajectory to store. It must contain at least one step.
+        :type trajectory: Trajectory
+        """
+        if not len(trajectory.states):
+            raise ValueError("Stored trajectories must contain at least one step.")
+
+        steps = {
+            "states": np.asarray(trajectory.states),
+            "actions": np.asarray(trajectory.actions),
+        }
+        if self._fields is None:
+            self._write_metadata(steps["states"], steps["actions"])
+
+        length = len(steps["states"])
+        written = 0
+        while written < length:
+            step = self._n_steps + written
+            chunk_id = step // self._chunk_size
+            if chunk_id != self._write_chunk_id:
+                self._open_write_chunk(chunk_id)
+            offset = step - chunk_id * self._chunk_size
+            n = min(self._chunk_size - offset, length - written)
+            for field, chunk in self._write_chunks.items():
+                chunk[offset : offset + n] = steps[field][written : written + n]
+            written += n
+
+        for chunk in self._write_chunks.values():
+            chunk.flush()
+
+        entry = {
+            "battle_tag": trajectory.battle_tag,
+            "won": trajectory.won,
+            "start": self._n_steps,
+            "length": length,
+        }
+        with open(os.path.join(self._directory, self._INDEX_FILE), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._index.append(entry)
+        self._n_steps += length
+
+    def clear(self) -> None:
+        self._write_chunks = {}
+        self._write_chunk_id = None
+        for file_name in os.listdir(self._directory):
+            if file_name.endswith(".npy") or file_name in (
+                self._INDEX_FILE,
+                self._METADATA_FILE,
+            ):
+                os.remove(os.path.join(self._directory, file_name))
+        self._fields = None
+        self._index = []
+        self._n_steps = 0
+
+    def iter_trajectories(self) -> Iterator[Trajectory]:
+        for entry in list(self._index):
+            steps = self._read_steps(entry["start"], entry["length"])
+            yield Trajectory(
+                entry["battle_tag"], entry["won"], steps["states"], steps["actions"]
+            )
+
+    @property
+    def directory(self) -> str:
+        """
+        :return: The directory trajectories are stored in.
+        :rtype: str
+        """
+        return self._directory
+
+    @property
+    def n_steps(self) -> int:
+        """
+        :return: The total number of stored steps.
+        :rtype: int
+        """
+        return self._n_steps
@@ -9,6 +9,7 @@ from poke_env.utils import to_id_str
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Set
 from typing import Tuple
 
 import asyncio
@@ -21,29 +22,111 @@ _EVALUATION_RATINGS = {
 }
 
 
+def _round_robin_pairs(n_players: int) -> List[Tuple[int, int]]:
+    """Orders all pairs of players in rounds where no player appears twice, using the
+    circle method.
+
+    :param n_players: The number of players.
+    :type n_players: int
+    :return: The pairs of player indices, round by round.
+    :rtype: list of tuples of int
+    """
+    indices: List[Optional[int]] = list(range(n_players))
+    if n_players % 2:
+        indices.append(None)
+
+    pairs = []
+    for _ in range(len(indices) - 1):
+        half = len(indices) // 2
+        for i, j in zip(indices[:half], reversed(indices[half:])):
+            if i is not None and j is not None:
+                pairs.append((min(i, j), max(i, j)))
+        indices = [indices[0], indices[-1]] + indices[1:-1]
+    return pairs
+
+
 async def cross_evaluate(
-    players: List[Player], n_challenges: int
+    players: List[Player], n_challenges: int, max_concurrent_pairs: int = 1
 ) -> Dict[str, Dict[str, Optional[float]]]:
+    """Makes every player play n_challenges battles against every other player.
+
+    By default, pairs of players play one after the other, and battles are reset
+    between pairs. If max_concurrent_pairs is not 1, pairs whose players are both idle
+    play concurrently, and each player keeps its battles: per-pair results are
+    computed from the battles played during that pair. A player only takes part in one
+    pair at a time, as challenges are accepted from a single queue. Within a pair, the
+    number of concurrent battles is limited by each player's max_concurrent_battles.
+
+    :param players: The players to evaluate.
+    :type players: list of Player
+    :param n_challenges: Number of battles played by each pair of players.
+    :type n_challenges: int
+    :param max_concurrent_pairs: Maximum number of pairs playing at the same time. If
+        0, no limit will be applied. Defaults to 1.
+    :type max_concurrent_pairs: int
+    :return: The win rate of each player against each other player, indexed by
+        username. Diagonal entries are None.
+    :rtype: Dict[str, Dict[str, Optional[float]]]
+    """
     results = {p_1.username: {p_2.username: None for p_2 in players} for p_1 in players}
-    for i, p_1 in enumerate(players):
-        for j, p_2 in enumerate(players):
-            if j <= i:
+
+    if max_concurrent_pairs == 1:
+        for i, p_1 in enumerate(players):
+            for j, p_2 in enumerate(players):
+                if j <= i:
+                    continue
+                await asyncio.gather(
+                    p_1.send_challenges(
+                        opponent=to_id_str(p_2.username),
+                        n_challenges=n_challenges,
+                        to_wait=p_2.logged_in,
+                    ),
+                    p_2.accept_challenges(
+                        opponent=to_id_str(p_1.username), n_challenges=n_challenges
+                    ),
+                )
+                results[p_1.username][p_2.username] = p_1.win_rate  # pyre-ignore
+                results[p_2.username][p_1.username] = p_2.win_rate  # pyre-ignore
+
+                p_1.reset_battles()
+                p_2.reset_battles()
+        return results  # pyre-ignore
+
+    async def play_pair(p_1: Player, p_2: Player) -> None:
+        previous_battles = set(p_1.battles)
+        await p_1.battle_against(p_2, n_challenges)
+
+        battles = [
+            battle
+            for battle_tag, battle in p_1.battles.items()
+            if battle_tag not in previous_battles and battle.finished
+        ]
+        if battles:
+            n_won = len([None for battle in battles if battle.won])
+            n_lost = len([None for battle in battles if battle.lost])
+            results[p_1.username][p_2.username] = n_won / len(battles)  # pyre-ignore
+            results[p_2.username][p_1.username] = n_lost / len(battles)  # pyre-ignore
+
+    pending_pairs = _round_robin_pairs(len(players))
+    busy_players: Set[int] = set()
+    running_pairs: Dict[asyncio.Future, Tuple[int, int]] = {}
+
+    while pending_pairs or running_pairs:
+        for i, j in list(pending_pairs):
+            if max_concurrent_pairs and len(running_pairs) >= max_concurrent_pairs:
+                break
+            if i in busy_players or j in busy_players:
                 continue
-            await asyncio.gather(
-                p_1.send_challenges(
-                    opponent=to_id_str(p_2.username),
-                    n_challenges=n_challenges,
-                    to_wait=p_2.logged_in,
-                ),
-                p_2.accept_challenges(
-                    opponent=to_id_str(p_1.username), n_challenges=n_challenges
-                ),
-            )
-            results[p_1.username][p_2.username] = p_1.win_rate  # pyre-ignore
-            results[p_2.username][p_1.username] = p_2.win_rate  # pyre-ignore
+            pending_pairs.remove((i, j))
+            busy_players.update((i, j))
+            task = asyncio.ensure_future(play_pair(players[i], players[j]))
+            running_pairs[task] = (i, j)
+
+        done, _ = await asyncio.wait(running_pairs, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            busy_players.difference_update(running_pairs.pop(task))
+            task.result()
 
-            p_1.reset_battles()
-            p_2.reset_battles()
     return results  # pyre-ignore
 
 
@@ -92,8 +175,79 @@ def _estimate_strength_from_results(
     return estimate, (lower_bound, higher_bound)
 
 
+def _relative_interval_width(opponent: Player) -> Optional[float]:
+    """Returns the width of the 95% confidence interval of the strength of the player
+    evaluated against opponent, relative to the estimated strength.
+
+    :param opponent: The evaluation opponent.
+    :type opponent: Player
+    :return: The relative width, or None if results are too extreme to be
+        interpreted.
+    :rtype: float, optional
+    """
+    if not opponent.n_finished_battles:
+        return None
+    try:
+        estimate, (lower_bound, higher_bound) = _estimate_strength_from_results(
+            opponent.n_finished_battles,
+            opponent.n_lost_battles,
+            _EVALUATION_RATINGS[type(opponent)],
+        )
+    except ValueError:
+        return None
+    return (higher_bound - lower_bound) / estimate
+
+
+def _normal_quantile(probability: float) -> float:
+    """Returns the quantile of the standard normal distribution, found by bisection
+    on its cumulative distribution function.
+
+    :param probability: The quantile's probability, strictly between 0 and 1.
+    :type probability: float
+    :return: The quantile.
+    :rtype: float
+    """
+    lower_bound, higher_bound = -40.0, 40.0
+    for _ in range(100):
+        middle = (lower_bound + higher_bound) / 2
+        if (1 + math.erf(middle / math.sqrt(2))) / 2 < probability:
+            lower_bound = middle
+        else:
+            higher_bound = middle
+    return (lower_bound + higher_bound) / 2
+
+
+def _wilson_interval(
+    number_of_games: int, number_of_wins: int, z: float = 1.96
+) -> Tuple[float, float]:
+    """Returns the Wilson score interval of a win rate. Unlike the normal
+    approximation, it remains meaningful for extreme results and few games.
+
+    :param number_of_games: Number of games played.
+    :type number_of_games: int
+    :param number_of_wins: Number of won games.
+    :type number_of_wins: int
+    :param z: Standard normal quantile of the interval's confidence level. Defaults
+        to 1.96, for a 95% interval.
+    :type z: float
+    :return: The interval's bounds.
+    :rtype: tuple of floats
+    """
+    if not number_of_games:
+        return 0.0, 1.0
+
+    n, p = number_of_games, number_of_wins / number_of_games
+    center = (p + z**2 / (2 * n)) / (1 + z**2 / n)
+    error = z * math.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / (1 + z**2 / n)
+    return center - error, center + error
+
+
 async def evaluate_player(
-    player, n_battles: int = 1000, n_placement_battles: int = 30
+    player,
+    n_battles: int = 1000,
+    n_placement_battles: int = 30,
+    target_interval_width: Optional[float] = None,
+    batch_size: int = 10,
 ) -> Tuple[float, Tuple[float, float]]:
     """Estimate player strength.
 
@@ -111,19 +265,38 @@ async def evaluate_player(
     the process, by playing a limited number of placement battles and choosing the
     opponent closest to the player in terms of performance.
 
+    If target_interval_width is set, the evaluation is sequential: battles are played
+    in batches of batch_size, and the evaluation stops as soon as the width of the
+    confidence interval, relative to the estimated strength, is at most
+    target_interval_width, or when n_battles battles have been played. Placement
+    against a baseline also stops as soon as a confidence interval of the baseline's
+    win rate excludes 0.5, ie. as soon as it is clearly too weak or too strong. As
+    this interval is checked after every batch, its 5% error rate is split over all
+    checks, so that an evenly matched baseline is discarded by chance with
+    probability at most 5%. Battles saved during placement are available for the
+    main evaluation. The returned confidence interval is nominal: it does not account
+    for the sequential stopping rule, and its actual coverage can be slightly below
+    95%.
+
     :param player: The player to evaluate.
     :type player: Player
     :param n_battles: The total number of battle to perform, including placement
         battles.
     :type n_battles: int
     :param n_placement_battles: Number of placement battles to perform per baseline
-        player.
+        player. In sequential evaluations, this is a maximum.
     :type n_placement_battles: int
+    :param target_interval_width: Target width of the confidence interval, relative
+        to the estimated strength. Defaults to None, always playing n_battles battles.
+    :type target_interval_width: float, optional
+    :param batch_size: Number of battles played between two checks of the stopping
+        criteria in sequential evaluations. Defaults to 10.
+    :type batch_size: int
     :raises: ValueError if the results are too extreme to be interpreted.
     :raises: AssertionError if the player is not configured to play gen8battles or the
         selected number of games to play it too small.
     :return: A tuple containing the estimated player strength and a 95% confidence
-        interval
+        interval, nominal in sequential evaluations
     :rtype: tuple of float and tuple of floats
     """
     # Input checks
@@ -152,7 +325,22 @@ async def evaluate_player(
     baselines = [p(max_concurrent_battles=n_battles) for p in _EVALUATION_RATINGS]
 
     for p in baselines:
-        await p.battle_against(player, n_placement_battles)
+        if target_interval_width is None:
+            await p.battle_against(player, n_placement_battles)
+            continue
+
+        # Bonferroni correction of the placement intervals, checked after every batch
+        n_placement_checks = math.ceil(n_placement_battles / batch_size)
+        placement_z = _normal_quantile(1 - 0.025 / n_placement_checks)
+        while p.n_finished_battles < n_placement_battles:
+            await p.battle_against(
+                player, min(batch_size, n_placement_battles - p.n_finished_battles)
+            )
+            lower_bound, higher_bound = _wilson_interval(
+                p.n_finished_battles, p.n_won_battles, placement_z
+            )
+            if higher_bound < 0.5 or lower_bound > 0.5:
+                break
 
     # Select the best opponent for evaluation
     best_opp = min(
@@ -160,8 +348,23 @@ async def evaluate_player(
     )
 
     # Performing the main evaluation
-    remaining_battles = n_battles - len(_EVALUATION_RATINGS) * n_placement_battles
-    await best_opp.battle_against(player, remaining_battles)
+    remaining_battles = n_battles - sum(p.n_finished_battles for p in baselines)
+    if target_interval_width is None:
+        await best_opp.battle_against(player, remaining_battles)
+    else:
+        while remaining_battles > 0:
+            width = _relative_interval_width(best_opp)
+            if width is not None and width <= target_interval_width:
+                break
+            n_batch_battles = min(batch_size, remaining_battles)
+            await best_opp.battle_against(player, n_batch_battles)
+            remaining_battles -= n_batch_battles
+
+        player.logger.info(
+            "Sequential evaluation stopped after %d battles out of %d.",
+            n_battles - remaining_battles,
+            n_battles,
+        )
 
     return _estimate_strength_from_results(
         best_opp.n_finished_battles,
@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+"""This module defines a vectorized player environment, running several battles on a
+single connection.
+"""
+
+import asyncio
+import numpy as np  # pyre-ignore
+import sys
+
+from abc import ABC
+from asyncio import Future
+from asyncio import Queue
+from threading import Thread
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from poke_env.environment.abstract_battle import AbstractBattle
+from poke_env.player.battle_order import BattleOrder
+from poke_env.player.battle_order import ForfeitBattleOrder
+from poke_env.player.env_player import EnvPlayer
+from poke_env.player.env_player import (
+    Gen4EnvSinglePlayer,
+    Gen5EnvSinglePlayer,
+    Gen6EnvSinglePlayer,
+    Gen7EnvSinglePlayer,
+    Gen8EnvSinglePlayer,
+)
+from poke_env.player.league import League
+from poke_env.player.player import Player
+from poke_env.player.reward_engine import RewardEngine
+from poke_env.player_configuration import PlayerConfiguration
+from poke_env.server_configuration import ServerConfiguration
+from poke_env.teambuilder.teambuilder import Teambuilder
+from poke_env.utils import to_id_str
+
+
+class VecEnvPlayer(EnvPlayer, ABC):  # pyre-ignore
+    """Player exposing a vectorized environment API over n_envs concurrent battles.
+
+    Each environment index corresponds to a battle slot. step takes one action per
+    slot and returns stacked observations, rewards and dones, as well as one info
+    dict per slot. When the battle of a slot finishes, the slot is automatically
+    assigned the next battle: the returned observation is the new battle's first
+    observation, and the last observation of the finished battle is stored in the
+    slot's info dict under the "terminal_observation" key.
+
+    Action conversion is inherited from the single battle environment classes, for
+    instance with ``class MyPlayer(VecEnvPlayer, Gen8EnvSinglePlayer)``. Recommended
+    use is with play_against.
+    """
+
+    def __init__(
+        self,
+        n_envs: int,
+        player_configuration: Optional[PlayerConfiguration] = None,
+        *,
+        avatar: Optional[int] = None,
+        battle_format: Optional[str] = None,
+        log_level: Optional[int] = None,
+        server_configuration: Optional[ServerConfiguration] = None,
+        start_listening: bool = True,
+        start_timer_on_battle_start: bool = False,
+        team: Optional[Union[str, Teambuilder]] = None,
+    ):
+        """
+        :param n_envs: Number of battles played concurrently.
+        :type n_envs: int
+        :param player_configuration: Player configuration. If empty, defaults to an
+            automatically generated username with no password. This option must be set
+            if the server configuration requires authentication.
+        :type player_configuration: PlayerConfiguration, optional
+        :param avatar: Player avatar id. Optional.
+        :type avatar: int, optional
+        :param battle_format: Name of the battle format this player plays. Defaults to
+            the default format of the environment class.
+        :type battle_format: str, optional
+        :param log_level: The player's logger level.
+        :type log_level: int. Defaults to logging's default level.
+        :param server_configuration: Server configuration. Defaults to Localhost Server
+            Configuration.
+        :type server_configuration: ServerConfiguration, optional
+        :param start_listening: Whether to start listening to the server. Defaults to
+            True.
+        :type start_listening: bool
+        :param start_timer_on_battle_start: Whether to automatically start the battle
+            timer on battle start. Defaults to False.
+        :type start_timer_on_battle_start: bool
+        :param team: The team to use for formats requiring a team. Can be a showdown
+            team string, a showdown packed team string, of a ShowdownTeam object.
+            Defaults to None.
+        :type team: str or Teambuilder, optional
+        """
+        # EnvPlayer's initialization is skipped as it restricts the player to a single
+        # battle
+        Player.__init__(
+            self,
+            player_configuration=player_configuration,
+            avatar=avatar,
+            battle_format=battle_format
+            if battle_format is not None
+            else self._DEFAULT_BATTLE_FORMAT,
+            log_level=log_level,
+            max_concurrent_battles=n_envs,
+            server_configuration=server_configuration,
+            start_listening=start_listening,
+            start_timer_on_battle_start=start_timer_on_battle_start,
+            team=team,
+        )
+        self._n_envs: int = n_envs
+        self._env_battles: List[Optional[AbstractBattle]] = [None] * n_envs
+
+        self._action_futures: Dict[AbstractBattle, Future] = {}
+        self._action_masks: Dict[AbstractBattle, np.ndarray] = {}
+        self._battle_slots: Dict[AbstractBattle, Optional[int]] = {}
+        self._new_battles: Queue = Queue()
+        self._ready_futures: Dict[AbstractBattle, Future] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reward_engine = RewardEngine()
+        self._start_new_battle = False
+
+    def _battle_finished_callback(self, battle: AbstractBattle) -> None:
+        self._action_masks.pop(battle, None)
+        if battle in self._battle_slots:
+            self._set_ready(battle)
+
+        action_future = self._action_futures.pop(battle, None)
+        if action_future is not None and not action_future.done():
+            action_future.set_result(self.choose_default_move())
+
+    async def _assign_new_battle(self, env_index: int) -> Any:
+        try:
+            battle = await asyncio.wait_for(self._new_battles.get(), self.RESET_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise EnvironmentError("User %s has no active battle." % self.username)
+
+        previous_battle = self._env_battles[env_index]
+        if previous_battle is not None:
+            self._battle_slots.pop(previous_battle, None)
+
+        self._env_battles[env_index] = battle
+        self._battle_slots[battle] = env_index
+        await self._wait_until_ready(battle)
+        return self.embed_battle(battle)
+
+    def _ready_future(self, battle: AbstractBattle) -> Future:
+        if battle not in self._ready_futures:
+            self._ready_futures[battle] = asyncio.get_event_loop().create_future()
+        return self._ready_futures[battle]
+
+    def _set_ready(self, battle: AbstractBattle) -> None:
+        ready = self._ready_future(battle)
+        if not ready.done():
+            ready.set_result(None)
+
+    async def _stop_new_battles(self) -> None:
+        self._start_new_battle = False
+
+        # Battles that did not get a slot yet are finished randomly
+        while not self._new_battles.empty():
+            battle = self._new_battles.get_nowait()
+            self._battle_slots.pop(battle, None)
+            self._ready_futures.pop(battle, None)
+            action_future = self._action_futures.pop(battle, None)
+            if action_future is not None and not action_future.done():
+                action_future.set_result(self.choose_random_move(battle))
+
+    async def _wait_until_ready(self, battle: AbstractBattle) -> None:
+        if not battle.finished:
+            await self._ready_future(battle)
+        self._ready_futures.pop(battle, None)
+
+    async def async_forfeit(self, env_index: int) -> Any:
+        """Forfeits the unfinished battle of a slot.
+
+        The slot is assigned a new battle by the next call to async_reset or
+        async_step.
+
+        :param env_index: The slot's index.
+        :type env_index: int
+        :raises: RuntimeError if async_reset has not been called yet.
+        :return: The last observation of the forfeited battle.
+        :rtype: Any
+        """
+        battle = self._env_battles[env_index]
+        if battle is None:
+            raise RuntimeError("async_reset must be called before async_forfeit.")
+        action_future = self._action_futures.pop(battle, None)
+        if action_future is not None and not action_future.done():
+            action_future.set_result(ForfeitBattleOrder())
+        await self._wait_until_ready(battle)  # pyre-ignore
+        return self.embed_battle(battle)
+
+    async def async_reset(self) -> np.ndarray:
+        """Assigns a new battle to each slot without an unfinished battle.
+
+        Unfinished battles are kept, and their current observation is returned.
+
+        :raises: EnvironmentError if a slot's new battle does not start within
+            RESET_TIMEOUT seconds.
+        :return: The stacked observations of all slots.
+        :rtype: np.ndarray
+        """
+        observations = []
+        for i, battle in enumerate(self._env_battles):
+            if battle is None or battle.finished:
+                observations.append(await self._assign_new_battle(i))
+            else:
+                observations.append(self.embed_battle(battle))
+        return np.stack(observations)
+
+    async def async_step(
+        self, actions: List[int]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        """Performs one action in each slot's battle.
+
+        :param actions: One action per slot. Actions of slots whose battle is finished
+            are ignored.
+        :type actions: list of int
+        :raises: RuntimeError if async_reset has not been called yet, or
+            EnvironmentError if a slot's new battle does not start within
+            RESET_TIMEOUT seconds.
+        :return: A tuple containing the stacked observations, rewards and dones, as
+            well as one info dict per slot. Info dicts contain the slot's action mask
+            under the "action_mask" key.
+        :rtype: tuple
+        """
+        if any(battle is None for battle in self._env_battles):
+            raise RuntimeError("async_reset must be called before async_step.")
+
+        for battle, action in zip(self._env_battles, actions):
+            action_future = self._action_futures.pop(battle, None)
+            if action_future is not None and not action_future.done():
+                action_future.set_result(action)
+
+        observations, rewards, dones, infos = [], [], [], []
+        for i, battle in enumerate(self._env_battles):
+            await self._wait_until_ready(battle)  # pyre-ignore
+
+            observation = self.embed_battle(battle)
+            info = {}
+            if battle.finished:  # pyre-ignore
+                info["terminal_observation"] = observation
+                if self._start_new_battle:
+                    observation = await self._assign_new_battle(i)
+
+            info["action_mask"] = self.get_action_mask(self._env_battles[i])
+            observations.append(observation)
+            rewards.append(self.compute_reward(battle))  # pyre-ignore
+            dones.append(battle.finished)  # pyre-ignore
+            infos.append(info)
+
+        return (
+            np.stack(observations),
+            np.array(rewards, dtype=np.float32),
+            np.array(dones, dtype=bool),
+            infos,
+        )
+
+    async def choose_move(self, battle: AbstractBattle) -> BattleOrder:
+        if battle not in self._battle_slots:
+            if not self._start_new_battle:
+                return self.choose_random_move(battle)
+            self._battle_slots[battle] = None
+            self._new_battles.put_nowait(battle)
+
+        action_future = asyncio.get_event_loop().create_future()
+        self._action_futures[battle] = action_future
+        self._action_masks[battle] = self._action_mask(battle)
+        self._set_ready(battle)
+
+        action = await action_future
+        if isinstance(action, BattleOrder):
+            return action
+        return self._action_to_move(action, battle)
+
+    def complete_current_battle(self) -> None:
+        """Stops starting new battles, and completes running battles by performing
+        random moves."""
+        self._run(self._stop_new_battles())
+        while not all(
+            battle is None or battle.finished for battle in self._env_battles
+        ):
+            self.step([np.random.choice(self._ACTION_SPACE) for _ in self._env_battles])
+
+    def render(self, mode="human") -> None:
+        """A one line rendering of the turn of each slot's battle."""
+        print(
+            " | ".join(
+                "%4s" % ("-" if battle is None else battle.turn)
+                for battle in self._env_battles
+            ),
+            end="\r",
+        )
+
+    def reset(self) -> np.ndarray:
+        """Assigns a new battle to each slot without an unfinished battle.
+
+        Unfinished battles are kept, and their current observation is returned.
+
+        :return: The stacked observations of all slots.
+        :rtype: np.ndarray
+        """
+        return self._run(self.async_reset())
+
+    def step(
+        self, actions: List[int]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        """Performs one action in each slot's battle.
+
+        :param actions: One action per slot. Actions of slots whose battle is finished
+            are ignored.
+        :type actions: list of int
+        :return: A tuple containing the stacked observations, rewards and dones, as
+            well as one info dict per slot.
+        :rtype: tuple
+        """
+        return self._run(self.async_step(actions))
+
+    async def _play_battles(self, opponent: Union[Player, League]) -> None:
+        if isinstance(opponent, League):
+            await opponent.play(should_stop=lambda: not self._start_new_battle)
+            return
+
+        accepting = asyncio.ensure_future(
+            opponent.accept_challenges(to_id_str(self.username), sys.maxsize)
+        )
+        await self._logged_in.wait()
+        await opponent.logged_in.wait()
+
+        while True:
+            await self._battle_scheduler.reserve()
+            if not self._start_new_battle:
+                self._battle_scheduler.cancel_reservation()
+                break
+            await self._request_battle(
+                lambda: self._challenge(to_id_str(opponent.username), self._format),
+                opponent.username,
+            )
+
+        await self._battle_scheduler.join()
+        accepting.cancel()
+
+    def play_against(
+        self,
+        env_algorithm: Callable,
+        opponent: Union[Player, League],
+        env_algorithm_kwargs=None,
+    ):
+        """Executes a function controlling the player while facing opponent.
+
+        The env_algorithm function is executed in a separate thread with the player
+        as first argument. Additional arguments can be passed to the env_algorithm
+        function with env_algorithm_kwargs.
+
+        Up to n_envs battles against opponent are played concurrently as long as
+        env_algorithm is running. When env_algorithm returns, running battles are
+        finished randomly. The opponent should be able to play n_envs battles
+        concurrently.
+
+        :param env_algorithm: A function that controls the player. It must accept the
+            player as first argument. Additional arguments can be passed with the
+            env_algorithm_kwargs argument.
+        :type env_algorithm: callable
+        :param opponent: A player against with the env player will player, or a
+            league whose pool the opponent of each battle is sampled from.
+        :type opponent: Player or League
+        :param env_algorithm_kwargs: Optional arguments to pass to the env_algorithm.
+            Defaults to None.
+        """
+        if env_algorithm_kwargs is None:
+            env_algorithm_kwargs = {}
+
+        def env_algorithm_wrapper():
+            try:
+                env_algorithm(self, **env_algorithm_kwargs)
+            finally:
+                self.complete_current_battle()
+
+        self._loop = asyncio.get_event_loop()
+        self._start_new_battle = True
+
+        thread = Thread(target=env_algorithm_wrapper)
+        thread.start()
+        self._loop.run_until_complete(self._play_battles(opponent))
+        thread.join()
+        self._loop = None
+
+    @property
+    def action_masks(self) -> np.ndarray:
+        """The stacked action masks of all slots' current battles. Slots without a
+        battle awaiting an order have no legal action."""
+        return np.stack([self.get_action_mask(b) for b in self._env_battles])
+
+    @property
+    def n_envs(self) -> int:
+        return self._n_envs
+
+
+class Gen4VecEnvSinglePlayer(VecEnvPlayer, Gen4EnvSinglePlayer):  # pyre-ignore
+    pass
+
+
+class Gen5VecEnvSinglePlayer(VecEnvPlayer, Gen5EnvSinglePlayer):  # pyre-ignore
+    pass
+
+
+class Gen6VecEnvSinglePlayer(VecEnvPlayer, Gen6EnvSinglePlayer):  # pyre-ignore
+    pass
+
+
+class Gen7VecEnvSinglePlayer(VecEnvPlayer, Gen7EnvSinglePlayer):  # pyre-ignore
+    pass
+
+
+class Gen8VecEnvSinglePlayer(VecEnvPlayer, Gen8EnvSinglePlayer):  # pyre-ignore
+    pass
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from unittest.mock import MagicMock
+
+from poke_env.environment.battle import Battle
+from poke_env.environment.damage_calculator import DamageCalculator, DamageRange
+from poke_env.environment.move import Move
+from poke_env.environment.pokemon import Pokemon
+from poke_env.environment.side_condition import SideCondition
+from poke_env.environment.status import Status
+from poke_env.environment.weather import Weather
+
+
+def test_estimate_stat():
+    calculator = DamageCalculator()
+    blissey = Pokemon(species="blissey")
+    assert calculator.estimate_stat(blissey, "hp") == 672
+    assert calculator.estimate_stat(blissey, "def") == 77
+    assert calculator.estimate_stat(Pokemon(species="shedinja"), "hp") == 1
+
+    blissey._last_request = {"stats": {"atk": 10, "def": 100}}
+    blissey._max_hp = 600
+    assert calculator.estimate_stat(blissey, "def") == 100
+    assert calculator.estimate_stat(blissey, "hp") == 600
+
+
+def test_damage():
+    calculator = DamageCalculator()
+    garchomp = Pokemon(species="garchomp")
+    blissey = Pokemon(species="blissey")
+
+    # floor(floor(42 * 100 * 317 / 77) / 50) + 2 = 347, times rolls and stab
+    earthquake = Move("earthquake")
+    assert calculator.calculate(garchomp, blissey, earthquake) == (441, 520, 480.5)
+
+    garchomp._boost("atk", 2)
+    boosted = calculator.calculate(garchomp, blissey, earthquake)
+    assert boosted.min > 2 * 441 - 10
+
+    garchomp._boost("atk", -2)
+    garchomp.status = Status.BRN
+    burnt = calculator.calculate(garchomp, blissey, earthquake)
+    assert burnt.max == pytest.approx(520 / 2, abs=1)
+
+    assert calculator.calculate(garchomp, blissey, Move("swordsdance")) == (0, 0, 0)
+    assert calculator.calculate(garchomp, blissey, Move("seismictoss")) == (
+        100,
+        100,
+        100,
+    )
+    assert calculator.calculate(
+        garchomp, Pokemon(species="gengar"), Move("seismictoss")
+    ) == (0, 0, 0)
+
+    # Multi-hit moves hit 2 to 5 times
+    multi_hit = calculator.calculate(garchomp, blissey, Move("scaleshot"))
+    assert multi_hit.max / multi_hit.min == pytest.approx(5 / 2 * 100 / 85, rel=0.05)
+
+
+def test_immunities_and_abilities():
+    calculator = DamageCalculator()
+    garchomp = Pokemon(species="garchomp")
+    rotom = Pokemon(species="rotomwash")
+    earthquake = Move("earthquake")
+
+    assert calculator.calculate(garchomp, Pokemon(species="skarmory"), earthquake) == (
+        0,
+        0,
+        0,
+    )
+    assert calculator.calculate(garchomp, rotom, earthquake) == (0, 0, 0)
+
+    garchomp.ability = "Mold Breaker"
+    assert calculator.calculate(garchomp, rotom, earthquake).min > 0
+
+    dragonite = Pokemon(species="dragonite")
+    dragonite.ability = "multiscale"
+    dragonite._set_hp("100/100")
+    ignored = calculator.calculate(garchomp, dragonite, Move("dragonclaw"))
+    garchomp.ability = "roughskin"
+    full_hp = calculator.calculate(garchomp, dragonite, Move("dragonclaw"))
+    assert full_hp.max == pytest.approx(ignored.max / 2, abs=2)
+    dragonite._set_hp("50/100")
+    assert calculator.calculate(garchomp, dragonite, Move("dragonclaw")) == ignored
+
+
+def test_battle_conditions():
+    calculator = DamageCalculator()
+    battle = Battle("tag", "username", MagicMock())
+    blastoise = Pokemon(species="blastoise")
+    heatran = Pokemon(species="heatran")
+    battle._team = {"p1: blastoise": blastoise}
+    battle._opponent_team = {"p2: heatran": heatran}
+
+    surf = Move("surf")
+    neutral = calculator.calculate(blastoise, heatran, surf, battle)
+
+    battle._weather = Weather.RAINDANCE
+    rain = calculator.calculate(blastoise, heatran, surf, battle)
+    assert rain.max == pytest.approx(1.5 * neutral.max, abs=2)
+
+    battle._parse_message(["", "-weather", "RainDance"])
+    assert calculator.calculate(blastoise, heatran, surf, battle) == rain
+
+    battle._weather = None
+    battle._opponent_side_conditions[SideCondition.LIGHT_SCREEN] = 1
+    screen = calculator.calculate(blastoise, heatran, surf, battle)
+    assert screen.max == pytest.approx(neutral.max / 2, abs=2)
+    assert calculator.calculate(heatran, blastoise, Move("flashcannon"), battle) == (
+        calculator.calculate(heatran, blastoise, Move("flashcannon"))
+    )
+
+
+def test_damage_matrix():
+    calculator = DamageCalculator()
+    attacker = Pokemon(species="garchomp")
+    moves = [Move(move) for move in ["earthquake", "dragonclaw", "swordsdance"]]
+    moves.append(Move("foulplay"))
+    defenders = [Pokemon(species=s) for s in ["blissey", "rotomwash", "skarmory"]]
+
+    damage = calculator.damage_matrix(attacker, moves, defenders)
+    assert isinstance(damage, DamageRange)
+    for values in damage:
+        assert values.shape == (4, 3)
+
+    for i, move in enumerate(moves):
+        for j, defender in enumerate(defenders):
+            assert calculator.calculate(attacker, defender, move) == tuple(
+                values[i, j] for values in damage
+            )
+    assert (damage.min <= damage.expected).all()
+    assert (damage.expected <= damage.max).all()
+
+    assert calculator.damage_matrix(attacker, [], defenders).min.shape == (0, 3)
+    assert np.all(calculator.damage_matrix(attacker, moves, []).max.shape == (4, 0))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import pickle
+import random
+
+from unittest.mock import MagicMock
+
+from poke_env.environment.battle import Battle
+from poke_env.environment.forward_model import ForwardModel
+from poke_env.environment.pokemon import Pokemon
+from poke_env.environment.status import Status
+
+
+def create_mon(species, moves, hp="100/100", active=False):
+    mon = Pokemon(species=species)
+    mon._set_hp(hp)
+    mon._active = active
+    for move in moves:
+        mon._add_move(move)
+    return mon
+
+
+def create_battle(opponents, n_opponents=None):
+    battle = Battle("tag", "username", MagicMock())
+    battle._player_role = "p1"
+    garchomp = create_mon(
+        "garchomp", ["earthquake", "toxic", "swordsdance"], active=True
+    )
+    blissey = create_mon("blissey", ["seismictoss", "softboiled"])
+    battle._team = {"p1: Garchomp": garchomp, "p1: Blissey": blissey}
+    battle._opponent_team = {"p2: %s" % mon.species: mon for mon in opponents}
+    battle._team_size = {"p1": 2, "p2": n_opponents or len(opponents)}
+    battle._available_moves = list(garchomp.moves.values())
+    battle._available_switches = [blissey]
+    return battle
+
+
+def test_forward_model_compilation():
+    heatran = create_mon("heatran", [], hp="50/100", active=True)
+    ferrothorn = create_mon("ferrothorn", ["powerwhip"])
+    model = ForwardModel(create_battle([heatran, ferrothorn], n_opponents=4))
+
+    assert model.n_unknown == 2
+    assert not model.root_forced
+    assert model.root_actions == [0, 1, 2, ForwardModel.SWITCH_OFFSET + 1]
+    assert [model.move_id(0, 0, action) for action in range(3)] == [
+        "earthquake",
+        "toxic",
+        "swordsdance",
+    ]
+    # Heatran's unknown moves are replaced by moves of its types
+    assert model.move_id(1, 0, 0) == "flareblitz"
+
+    state = model.root_state
+    assert state.active == [0, 0]
+    assert state.hp == [[1.0, 1.0], [0.5, 1.0]]
+    assert model.legal_actions(state, 1) == list(range(4)) + [
+        ForwardModel.SWITCH_OFFSET + 1
+    ]
+    # Unrevealed opponent pokemons count as healthy
+    assert model.value(state) == 0.5 + (2 - 3.5) / 8
+
+    # Heatran and ferrothorn are both immune to toxic
+    assert model._moves[0][0][1].status_affects == (False, False)
+
+    # Models can be sent to other processes
+    copy = pickle.loads(pickle.dumps(model))
+    assert copy.root_actions == model.root_actions
+
+
+def test_forward_model_step():
+    heatran = create_mon("heatran", ["magmastorm"], hp="30/100", active=True)
+    ferrothorn = create_mon("ferrothorn", ["toxic"])
+    model = ForwardModel(create_battle([heatran, ferrothorn]))
+    rng = random.Random(0)
+
+    # Garchomp outspeeds and knocks heatran out before it moves
+    state = model.root_state
+    model.step(state, 0, 0, rng)
+    assert state.hp[1][0] == 0
+    assert state.hp[0] == [1.0, 1.0]
+    assert state.turn == 1
+    assert model.legal_actions(state, 0) == [None]
+    assert model.legal_actions(state, 1) == [ForwardModel.SWITCH_OFFSET + 1]
+
+    # Replacing a fainted pokemon does not take a turn
+    model.step(state, None, ForwardModel.SWITCH_OFFSET + 1, rng)
+    assert state.active == [0, 1] and state.turn == 1
+
+    # Switches happen before moves, and poison damage at the end of turns
+    model.step(state, ForwardModel.SWITCH_OFFSET + 1, 0, rng)
+    assert state.active == [1, 1]
+    assert state.status == [[None, Status.TOX], [None, None]]
+    assert state.hp[0] == [1.0, 15 / 16]
+
+    model.step(state, 1, 0, rng)
+    assert state.hp[0] == [1.0, 14 / 16]
+    assert state.status_turns[0][1] == 2
+
+    state.hp[1][1] = 0
+    assert model.is_terminal(state)
+    assert model.value(state) == 1.0
+
+
+def test_forward_model_forced_switch():
+    heatran = create_mon("heatran", ["magmastorm"], active=True)
+    battle = create_battle([heatran])
+    battle.active_pokemon._set_hp("0 fnt")
+    battle._available_moves = []
+    battle._force_switch = True
+
+    model = ForwardModel(battle)
+    assert model.root_forced
+    assert model.root_actions == [ForwardModel.SWITCH_OFFSET + 1]
+    assert model.legal_actions(model.root_state, 1) == [None]
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from poke_env.data import UNKNOWN_ITEM
+from poke_env.environment.pokemon import Pokemon
+from poke_env.environment.set_inference import SetInference, learnset
+
+USAGE_STATS = {
+    "info": {"metagame": "gen8ou"},
+    "data": {
+        "Garchomp": {
+            "Abilities": {"roughskin": 80.0, "sandveil": 20.0},
+            "Items": {"choicescarf": 50.0, "assaultvest": 30.0, "nothing": 20.0},
+            "Moves": {
+                "earthquake": 100.0,
+                "outrage": 80.0,
+                "stoneedge": 60.0,
+                "swordsdance": 60.0,
+                "firefang": 40.0,
+                "flamethrower": 20.0,
+                "thunderbolt": 10.0,
+                "": 30.0,
+            },
+            "Spreads": {"Jolly:0/252/0/0/4/252": 75.0, "Adamant:0/252/0/0/4/252": 25.0},
+        }
+    },
+}
+
+
+def test_learnset():
+    garchomp = learnset("garchomp")
+    assert "earthquake" in garchomp and "swordsdance" in garchomp
+    assert "thunderbolt" not in garchomp
+    assert "aerialace" not in garchomp
+    assert "aerialace" in learnset("garchomp", 7)
+
+    # Formes learn their base forme's moves
+    assert {"hydropump", "thunderbolt"} <= learnset("rotomwash")
+    assert learnset("unknownspecies") == frozenset()
+
+
+def test_set_inference_priors():
+    inference = SetInference.from_usage_stats(USAGE_STATS)
+    assert inference.species == {"garchomp"}
+    garchomp = Pokemon(species="garchomp")
+    garchomp._item = UNKNOWN_ITEM
+
+    assert inference.abilities(garchomp) == pytest.approx(
+        {"roughskin": 0.8, "sandveil": 0.2}
+    )
+    assert inference.items(garchomp) == pytest.approx(
+        {"choicescarf": 0.5, "assaultvest": 0.3, "": 0.2}
+    )
+    assert inference.spreads(garchomp) == pytest.approx(
+        {"Jolly:0/252/0/0/4/252": 0.75, "Adamant:0/252/0/0/4/252": 0.25}
+    )
+
+    # Thunderbolt can not be learnt, and other moves fill the four move slots
+    moves = inference.moves(garchomp)
+    assert "thunderbolt" not in moves
+    assert moves["earthquake"] == 1
+    assert sum(moves.values()) == pytest.approx(4)
+    assert moves["outrage"] > moves["stoneedge"] == moves["swordsdance"]
+    assert moves["firefang"] > moves["flamethrower"] > 0
+
+
+def test_set_inference_revealed_information():
+    inference = SetInference.from_usage_stats(USAGE_STATS)
+    garchomp = Pokemon(species="garchomp")
+    garchomp._item = UNKNOWN_ITEM
+    prior = inference.infer(garchomp)
+    assert inference.infer(garchomp) is prior
+
+    garchomp._add_move("swordsdance")
+    garchomp._add_move("firefang")
+    garchomp.ability = "Rough Skin"
+    revealed = inference.infer(garchomp)
+    assert revealed is not prior
+    assert revealed.abilities == {"roughskin": 1.0}
+    assert revealed.moves["swordsdance"] == revealed.moves["firefang"] == 1
+    assert sum(revealed.moves.values()) == pytest.approx(4)
+
+    # Moves in every set stay certain, others share the remaining slot
+    assert revealed.moves["earthquake"] == pytest.approx(1)
+    assert revealed.moves["outrage"] > revealed.moves["stoneedge"]
+    assert revealed.moves["outrage"] < prior.moves["outrage"]
+
+    # Assault vest forbids status moves
+    assert revealed.items == pytest.approx({"choicescarf": 5 / 7, "": 2 / 7})
+
+    garchomp.item = "choicescarf"
+    assert inference.items(garchomp) == {"choicescarf": 1.0}
+    garchomp._end_item("choicescarf")
+    assert inference.items(garchomp) == {"": 1.0}
+
+    for move in ["earthquake", "outrage", "stoneedge"]:
+        garchomp._add_move(move)
+    assert inference.moves(garchomp) == {
+        move: 1.0
+        for move in ["swordsdance", "firefang", "earthquake", "outrage", "stoneedge"]
+    }
+
+
+def test_set_inference_without_priors():
+    inference = SetInference(gen=8)
+    rotom = Pokemon(species="rotomwash")
+    assert inference.abilities(rotom) == {"levitate": 1.0}
+    assert inference.items(rotom) == {}
+    assert inference.spreads(rotom) == {}
+
+    moves = inference.moves(rotom)
+    assert set(moves) == learnset("rotomwash")
+    assert sum(moves.values()) == pytest.approx(4)
+    assert len(set(moves.values())) == 1
+
+    ferrothorn = Pokemon(species="ferrothorn")
+    ferrothorn._ability = None
+    assert inference.abilities(ferrothorn) == {"ironbarbs": 0.5, "anticipation": 0.5}
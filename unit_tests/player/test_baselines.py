@@ -72,6 +72,26 @@ def test_simple_heuristics_player_estimate_matchup():
     )
 
 
+def test_simple_heuristics_player_memoized_matchups():
+    player = SimpleHeuristicsPlayer(start_listening=False)
+    dragapult = Pokemon(species="dragapult")
+    mamoswine = Pokemon(species="mamoswine")
+    matchups = {}
+
+    expected = player._estimate_matchup(dragapult, mamoswine)
+    assert player._estimate_matchup(dragapult, mamoswine, matchups) == expected
+    assert player._estimate_matchup(dragapult, mamoswine, matchups) == expected
+    assert player._estimate_matchup(mamoswine, dragapult, matchups) == -expected
+    assert len(matchups) == 2
+
+    # Hp changes are not served from the memoized matchups
+    mamoswine._set_hp("50/100")
+    assert player._estimate_matchup(
+        dragapult, mamoswine, matchups
+    ) == player._estimate_matchup(dragapult, mamoswine)
+    assert len(matchups) == 3
+
+
 def test_simple_heuristics_player_should_dynamax():
     PseudoBattle = namedtuple(
         "PseudoBattle",
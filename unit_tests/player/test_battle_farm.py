@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from unittest.mock import patch
+
+from poke_env.player.battle_farm import (
+    _instantiate_player,
+    _resolve_player_class,
+    _split_evenly,
+    _worker_username,
+    BattleFarm,
+    BattleRecord,
+    main,
+    PlayerSpec,
+)
+from poke_env.player.random_player import RandomPlayer
+
+
+def test_helpers():
+    assert _split_evenly(10, 4) == [3, 3, 2, 2]
+    assert _split_evenly(2, 3) == [1, 1, 0]
+
+    assert _worker_username("Player", 3) == "Player 3"
+    assert _worker_username("A very long player name", 12) == "A very long pla 12"
+
+    assert (
+        _resolve_player_class("poke_env.player.random_player.RandomPlayer")
+        is RandomPlayer
+    )
+    assert _resolve_player_class(RandomPlayer) is RandomPlayer
+
+
+def test_cross_evaluate_shards_and_aggregates():
+    players = [PlayerSpec("p%d" % i, RandomPlayer, {}) for i in range(3)]
+    farm = BattleFarm(n_workers=2)
+
+    def fake_map(jobs):
+        assert [job.worker_id for job in jobs] == [0, 1]
+        assert jobs[0].assignments == [(0, 1, 3), (0, 2, 3), (1, 2, 3)]
+        assert jobs[1].assignments == [(0, 1, 2), (0, 2, 2), (1, 2, 2)]
+        return [
+            [(i, j, BattleRecord(n, 0, 0)) for i, j, n in job.assignments]
+            for job in jobs
+        ]
+
+    with patch.object(farm, "_map", side_effect=fake_map):
+        results = farm.cross_evaluate(players, 5)
+
+    assert results == {
+        "p0": {"p0": None, "p1": 1, "p2": 1},
+        "p1": {"p0": 0, "p1": None, "p2": 1},
+        "p2": {"p0": 0, "p1": 0, "p2": None},
+    }
+
+
+def test_ladder_and_self_play():
+    farm = BattleFarm(n_workers=4)
+    spec = PlayerSpec("player", RandomPlayer, {})
+
+    def fake_map(jobs):
+        return [
+            [(i, j, BattleRecord(n, 1, 0)) for i, j, n in job.assignments]
+            for job in jobs
+        ]
+
+    with patch.object(farm, "_map", side_effect=fake_map) as map_:
+        assert farm.ladder(spec, 6) == BattleRecord(6, 4, 0)
+        assert farm.self_play(spec, 3) == BattleRecord(3, 3, 0)
+        assert [p.name for p in map_.call_args[0][0][0].players] == [
+            "player",
+            "player opp",
+        ]
+
+
+def test_duplicate_names():
+    farm = BattleFarm(n_workers=1)
+    spec = PlayerSpec("player", RandomPlayer, {})
+
+    with pytest.raises(ValueError):
+        farm.battle_against(spec, spec, 1)
+
+
+def test_colliding_usernames():
+    farm = BattleFarm(n_workers=2)
+    player = PlayerSpec("SimpleHeuristics A", RandomPlayer, {"start_listening": False})
+    opponent = player._replace(name="SimpleHeuristics B")
+
+    assert _instantiate_player(player, 0).username == "SimpleHeuristics 0"
+    assert _instantiate_player(opponent, 0).username == "SimpleHeuristics 0"
+
+    with patch.object(farm, "_map") as map_:
+        with pytest.raises(ValueError):
+            farm.battle_against(player, opponent, 2)
+        map_.assert_not_called()
+
+        opponent = player._replace(name="SimpleHeur B")
+        map_.return_value = [[(0, 1, BattleRecord(1, 0, 0))]] * 2
+        assert farm.battle_against(player, opponent, 2) == BattleRecord(2, 0, 0)
+        assert {
+            _instantiate_player(spec, job.worker_id).username
+            for job in map_.call_args[0][0]
+            for spec in job.players
+        } == {
+            "SimpleHeuristics 0",
+            "SimpleHeuristics 1",
+            "SimpleHeur B 0",
+            "SimpleHeur B 1",
+        }
+
+
+def test_cli(capsys):
+    with patch.object(
+        BattleFarm, "cross_evaluate", return_value={"a": {"a": None}}
+    ) as cross_evaluate:
+        main(
+            [
+                "cross-evaluate",
+                "poke_env.player.random_player.RandomPlayer",
+                "--n-battles",
+                "7",
+            ]
+        )
+    specs, n_battles = cross_evaluate.call_args[0]
+    assert n_battles == 7
+    assert specs[0].name == "RandomPlayer 0"
+    assert specs[0].kwargs["battle_format"] == "gen8randombattle"
+    assert "a" in capsys.readouterr().out
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import pytest
+
+from poke_env.player.battle_scheduler import BattleScheduler
+
+
+@pytest.mark.asyncio
+async def test_reserve_waits_for_free_slot():
+    scheduler = BattleScheduler(2)
+
+    await scheduler.reserve()
+    scheduler.battle_started("battle-1")
+    await scheduler.reserve()
+    assert scheduler.n_reserved_slots == 1
+    assert scheduler.n_running_battles == 1
+
+    waiting = asyncio.ensure_future(scheduler.reserve())
+    also_waiting = asyncio.ensure_future(scheduler.reserve())
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    scheduler.battle_started("battle-2")
+    scheduler.battle_finished("battle-1")
+    await asyncio.sleep(0)
+    assert waiting.done()
+    assert not also_waiting.done()
+
+    scheduler.cancel_reservation()
+    await asyncio.sleep(0)
+    assert also_waiting.done()
+    assert scheduler.n_reserved_slots == 1
+    assert scheduler.n_running_battles == 1
+
+
+@pytest.mark.asyncio
+async def test_unlimited_slots():
+    scheduler = BattleScheduler(0)
+
+    for i in range(10):
+        await scheduler.reserve()
+        scheduler.battle_started(f"battle-{i}")
+
+    assert scheduler.n_running_battles == 10
+    assert scheduler.utilization is None
+
+
+@pytest.mark.asyncio
+async def test_battle_starts_and_join():
+    scheduler = BattleScheduler(3)
+
+    await scheduler.join()
+
+    scheduler.battle_started("battle-1")
+    scheduler.battle_started("battle-1")
+    assert scheduler.n_running_battles == 1
+
+    joining = asyncio.ensure_future(scheduler.join())
+    await asyncio.sleep(0)
+    assert not joining.done()
+
+    scheduler.battle_finished("unknown-battle")
+    scheduler.battle_finished("battle-1")
+    await asyncio.sleep(0)
+    assert joining.done()
+
+
+@pytest.mark.asyncio
+async def test_utilization():
+    scheduler = BattleScheduler(2)
+    assert scheduler.average_concurrent_battles == 0
+
+    scheduler.battle_started("battle-1")
+    await asyncio.sleep(0.05)
+    scheduler.battle_finished("battle-1")
+
+    assert 0.4 < scheduler.utilization <= 0.5
+    assert 0.8 < scheduler.average_concurrent_battles <= 1
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from unittest.mock import MagicMock
+
+from poke_env.environment.double_battle import DoubleBattle
+from poke_env.player.battle_order import DefaultBattleOrder
+from poke_env.player.doubles_action_space import DoublesActionSpace
+from poke_env.player.env_player import Gen8EnvDoublePlayer
+from poke_env.player.random_player import RandomPlayer
+
+
+class CustomEnvDoublePlayer(Gen8EnvDoublePlayer):
+    def embed_battle(self, battle):
+        return None
+
+
+def create_battle(example_doubles_request):
+    battle = DoubleBattle("tag", "username", MagicMock())
+    battle._parse_request(example_doubles_request)
+    battle._switch("p2a: Tyranitar", "Tyranitar, L50, M", "48/48")
+    return battle
+
+
+def test_action_indexing():
+    space = DoublesActionSpace()
+    assert len(space) == DoublesActionSpace.SLOT_SIZE**2 == 87**2
+
+    slot_actions = {
+        space.move_action(move, target, gimmick)
+        for move in range(4)
+        for target in DoublesActionSpace.TARGETS
+        for gimmick in DoublesActionSpace.GIMMICKS
+    }
+    slot_actions.update(space.switch_action(switch) for switch in range(6))
+    assert slot_actions == set(range(1, DoublesActionSpace.SLOT_SIZE))
+
+    action = space.join_actions(3, 84)
+    assert space.split_action(action) == (3, 84)
+
+
+def test_action_mask_matches_enumerated_orders(example_doubles_request):
+    battle = create_battle(example_doubles_request)
+    space = DoublesActionSpace()
+
+    mask = space.action_mask(battle)
+    assert mask.shape == (DoublesActionSpace.SIZE,)
+    assert space.action_mask(battle) is mask
+
+    orders = {space.to_order(action, battle).message for action in np.flatnonzero(mask)}
+    enumerated_orders = {
+        order.message for order in RandomPlayer().get_all_doubles_moves(battle)
+    }
+    assert len(orders) == mask.sum()
+    # Dynamax moves targeting an ally are not legal
+    assert orders == {
+        order
+        for order in enumerated_orders
+        if not any("dynamax -" in slot_order for slot_order in order.split(", "))
+    }
+
+    first_dynamax = space.move_action(0, 1, "dynamax")
+    second_dynamax = space.move_action(1, -1, "dynamax")
+    assert not mask[space.join_actions(first_dynamax, second_dynamax)]
+    assert not mask[space.join_actions(space.PASS, second_dynamax)]
+
+
+def test_forced_switches(example_doubles_request):
+    battle = create_battle(example_doubles_request)
+    battle._force_switch = [False, True]
+    battle._rqid += 1
+    space = DoublesActionSpace()
+
+    legal_actions = space.legal_actions(battle)
+    assert [space.split_action(action) for action in legal_actions] == [
+        (space.PASS, space.switch_action(i))
+        for i in range(len(battle.available_switches[1]))
+    ]
+    order = space.to_order(legal_actions[0], battle)
+    assert order.message == "/choose switch zamazentacrowned, default"
+
+    battle._force_switch = [True, True]
+    battle._available_switches = [battle.available_switches[0][:1]] * 2
+    battle._rqid += 1
+    assert space.legal_actions(battle).tolist() == [0]
+    assert isinstance(space.to_order(0, battle), DefaultBattleOrder)
+
+
+def test_sample_and_env_player(example_doubles_request):
+    battle = create_battle(example_doubles_request)
+    space = DoublesActionSpace()
+    mask = space.action_mask(battle)
+
+    random_state = np.random.RandomState(0)
+    for _ in range(100):
+        assert mask[space.sample(battle, random_state)]
+
+    player = CustomEnvDoublePlayer(start_listening=False)
+    assert len(player.action_space) == DoublesActionSpace.SIZE
+    assert player._action_mask(battle).tolist() == mask.tolist()
+
+    action = int(np.flatnonzero(mask)[0])
+    assert (
+        player._action_to_move(action, battle).message
+        == space.to_order(action, battle).message
+    )
+    assert player._action_to_move(1, battle).message in {
+        space.to_order(action, battle).message for action in np.flatnonzero(mask)
+    }
+
+    # Masks cached for the pending request are not recomputed
+    player._action_masks[battle] = mask
+    player._action_mask = MagicMock()
+    assert (
+        player._action_to_move(action, battle).message
+        == space.to_order(action, battle).message
+    )
+    player._action_mask.assert_not_called()
@@ -1,4 +1,8 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import numpy as np
+import pytest
+
 from poke_env.environment.battle import Battle
 from poke_env.environment.move import Move
 from poke_env.environment.pokemon import Pokemon
@@ -14,7 +18,6 @@ from poke_env.player.env_player import (
 
 from poke_env.player_configuration import PlayerConfiguration
 from poke_env.server_configuration import ServerConfiguration
-from unittest.mock import patch
 
 
 player_configuration = PlayerConfiguration("username", "password")
@@ -43,8 +46,8 @@ def test_init():
     assert player
 
 
-@patch("poke_env.player.env_player.Queue.get", return_value=2)
-def test_choose_move(queue_get_mock):
+@pytest.mark.asyncio
+async def test_choose_move():
     player = CustomEnvPlayer(
         player_configuration=player_configuration,
         server_configuration=server_configuration,
@@ -54,11 +57,42 @@ def test_choose_move(queue_get_mock):
     battle = Battle("bat1", player.username, player.logger)
     battle._available_moves = {Move("flamethrower")}
 
-    assert player.choose_move(battle).message == "/choose move flamethrower"
+    order = asyncio.ensure_future(player.choose_move(battle))
+    assert await player.async_reset() is None
+    assert player._current_battle is battle
+
+    step = asyncio.ensure_future(player.async_step(2))
+    assert (await order).message == "/choose move flamethrower"
 
     battle._available_moves = {Pokemon(species="charizard")}
+    order = asyncio.ensure_future(player.choose_move(battle))
+    observation, reward, done, info = await step
+    assert (observation, reward, done) == (None, 0.0, False)
+    assert info["action_mask"].tolist() == [True] * 18
 
-    assert player.choose_move(battle).message == "/choose switch charizard"
+    step = asyncio.ensure_future(player.async_step(2))
+    assert (await order).message == "/choose switch charizard"
+
+    battle._won_by(player.username)
+    player._battle_finished(battle)
+    observation, reward, done, info = await step
+    assert (observation, reward, done) == (None, 1.0, True)
+    assert not info["action_mask"].any()
+
+
+@pytest.mark.asyncio
+async def test_reset_without_battles():
+    player = CustomEnvPlayer(
+        player_configuration=player_configuration,
+        server_configuration=server_configuration,
+        start_listening=False,
+    )
+    player.RESET_TIMEOUT = 0.01
+
+    with pytest.raises(EnvironmentError):
+        await player.async_reset()
+    with pytest.raises(EnvironmentError):
+        player.reset()
 
 
 def test_reward_computing_helper():
@@ -211,3 +245,57 @@ def test_action_space():
             len(CustomEnvClass().action_space)
             == 4 * sum([1, has_megas, has_z_moves, has_dynamax]) + 6
         )
+
+
+@pytest.mark.asyncio
+async def test_sync_api_from_another_thread():
+    player = CustomEnvPlayer(
+        player_configuration=player_configuration,
+        server_configuration=server_configuration,
+        start_listening=False,
+    )
+    player._loop = asyncio.get_event_loop()
+    battle = Battle("bat1", player.username, player.logger)
+    battle._available_moves = [Move("flamethrower")]
+
+    def agent():
+        player.reset()
+        return [player.step(0) for _ in range(3)]
+
+    transitions = player._loop.run_in_executor(None, agent)
+    for _ in range(3):
+        assert (await player.choose_move(battle)).message == (
+            "/choose move flamethrower"
+        )
+    battle._won_by(player.username)
+    player._battle_finished(battle)
+
+    assert [transition[:3] for transition in await transitions] == [
+        (None, 0.0, False),
+        (None, 0.0, False),
+        (None, 1.0, True),
+    ]
+
+
+def test_action_masks():
+    battle = Battle("bat1", "username", None)
+    battle._available_moves = [Move("flamethrower"), Move("earthquake")]
+    battle._available_switches = [Pokemon(species="charizard")]
+
+    def mask(player_class):
+        return np.flatnonzero(player_class._action_mask(player_class, battle)).tolist()
+
+    assert mask(Gen4EnvSinglePlayer) == [0, 1, 4]
+    assert mask(Gen5EnvSinglePlayer) == [0, 1, 4]
+    assert mask(Gen6EnvSinglePlayer) == [0, 1, 8]
+    assert mask(Gen7EnvSinglePlayer) == [0, 1, 12]
+    assert mask(Gen8EnvSinglePlayer) == [0, 1, 16]
+
+    battle._can_mega_evolve = True
+    battle._can_dynamax = True
+    assert mask(Gen6EnvSinglePlayer) == [0, 1, 4, 5, 8]
+    assert mask(Gen7EnvSinglePlayer) == [0, 1, 8, 9, 12]
+    assert mask(Gen8EnvSinglePlayer) == [0, 1, 8, 9, 12, 13, 16]
+
+    battle._force_switch = True
+    assert mask(Gen8EnvSinglePlayer) == [16]
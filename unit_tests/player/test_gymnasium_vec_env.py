@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import numpy as np
+import pytest
+
+from poke_env.environment.battle import Battle
+from poke_env.environment.move import Move
+from poke_env.player.battle_order import ForfeitBattleOrder
+from poke_env.player.vec_env_player import Gen8VecEnvSinglePlayer
+from poke_env.player_configuration import PlayerConfiguration
+from poke_env.server_configuration import ServerConfiguration
+
+gymnasium = pytest.importorskip("gymnasium", minversion="1.1")
+
+from poke_env.player.gymnasium_vec_env import GymnasiumVecEnv  # noqa: E402
+
+BATTLE_LENGTH = 3
+
+
+class ScriptedVecEnvPlayer(Gen8VecEnvSinglePlayer):
+    """Plays battles against a scripted opponent, without a server. Battles are won
+    after BATTLE_LENGTH turns, and lost when forfeited."""
+
+    def embed_battle(self, battle):
+        return np.array([battle.turn], dtype=np.float32)
+
+    def compute_reward(self, battle):
+        return 1.0 if battle.won else -1.0 if battle.lost else 0.0
+
+    async def _play_battle(self, battle):
+        while True:
+            order = await self.choose_move(battle)
+            if isinstance(order, ForfeitBattleOrder):
+                battle._won_by("opponent")
+                break
+            battle.end_turn(battle.turn + 1)
+            if battle.turn >= BATTLE_LENGTH:
+                battle._won_by(self.username)
+                break
+        self._battle_finished(battle)
+
+    async def _play_battles(self, opponent):
+        n_battles = 0
+        running = set()
+        while self._start_new_battle:
+            while len(running) < self.n_envs:
+                battle = Battle("bat%d" % n_battles, self.username, self.logger)
+                battle._available_moves = [Move("flamethrower")]
+                battle._player_role = "p1"
+                n_battles += 1
+                running.add(asyncio.ensure_future(self._play_battle(battle)))
+            _, running = await asyncio.wait(
+                running, return_when=asyncio.FIRST_COMPLETED
+            )
+
+
+def create_env(n_envs, max_episode_steps=None):
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    player = ScriptedVecEnvPlayer(
+        n_envs,
+        player_configuration=PlayerConfiguration("username", None),
+        server_configuration=ServerConfiguration("server.url", "auth.url"),
+        start_listening=False,
+    )
+    observation_space = gymnasium.spaces.Box(0, BATTLE_LENGTH, (1,), np.float32)
+    return GymnasiumVecEnv(
+        player, None, observation_space, max_episode_steps=max_episode_steps
+    )
+
+
+def test_spaces_reset_and_autoreset():
+    env = create_env(2)
+    assert env.metadata["autoreset_mode"] == gymnasium.vector.AutoresetMode.SAME_STEP
+    assert env.num_envs == 2
+    assert env.single_action_space.n == 22
+    assert env.observation_space.shape == (2, 1)
+
+    observations, infos = env.reset(seed=42)
+    assert observations.tolist() == [[0], [0]]
+    assert infos["action_mask"].shape == (2, 22)
+    assert infos["action_mask"][:, 0].all()
+
+    for turn in range(1, BATTLE_LENGTH):
+        observations, rewards, terminated, truncated, infos = env.step([0, 0])
+        assert observations.tolist() == [[turn], [turn]]
+        assert not terminated.any() and not truncated.any()
+        assert "final_obs" not in infos
+
+    observations, rewards, terminated, truncated, infos = env.step([0, 0])
+    assert observations.tolist() == [[0], [0]]
+    assert rewards.tolist() == [1, 1]
+    assert terminated.tolist() == [True, True]
+    assert not truncated.any()
+    assert infos["_final_obs"].tolist() == [True, True]
+    assert [o.tolist() for o in infos["final_obs"]] == [[3], [3]]
+    assert infos["_final_info"].tolist() == [True, True]
+    assert {battle.battle_tag for battle in env.player._env_battles} == {
+        "bat2",
+        "bat3",
+    }
+
+    env.close()
+    assert env.closed
+    assert all(battle.finished for battle in env.player._env_battles)
+
+
+def test_truncation_and_reset_forfeit_battles():
+    env = create_env(1, max_episode_steps=2)
+    env.reset()
+    first_battle = env.player._env_battles[0]
+
+    env.step([0])
+    observations, _, terminated, truncated, infos = env.step([0])
+    assert observations.tolist() == [[0]]
+    assert terminated.tolist() == [False]
+    assert truncated.tolist() == [True]
+    assert infos["final_obs"][0].tolist() == [2]
+    assert first_battle.lost
+
+    second_battle = env.player._env_battles[0]
+    assert second_battle is not first_battle
+    env.step([0])
+    env.reset()
+    assert second_battle.lost
+    assert env.player._env_battles[0].turn == 0
+
+    env.close()
+    env.close()
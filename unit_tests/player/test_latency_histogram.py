@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import math
+import pytest
+
+from poke_env.player.latency_histogram import LatencyHistogram
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram([0.01, 0.1, 1])
+    assert histogram.count == 0
+    assert math.isnan(histogram.mean)
+    assert math.isnan(histogram.quantile(0.5))
+
+    for latency in [0.005, 0.005, 0.05, 0.05, 0.05, 0.05, 0.5, 0.5, 2, 4]:
+        histogram.record(latency)
+    assert histogram.counts == [2, 4, 2, 2]
+    assert histogram.count == 10
+    assert histogram.max == 4
+    assert histogram.mean == pytest.approx(0.721)
+    assert histogram.bounds == [0.01, 0.1, 1]
+
+    assert histogram.quantile(0) == 0
+    assert histogram.quantile(0.2) == pytest.approx(0.01)
+    assert histogram.quantile(0.4) == pytest.approx(0.055)
+    assert histogram.quantile(0.7) == pytest.approx(0.55)
+    assert histogram.quantile(0.9) == pytest.approx(2.5)
+    assert histogram.quantile(1) == 4
+
+    # Latencies equal to a bound are counted in its bucket
+    histogram.record(0.1)
+    assert histogram.counts == [2, 5, 2, 2]
+
+    with pytest.raises(ValueError):
+        histogram.quantile(1.5)
+    with pytest.raises(ValueError):
+        LatencyHistogram([1, 0.1])
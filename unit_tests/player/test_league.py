@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import numpy as np
+import pytest
+
+from poke_env.player.league import League
+from poke_env.player.random_player import RandomPlayer
+from poke_env.player_configuration import PlayerConfiguration
+
+
+def create_player(username, max_concurrent_battles=1):
+    player = RandomPlayer(
+        player_configuration=PlayerConfiguration(username, None),
+        battle_format="gen8randombattle",
+        max_concurrent_battles=max_concurrent_battles,
+        start_listening=False,
+    )
+    player._logged_in.set()
+    return player
+
+
+def simulate_battles(player, winners):
+    """Replaces player's challenges by battles against the challenged opponent, which
+    finish shortly after starting with the result set in winners."""
+    challenged = []
+
+    async def challenge(opponent, format_):
+        battle_tag = ">battle-gen8randombattle-%d" % len(challenged)
+        challenged.append(opponent)
+        await player._handle_message(
+            "%s\n|init|battle\n|title|%s vs. %s"
+            % (battle_tag, player.username, opponent)
+        )
+
+        async def finish():
+            await asyncio.sleep(0.001)
+            await player._handle_message(
+                "%s\n|win|%s" % (battle_tag, winners[opponent])
+            )
+
+        asyncio.ensure_future(finish())
+
+    player._challenge = challenge
+    return challenged
+
+
+def test_matchmaking_probabilities():
+    player = create_player("learner")
+    opponents = [create_player("weak"), create_player("strong")]
+    league = League(player, opponents)
+    league._results["weak"] = [8, 0, 0]
+    league._results["strong"] = [1, 6, 2]
+
+    assert league.win_rates == {"weak": 0.9, "strong": 3 / 11}
+    assert league.matchmaking_probabilities == pytest.approx(
+        {
+            "weak": 0.01 / (0.01 + (8 / 11) ** 2),
+            "strong": 1 - 0.01 / (0.01 + (8 / 11) ** 2),
+        }
+    )
+
+    league._weighting = "variance"
+    assert league.matchmaking_probabilities == pytest.approx(
+        {"weak": 0.09 / (0.09 + 24 / 121), "strong": 1 - 0.09 / (0.09 + 24 / 121)}
+    )
+
+    league._weighting = lambda win_rate: 0
+    assert league.matchmaking_probabilities == {"weak": 0.5, "strong": 0.5}
+
+    with pytest.raises(ValueError):
+        League(player, weighting="unknown")
+    with pytest.raises(ValueError):
+        league.add_opponent(create_player("weak"))
+    with pytest.raises(ValueError):
+        league.add_opponent(create_player("learner"))
+    with pytest.raises(ValueError):
+        League(player).sample_opponent()
+
+
+@pytest.mark.asyncio
+async def test_play():
+    player = create_player("learner", max_concurrent_battles=3)
+    opponents = [create_player("weak"), create_player("strong")]
+    league = League(player, opponents, random_state=np.random.RandomState(0))
+    challenged = simulate_battles(player, {"weak": "learner", "strong": "strong"})
+
+    await league.play(n_battles=30)
+    assert len(challenged) == 30
+    assert player.battle_scheduler.n_running_battles == 0
+    assert player.battle_scheduler.average_concurrent_battles > 1
+
+    # Results feed back into matchmaking, which focuses on the strong opponent
+    results = league.results
+    assert results["weak"][1:] == (0, 0)
+    assert results["strong"][::2] == (0, 0)
+    assert sum(r[0] + r[1] for r in results.values()) == 30
+    assert results["strong"][1] > results["weak"][0]
+    assert league.matchmaking_probabilities["strong"] > 0.9
+
+    # Opponents keep accepting challenges between calls
+    accepting = dict(league._accepting)
+    assert set(accepting) == {"weak", "strong"}
+    assert not any(task.done() for task in accepting.values())
+
+    removed = league.remove_opponent("Strong")
+    assert removed is opponents[1]
+    await league.play(should_stop=lambda: len(challenged) >= 35)
+    assert challenged[30:] == ["weak"] * 5
+    assert accepting["strong"].cancelled()
+    assert league.results["strong"] == results["strong"]
+    assert list(league.opponents) == ["weak"]
+
+    league.close()
+    await asyncio.sleep(0)
+    assert accepting["weak"].cancelled()
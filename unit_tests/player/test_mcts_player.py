@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from unittest.mock import MagicMock
+
+from poke_env.environment.battle import Battle
+from poke_env.environment.double_battle import DoubleBattle
+from poke_env.environment.forward_model import ForwardModel
+from poke_env.environment.pokemon import Pokemon
+from poke_env.player.mcts_player import MCTSPlayer
+
+
+def create_mon(species, moves, active=False):
+    mon = Pokemon(species=species)
+    mon._set_hp("100/100")
+    mon._active = active
+    for move in moves:
+        mon._add_move(move)
+    return mon
+
+
+def create_battle():
+    battle = Battle("tag", "username", MagicMock())
+    battle._player_role = "p1"
+    garchomp = create_mon("garchomp", ["toxic", "swordsdance", "earthquake"], True)
+    blissey = create_mon("blissey", ["seismictoss", "softboiled"])
+    heatran = create_mon("heatran", ["magmastorm", "earthpower"], True)
+    battle._team = {"p1: Garchomp": garchomp, "p1: Blissey": blissey}
+    battle._opponent_team = {"p2: Heatran": heatran}
+    battle._team_size = {"p1": 2, "p2": 2}
+    battle._available_moves = list(garchomp.moves.values())
+    battle._available_switches = [blissey]
+    return battle
+
+
+@pytest.mark.asyncio
+async def test_mcts_player_choose_move():
+    player = MCTSPlayer(start_listening=False, max_rollouts=200, time_budget=10, seed=0)
+    battle = create_battle()
+
+    assert (await player.choose_move(battle)).message == "/choose move earthquake"
+    assert player.last_n_rollouts == 200
+
+    statistics = player.search(ForwardModel(battle))
+    assert set(statistics) == {0, 1, 2, ForwardModel.SWITCH_OFFSET + 1}
+    assert sum(visits for visits, _ in statistics.values()) == 200
+    assert max(statistics, key=lambda action: statistics[action][0]) == 2
+
+    battle.active_pokemon._set_hp("0 fnt")
+    battle._available_moves = []
+    battle._force_switch = True
+    assert (await player.choose_move(battle)).message == "/choose switch blissey"
+
+    double_battle = DoubleBattle("tag", "username", MagicMock())
+    double_battle._player_role = "p1"
+    assert (await player.choose_move(double_battle)).message == "/choose default"
+
+
+@pytest.mark.asyncio
+async def test_mcts_player_decision_budget():
+    player = MCTSPlayer(start_listening=False, decision_budget=1, time_budget=10)
+    battle = create_battle()
+
+    # Searches stop when the decision budget is spent
+    player._decision_deadlines[battle.battle_tag] = perf_counter()
+    await player.choose_move(battle)
+    assert player.last_n_rollouts == 0
+
+
+@pytest.mark.asyncio
+async def test_mcts_player_searches_in_executor():
+    executor = MagicMock(wraps=ThreadPoolExecutor(1))
+    player = MCTSPlayer(
+        start_listening=False,
+        choose_move_executor=executor,
+        max_rollouts=50,
+        time_budget=10,
+        seed=0,
+    )
+
+    assert (await player.choose_move(create_battle())).message == (
+        "/choose move earthquake"
+    )
+    assert player.last_n_rollouts == 50
+    executor.submit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_mcts_player_parallel_search():
+    with pytest.raises(ValueError):
+        MCTSPlayer(start_listening=False, n_workers=0)
+
+    player = MCTSPlayer(
+        start_listening=False, max_rollouts=50, n_workers=2, time_budget=10, seed=0
+    )
+    try:
+        order = await player.choose_move(create_battle())
+        assert order.message == "/choose move earthquake"
+        assert player.last_n_rollouts == 100
+    finally:
+        player.close()
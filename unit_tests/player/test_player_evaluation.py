@@ -1,6 +1,16 @@
 # -*- coding: utf-8 -*-
+from poke_env.environment.battle import Battle
+from poke_env.player.baselines import MaxBasePowerPlayer, SimpleHeuristicsPlayer
+from poke_env.player.player import Player
+from poke_env.player.player_network_interface import PlayerNetwork
 from poke_env.player.random_player import RandomPlayer
-from poke_env.player.utils import evaluate_player, _estimate_strength_from_results
+from poke_env.player.utils import (
+    evaluate_player,
+    _estimate_strength_from_results,
+    _EVALUATION_RATINGS,
+    _normal_quantile,
+    _wilson_interval,
+)
 
 import math
 import pytest
@@ -38,7 +48,7 @@ def test_estimate_strength_from_results():
 
     eis = []
     cis = []
-    for n_games in [10 ** i for i in range(2, 10)]:
+    for n_games in [10**i for i in range(2, 10)]:
         ei, ci = _estimate_strength_from_results(n_games, n_games // 2 + 2, 1)
         eis.append(ei)
         cis.append(ci)
@@ -69,7 +79,7 @@ def test_estimate_strength_from_results():
         (0.5444919968130197, 1.2357621837082962),
     )
 
-    assert _estimate_strength_from_results(10 ** 17, 10 ** 17 - 10, 1)[1][1] == math.inf
+    assert _estimate_strength_from_results(10**17, 10**17 - 10, 1)[1][1] == math.inf
 
 
 @pytest.mark.asyncio
@@ -90,3 +100,59 @@ async def test_player_evaluation_assertions():
 
     with pytest.raises(AssertionError):
         await evaluate_player(p, n_placement_battles=-10)
+
+
+def test_normal_quantile():
+    assert _normal_quantile(0.5) == pytest.approx(0, abs=1e-9)
+    assert _normal_quantile(0.975) == pytest.approx(1.959964, abs=1e-6)
+    assert _normal_quantile(0.025 / 3) == pytest.approx(-2.393980, abs=1e-6)
+
+
+def test_wilson_interval():
+    assert _wilson_interval(0, 0) == (0, 1)
+
+    lower_bound, higher_bound = _wilson_interval(10, 0)
+    assert lower_bound == pytest.approx(0)
+    assert 0 < higher_bound < 0.5
+
+    lower_bound, higher_bound = _wilson_interval(100, 50)
+    assert lower_bound == pytest.approx(1 - higher_bound)
+    assert lower_bound < 0.5 < higher_bound
+
+    # Higher confidence levels give wider intervals
+    wider_lower_bound, wider_higher_bound = _wilson_interval(100, 50, 2.39)
+    assert wider_lower_bound < lower_bound and higher_bound < wider_higher_bound
+
+
+@pytest.mark.asyncio
+async def test_sequential_player_evaluation(monkeypatch):
+    # Baselines win against the player with a fixed probability, played out exactly
+    win_rates = {RandomPlayer: 0, MaxBasePowerPlayer: 0.5, SimpleHeuristicsPlayer: 1}
+    n_played = {baseline: 0 for baseline in win_rates}
+
+    async def listen(self):
+        pass
+
+    async def battle_against(self, opponent, n_battles):
+        win_rate = win_rates[type(self)]
+        n_played[type(self)] += n_battles
+        for _ in range(n_battles):
+            n = len(self._battles)
+            battle = Battle("bat%d" % n, self.username, self.logger)
+            wins = math.floor((n + 1) * win_rate) - math.floor(n * win_rate)
+            battle._won_by(self.username if wins else opponent.username)
+            self._battles[battle.battle_tag] = battle
+
+    monkeypatch.setattr(PlayerNetwork, "listen", listen)
+    monkeypatch.setattr(Player, "battle_against", battle_against)
+
+    player = RandomPlayer(battle_format="gen8randombattle", start_listening=False)
+    estimate, (lower_bound, higher_bound) = await evaluate_player(
+        player, n_battles=1000, target_interval_width=0.5
+    )
+    assert estimate == pytest.approx(_EVALUATION_RATINGS[MaxBasePowerPlayer])
+    assert (higher_bound - lower_bound) / estimate <= 0.5
+
+    # Placement stops after a single batch against clearly mismatched baselines
+    assert n_played[RandomPlayer] == n_played[SimpleHeuristicsPlayer] == 10
+    assert 30 < n_played[MaxBasePowerPlayer] < 300
@@ -1,12 +1,20 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import pickle
 import pytest
+import threading
+import time
 
 from poke_env.environment.battle import Battle
 from poke_env.environment.double_battle import DoubleBattle
+from poke_env.environment.move import Move
+from poke_env.environment.pokemon import Pokemon
 from poke_env.player.player import Player
 from poke_env.player.random_player import RandomPlayer
-from poke_env.player.utils import cross_evaluate
+from poke_env.player.utils import _round_robin_pairs, cross_evaluate
 
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
@@ -143,6 +151,313 @@ async def test_start_timer_on_battle_start():
         player._sent_messages
 
 
+@pytest.mark.asyncio
+async def test_get_battle_waits_for_battle_creation():
+    player = SimplePlayer(start_listening=False)
+
+    waiting = asyncio.ensure_future(player._get_battle(">gen8randombattle-uuu"))
+    also_waiting = asyncio.ensure_future(player._get_battle(">gen8randombattle-uuu"))
+    other_battle = asyncio.ensure_future(player._get_battle(">gen8randombattle-vvv"))
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    battle = await player._create_battle(["", "gen8randombattle", "uuu"])
+    assert await waiting is battle
+    assert await also_waiting is battle
+    assert not other_battle.done()
+    assert "gen8randombattle-uuu" not in player._battle_start_futures
+
+    other_battle.cancel()
+    assert await player._get_battle(">gen8randombattle-uuu") is battle
+
+
+class TimerPlayer(SimplePlayer):
+    def choose_move(self, battle):
+        self.opponents.append(battle.opponent_username)
+        return self.choose_default_move()
+
+    async def _send_message(self, message, room):
+        await asyncio.sleep(0.01)
+        self.sent.append(message)
+
+
+@pytest.mark.asyncio
+async def test_battle_initialisation_is_processed_first():
+    player = TimerPlayer(start_listening=False, start_timer_on_battle_start=True)
+    player.opponents, player.sent = [], []
+
+    turn = asyncio.ensure_future(
+        player._handle_message(">battle-gen8randombattle-1\n|turn|1")
+    )
+    await asyncio.sleep(0)
+    await player._handle_message(
+        ">battle-gen8randombattle-1\n|init|battle\n|title|%s vs. opponent"
+        % player.username
+    )
+    await turn
+
+    assert player.sent == ["/timer on", "/choose default"]
+    assert player.opponents == ["opponent"]
+
+
+@pytest.mark.asyncio
+async def test_battle_requests_wait_for_their_battle():
+    player = SimplePlayer(start_listening=False, max_concurrent_battles=2)
+    player._logged_in.set()
+    sent = []
+
+    async def challenge(username, format_):
+        sent.append(username)
+
+    player._challenge = challenge
+    challenging = asyncio.ensure_future(player.send_challenges("Opponent", 1))
+    await asyncio.sleep(0)
+    assert sent == ["Opponent"]
+    assert player.battle_scheduler.n_reserved_slots == 1
+
+    # A battle against someone else does not start the requested battle
+    await player._handle_message(
+        ">battle-gen8randombattle-1\n|init|battle\n|title|%s vs. other"
+        % player.username
+    )
+    await asyncio.sleep(0)
+    assert player.battle_scheduler.n_reserved_slots == 0
+    assert not player._battle_requests[0][1].done()
+
+    await player._handle_message(
+        ">battle-gen8randombattle-2\n|init|battle\n|title|opponent vs. %s"
+        % player.username
+    )
+    await asyncio.sleep(0)
+    assert not player._battle_requests
+    assert not challenging.done()
+
+    for i in (1, 2):
+        await player._handle_message(
+            ">battle-gen8randombattle-%d\n|win|%s" % (i, player.username)
+        )
+    await asyncio.wait_for(challenging, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_failed_battle_requests_release_their_slot():
+    player = SimplePlayer(start_listening=False)
+    player._logged_in.set()
+
+    async def challenge(username, format_):
+        raise ConnectionError()
+
+    player._challenge = challenge
+    with pytest.raises(ConnectionError):
+        await player.send_challenges("opponent", 1)
+    assert player.battle_scheduler.n_reserved_slots == 0
+    assert not player._battle_requests
+
+    async def search_ladder_game(format_):
+        pass
+
+    player._search_ladder_game = search_ladder_game
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(player.ladder(1), timeout=0.01)
+    assert player.battle_scheduler.n_reserved_slots == 0
+    assert not player._battle_requests
+
+
+class AsyncSimplePlayer(SimplePlayer):
+    async def choose_move(self, battle):
+        await asyncio.sleep(0)
+        return self.choose_default_move()
+
+
+@pytest.mark.asyncio
+async def test_awaitable_choose_move():
+    player = AsyncSimplePlayer(start_listening=False)
+    battle = Battle("bat1", player.username, player.logger)
+
+    await player._handle_battle_request(battle)
+    assert player._sent_messages == ["/choose default", "bat1"]
+
+    player._sent_messages = None
+    battle._won_by(player.username)
+    await player._handle_battle_request(battle)
+    assert player._sent_messages is None
+
+
+class SlowPlayer(SimplePlayer):
+    def __init__(self, delay, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.remaining_times = []
+
+    async def choose_move(self, battle):
+        self.remaining_times.append(self.remaining_decision_time(battle))
+        await asyncio.sleep(self.delay)
+        return self.choose_default_move()
+
+
+@pytest.mark.asyncio
+async def test_decision_budget():
+    player = SlowPlayer(0.2, decision_budget=0.01, start_listening=False)
+    battle = Battle("bat1", player.username, player.logger)
+    battle._available_moves = [Move("tackle"), Move("flamethrower")]
+
+    # Late decisions are replaced by the fallback move
+    await player._handle_battle_request(battle)
+    assert player._sent_messages == ["/choose move flamethrower", "bat1"]
+    assert 0 < player.remaining_times[0] <= 0.01
+    assert player.remaining_decision_time(battle) is None
+
+    player.delay = 0
+    await player._handle_battle_request(battle)
+    assert player._sent_messages == ["/choose default", "bat1"]
+
+    battle._force_switch = True
+    battle._available_moves = []
+    await player._handle_battle_request(battle)
+
+    latencies = player.decision_latencies
+    assert set(latencies) == {"move", "switch"}
+    assert latencies["move"].count == 2 and latencies["switch"].count == 1
+    assert 0.01 <= latencies["move"].max < 0.2
+    assert player.decision_budget_overruns == {"move": 1, "switch": 0}
+
+    # Without budget, decisions are not interrupted
+    player = SlowPlayer(0.02, start_listening=False)
+    await player._handle_battle_request(battle)
+    assert player._sent_messages == ["/choose default", "bat1"]
+    assert player.remaining_times == [None]
+    assert player.decision_latencies["switch"].max >= 0.02
+    assert player.decision_budget_overruns == {"switch": 0}
+
+
+@pytest.mark.asyncio
+async def test_awaitable_choose_move_processes_messages_in_order():
+    player = SlowPlayer(0.02, start_listening=False)
+    battle = Battle("bat1", player.username, player.logger)
+    player._battles = {"bat1": battle}
+
+    deciding = asyncio.ensure_future(
+        player._handle_battle_message([[">bat1"], ["", "turn", "1"]])
+    )
+    await asyncio.sleep(0.005)
+    finishing = asyncio.ensure_future(
+        player._handle_battle_message([[">bat1"], ["", "win", player.username]])
+    )
+    await asyncio.sleep(0)
+    assert not battle.finished
+
+    await asyncio.gather(deciding, finishing)
+    assert player._sent_messages == ["/choose default", "bat1"]
+    assert battle.won
+    assert "bat1" not in player._battle_locks
+
+
+class BlockingPlayer(SimplePlayer):
+    def __init__(self, delay, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.decisions = []
+        self.sent = []
+
+    def choose_move(self, battle):
+        self.decisions.append((battle, battle.turn, threading.current_thread()))
+        time.sleep(self.delay)
+        return self.choose_default_move()
+
+    async def _send_message(self, message, room):
+        self.sent.append((message, room))
+
+
+@pytest.mark.asyncio
+async def test_choose_move_executor():
+    with ThreadPoolExecutor(2) as executor:
+        player = BlockingPlayer(
+            0.05, choose_move_executor=executor, start_listening=False
+        )
+        assert player.choose_move_executor is executor
+        battle = Battle("bat1", player.username, player.logger)
+        other_battle = Battle("bat2", player.username, player.logger)
+        player._battles = {"bat1": battle, "bat2": other_battle}
+
+        first = asyncio.ensure_future(
+            player._handle_battle_message([[">bat1"], ["", "turn", "1"]])
+        )
+        second = asyncio.ensure_future(
+            player._handle_battle_message([[">bat1"], ["", "turn", "2"]])
+        )
+        await asyncio.sleep(0.01)
+
+        # Other battles progress while a decision is pending
+        await player._handle_battle_message([[">bat2"], ["", "title", "a vs. b"]])
+        assert other_battle.opponent_username == "a"
+        assert not first.done()
+        assert battle.turn == 1
+
+        # Messages of a battle are processed in order, decisions using snapshots
+        await asyncio.gather(first, second)
+        assert battle.turn == 2
+        assert [turn for _, turn, _ in player.decisions] == [1, 2]
+        assert player.sent == [("/choose default", "bat1")] * 2
+        for snapshot, _, thread in player.decisions:
+            assert snapshot not in (battle, other_battle)
+            assert thread is not threading.current_thread()
+
+        # Executor decisions can be abandoned for the fallback move
+        player = BlockingPlayer(
+            0.2,
+            choose_move_executor=executor,
+            decision_budget=0.01,
+            start_listening=False,
+        )
+        battle._available_moves = [Move("tackle"), Move("flamethrower")]
+        await player._handle_battle_request(battle)
+        assert player.sent == [("/choose move flamethrower", "bat1")]
+        assert player.decision_budget_overruns == {"move": 1}
+
+
+@pytest.mark.asyncio
+async def test_choose_move_process_executor():
+    player = SimplePlayer(start_listening=False)
+    battle = Battle("bat1", player.username, player.logger)
+    battle._available_moves = [Move("tackle")]
+    battle._team = {"p1: Charizard": Pokemon(species="charizard")}
+    battle.team["p1: Charizard"]._observers.append(lambda mon: None)
+
+    copy = pickle.loads(pickle.dumps(player))
+    assert copy.username == player.username
+    assert not hasattr(copy, "_battles")
+
+    snapshot = player._snapshot_battle(battle)
+    assert snapshot.team["p1: Charizard"]._observers == []
+    assert battle.team["p1: Charizard"]._observers
+    assert snapshot.logger is battle.logger
+
+    with ProcessPoolExecutor(1) as executor:
+        player._choose_move_executor = executor
+        await player._handle_battle_request(battle)
+    assert player._sent_messages == ["/choose move tackle", "bat1"]
+
+
+def test_snapshot_battle_clears_every_pokemon_observers():
+    battle = DoubleBattle("bat1", "username", MagicMock())
+    battle._team = {
+        "p1: Charizard": Pokemon(species="charizard"),
+        "p1: Venusaur": Pokemon(species="venusaur"),
+    }
+    battle._sent_team = set(battle._team.values())
+    battle._opponent_team = {"p2: Blastoise": Pokemon(species="blastoise")}
+    mons = list(battle._team.values()) + list(battle._opponent_team.values())
+    for mon in mons:
+        mon._observers.append(lambda mon: None)
+
+    snapshot = Player._snapshot_battle(battle)
+    copies = list(snapshot._team.values()) + list(snapshot._opponent_team.values())
+    assert all(mon._observers == [] for mon in copies)
+    assert len({id(mon._observers) for mon in copies}) == len(copies)
+    assert snapshot._sent_team == set(snapshot._team.values())
+    assert all(mon._observers for mon in mons)
+
+
 @pytest.mark.asyncio
 async def test_basic_challenge_handling():
     player = SimplePlayer(start_listening=False)
@@ -211,3 +526,65 @@ async def test_cross_evaluate():
         "p1": {"p1": None, "p2": 0.5},
         "p2": {"p1": 0.5, "p2": None},
     }
+
+
+def test_round_robin_pairs():
+    for n_players in range(1, 8):
+        pairs = _round_robin_pairs(n_players)
+        assert sorted(pairs) == [
+            (i, j) for i in range(n_players) for j in range(i + 1, n_players)
+        ]
+
+    pairs = _round_robin_pairs(4)
+    for round_start in range(0, 6, 2):
+        round_players = [
+            p for pair in pairs[round_start : round_start + 2] for p in pair
+        ]
+        assert sorted(round_players) == [0, 1, 2, 3]
+
+
+class ConcurrentFixedWinRatePlayer:
+    active_players = set()
+    max_active_players = 0
+
+    def __init__(self, username):
+        self.username = username
+        self.battles = {}
+
+    def _add_battle(self, opponent, won):
+        battle = MagicMock(finished=True, won=won, lost=not won)
+        self.battles["%s-%s-%d" % (self.username, opponent, len(self.battles))] = battle
+
+    async def battle_against(self, opponent, n_battles):
+        cls = ConcurrentFixedWinRatePlayer
+        assert self.username not in cls.active_players
+        assert opponent.username not in cls.active_players
+
+        cls.active_players.update((self.username, opponent.username))
+        cls.max_active_players = max(cls.max_active_players, len(cls.active_players))
+        await asyncio.sleep(0.01)
+        cls.active_players.difference_update((self.username, opponent.username))
+
+        for i in range(n_battles):
+            won = i < n_battles // 4
+            self._add_battle(opponent.username, won)
+            opponent._add_battle(self.username, not won)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cross_evaluate():
+    players = [ConcurrentFixedWinRatePlayer("p%d" % i) for i in range(4)]
+    players[0]._add_battle("previous", True)
+
+    cross_evaluation = await cross_evaluate(players, 8, max_concurrent_pairs=0)
+
+    assert ConcurrentFixedWinRatePlayer.max_active_players == 4
+    for i, p_1 in enumerate(players):
+        for j, p_2 in enumerate(players):
+            if i < j:
+                assert cross_evaluation[p_1.username][p_2.username] == 0.25
+            elif i > j:
+                assert cross_evaluation[p_1.username][p_2.username] == 0.75
+            else:
+                assert cross_evaluation[p_1.username][p_2.username] is None
+    assert len(players[0].battles) == 25
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from poke_env.player.ratings import (
+    BradleyTerryRatings,
+    EloRatings,
+    games_from_cross_evaluation,
+)
+
+
+def sample_games(strengths, n_games, random_state):
+    first = random_state.randint(len(strengths), size=n_games)
+    second = (first + random_state.randint(1, len(strengths), size=n_games)) % len(
+        strengths
+    )
+    p = strengths[first] / (strengths[first] + strengths[second])
+    outcomes = (random_state.rand(n_games) < p).astype(float)
+    return np.stack([first, second, outcomes], axis=1)
+
+
+def test_games_from_cross_evaluation():
+    results = {
+        "a": {"a": None, "b": 0.6, "c": None},
+        "b": {"a": 0.2, "b": None, "c": 1.0},
+        "c": {"a": None, "b": 0.0, "c": None},
+    }
+    usernames, games = games_from_cross_evaluation(results, 5)
+    assert usernames == ["a", "b", "c"]
+    assert games.tolist() == [
+        [0, 1, 1],
+        [0, 1, 1],
+        [0, 1, 1],
+        [0, 1, 0],
+        [0, 1, 0.5],
+        [1, 2, 1],
+        [1, 2, 1],
+        [1, 2, 1],
+        [1, 2, 1],
+        [1, 2, 1],
+    ]
+
+
+def test_bradley_terry_ratings():
+    strengths = np.array([1.0, 2.0, 8.0, 0.5])
+    games = sample_games(strengths, 20000, np.random.RandomState(0))
+
+    ratings = BradleyTerryRatings(prior_games=0.01)
+    ratings.add_games(games[:10000])
+    partial_strengths = ratings.strengths
+    n_iterations = ratings.n_iterations
+
+    # Incremental updates start from the previous fit
+    ratings.add_games(games[10000:])
+    assert ratings.n_games == 20000
+    assert ratings.n_iterations <= n_iterations
+
+    fitted = ratings.strengths
+    assert fitted / fitted[0] == pytest.approx(strengths, rel=0.1)
+    assert not np.allclose(fitted, partial_strengths)
+    assert ratings.predict(np.array([2]), np.array([3])) == pytest.approx(
+        [8 / 8.5], abs=0.02
+    )
+
+    batch = BradleyTerryRatings(prior_games=0.01)
+    batch.add_games(games)
+    assert batch.strengths == pytest.approx(fitted, rel=1e-6)
+    assert batch.ratings == pytest.approx(400 * np.log10(fitted))
+
+
+def test_bradley_terry_ratings_extreme_results():
+    ratings = BradleyTerryRatings(n_players=3)
+    assert ratings.strengths.tolist() == [1, 1, 1]
+
+    # Undefeated and winless players keep finite strengths
+    ratings.add_games([[0, 1, 1]] * 10 + [[1, 2, 0.5]] * 4)
+    strengths = ratings.strengths
+    assert np.isfinite(strengths).all() and (strengths > 0).all()
+    assert strengths[0] > 1 > strengths[2] > strengths[1]
+
+    with pytest.raises(ValueError):
+        ratings.add_games([[0, 0, 1]])
+    with pytest.raises(ValueError):
+        ratings.add_games([[0, 1, 2]])
+    with pytest.raises(ValueError):
+        ratings.add_games([[0, 1]])
+    with pytest.raises(ValueError):
+        BradleyTerryRatings(prior_games=0)
+
+
+def test_elo_ratings():
+    ratings = EloRatings(batch_size=1)
+    ratings.add_games([[0, 1, 1]])
+    assert ratings.ratings.tolist() == [1516, 1484]
+
+    # A batch uses the ratings from before the batch
+    batched = EloRatings(batch_size=2)
+    batched.add_games([[0, 1, 1], [0, 1, 1], [1, 2, 0.5]])
+    assert batched.ratings[0] == 1532
+    assert batched.ratings.sum() == pytest.approx(3 * 1500)
+    assert batched.n_games == 3
+    assert batched.n_players == 3
+
+    strengths = np.array([1.0, 4.0, 16.0])
+    ratings = EloRatings(batch_size=16, k_factor=4)
+    ratings.add_games(sample_games(strengths, 20000, np.random.RandomState(1)))
+    differences = np.diff(ratings.ratings)
+    assert (differences > 0).all()
+    assert differences.sum() == pytest.approx(400 * np.log10(16), abs=50)
+    assert ratings.strengths == pytest.approx(10 ** ((ratings.ratings - 1500) / 400))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from poke_env.environment.battle import Battle
+from poke_env.environment.pokemon import Pokemon
+from poke_env.player.reward_engine import RewardEngine
+
+WEIGHTS = {
+    "fainted_value": 2,
+    "hp_value": 1,
+    "number_of_pokemons": 3,
+    "status_value": 0.5,
+    "victory_value": 10,
+}
+
+
+def create_battle(tag="bat1"):
+    battle = Battle(tag, "username", None)
+    battle._team = {i: Pokemon(species="charizard") for i in range(2)}
+    battle._opponent_team = {0: Pokemon(species="slowbro")}
+    for mon in [*battle.team.values(), *battle.opponent_team.values()]:
+        mon._set_hp("100/100")
+    return battle
+
+
+def test_incremental_rewards():
+    engine = RewardEngine()
+    battle = create_battle()
+    mon, other_mon = battle.team.values()
+    opponent = battle.opponent_team[0]
+
+    # 2 pokemons and 1 missing against 1 pokemon and 2 missing
+    assert engine.compute_reward(battle, starting_value=1, **WEIGHTS) == 0 - 1
+    assert engine.compute_reward(battle, **WEIGHTS) == 0
+
+    mon._damage("50/100 brn")
+    opponent._damage("25/100")
+    assert engine.compute_reward_breakdown(battle, **WEIGHTS) == {
+        "hp": 0.25,
+        "fainted": 0,
+        "status": -0.5,
+        "victory": 0,
+    }
+
+    mon._cure_status()
+    other_mon._faint()
+    # The revealed opponent replaces a missing pokemon, with unknown hp
+    battle._opponent_team[1] = Pokemon(species="slowking")
+    assert engine.compute_reward_breakdown(battle, **WEIGHTS) == {
+        "hp": -1 + 1,
+        "fainted": -2,
+        "status": 0.5,
+        "victory": 0,
+    }
+
+    battle._won_by("username")
+    assert engine.compute_reward(battle, **WEIGHTS) == 10
+    assert len(engine) == 0
+    assert mon._observers == []
+
+    # Finished battles are not tracked again
+    assert engine.compute_reward(battle, **WEIGHTS) == 0
+    assert len(engine) == 0
+
+
+def test_tracked_battles_are_bounded():
+    engine = RewardEngine(max_battles=2)
+    battles = [create_battle("bat%d" % i) for i in range(3)]
+    for battle in battles:
+        engine.compute_reward(battle, **WEIGHTS)
+    assert len(engine) == 2
+    assert all(mon._observers == [] for mon in battles[0].team.values())
+
+    engine.forget(battles[1])
+    engine.forget(battles[1])
+    assert len(engine) == 1
+
+
+@pytest.mark.parametrize("hp_value", [0, 1])
+def test_matches_full_computation(hp_value):
+    engine = RewardEngine()
+    battle = create_battle()
+    weights = dict(WEIGHTS, hp_value=hp_value)
+
+    def full_value():
+        value = hp_value * (1 - 2)
+        for side, team in [(1, battle.team), (-1, battle.opponent_team)]:
+            for mon in team.values():
+                value += side * mon.current_hp_fraction * hp_value
+                if mon.fainted:
+                    value -= side * weights["fainted_value"]
+                elif mon.status is not None:
+                    value -= side * weights["status_value"]
+        return value
+
+    assert engine.compute_reward(battle, **weights) == pytest.approx(full_value())
+    for hp_status in ["80/100", "60/100 par", "0 fnt"]:
+        previous_value = full_value()
+        battle.team[0]._set_hp_status(hp_status)
+        battle.opponent_team[0].status = "psn"
+        assert engine.compute_reward(battle, **weights) == pytest.approx(
+            full_value() - previous_value
+        )
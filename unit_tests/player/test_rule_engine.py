@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pickle
+import pytest
+
+from unittest.mock import MagicMock
+
+from poke_env.environment.battle import Battle
+from poke_env.environment.pokemon import Pokemon
+from poke_env.player.baselines import SimpleHeuristicsPlayer
+from poke_env.player.rule_engine import FeatureTable
+from poke_env.player.rule_engine import Rule
+from poke_env.player.rule_engine import RuleBasedPlayer
+from poke_env.player.rule_engine import RuleSet
+from poke_env.player.rule_engine import simple_heuristics_rules
+
+
+def create_mon(species, moves=(), active=False):
+    mon = Pokemon(species=species)
+    mon._set_hp("100/100")
+    mon._active = active
+    for move in moves:
+        mon._add_move(move)
+    return mon
+
+
+def create_battle(moves=("stealthrock", "swordsdance", "earthquake", "dragonclaw")):
+    battle = Battle("tag", "username", MagicMock())
+    battle._player_role = "p1"
+    garchomp = create_mon("garchomp", moves, True)
+    blissey = create_mon("blissey", ["seismictoss", "softboiled"])
+    heatran = create_mon("heatran", ["magmastorm", "earthpower"], True)
+    battle._team = {"p1: Garchomp": garchomp, "p1: Blissey": blissey}
+    battle._opponent_team = {"p2: Heatran": heatran}
+    battle._available_moves = list(garchomp.moves.values())
+    battle._available_switches = [blissey]
+    return battle
+
+
+def test_feature_table():
+    battle = create_battle()
+    features = FeatureTable.from_battle(battle)
+
+    assert len(features) == 5
+    assert [order.message for order in features.orders] == [
+        "/choose move stealthrock",
+        "/choose move swordsdance",
+        "/choose move earthquake",
+        "/choose move dragonclaw",
+        "/choose switch blissey",
+    ]
+    assert features.is_move.tolist() == [True] * 4 + [False]
+    assert features.is_entry_hazard.tolist() == [True] + [False] * 4
+    assert features.is_setup.tolist() == [False, True, False, False, False]
+    assert features.relative_damage.argmax() == 2
+    assert features["n_opponent_remaining_mons"].tolist() == [6] * 5
+    assert "damage" in features.names
+
+    with pytest.raises(AttributeError):
+        features.unknown_feature
+
+    battle._can_dynamax = True
+    features = FeatureTable.from_battle(battle)
+    assert len(features) == 9
+    assert features.is_dynamax.sum() == 4
+    assert features.damage[:4].tolist() == features.damage[4:8].tolist()
+
+
+def test_rule_set():
+    rules = simple_heuristics_rules()
+    features = FeatureTable.from_battle(create_battle())
+
+    contributions = rules.contributions(features)
+    assert contributions.shape == (len(rules), len(features))
+    assert np.allclose(contributions.sum(axis=0), rules.scores(features))
+
+    # Weighted variants are evaluated at once
+    weights = np.ones((3, len(rules)))
+    weights[1, rules.names.index("entry_hazards")] = 0
+    weights[2, rules.names.index("setup")] = 10
+    assert (weights @ contributions).argmax(axis=1).tolist() == [0, 1, 1]
+
+    assert rules.without("setup", "switch").names == [
+        "switch_out",
+        "entry_hazards",
+        "hazard_removal",
+        "damage",
+        "dynamax",
+        "hold_dynamax",
+    ]
+    variant = rules.replace("damage", score=lambda f: f.damage)
+    assert variant.scores(features)[2] > 1
+
+    with pytest.raises(ValueError):
+        rules.replace("unknown", score=1.0)
+    with pytest.raises(ValueError):
+        RuleSet([Rule("a", lambda f: True, 1.0), Rule("a", lambda f: True, 2.0)])
+
+
+def test_rule_based_player():
+    player = RuleBasedPlayer(start_listening=False)
+    heuristics = SimpleHeuristicsPlayer(start_listening=False)
+    battle = create_battle()
+
+    assert player.choose_move(battle).message == "/choose move stealthrock"
+
+    player = RuleBasedPlayer(
+        rules=simple_heuristics_rules().without("entry_hazards"),
+        start_listening=False,
+    )
+    assert player.choose_move(battle).message == "/choose move swordsdance"
+
+    # Without hazards, choices match SimpleHeuristicsPlayer's
+    battle = create_battle(["swordsdance", "earthquake", "dragonclaw"])
+    for b in (battle, create_battle(["earthquake", "dragonclaw"])):
+        assert player.choose_move(b).message == heuristics.choose_move(b).message
+
+    # Bad matchups are switched out of
+    battle = create_battle(["earthquake"])
+    ferrothorn = create_mon("ferrothorn", ["powerwhip"])
+    battle._team["p1: Ferrothorn"] = ferrothorn
+    battle._available_switches.append(ferrothorn)
+    battle._opponent_team = {"p2: Kyogre": create_mon("kyogre", ["surf"], True)}
+    assert player.choose_move(battle).message == "/choose move earthquake"
+
+    battle.active_pokemon._boosts["def"] = -3
+    assert player.choose_move(battle).message == "/choose switch ferrothorn"
+    assert heuristics.choose_move(battle).message == "/choose switch ferrothorn"
+
+    # Last pokemon dynamaxes
+    battle = create_battle(["earthquake", "dragonclaw"])
+    battle._can_dynamax = True
+    battle._available_switches = []
+    battle.team["p1: Blissey"]._faint()
+    assert player.choose_move(battle).message == "/choose move earthquake dynamax"
+
+    battle._available_moves = []
+    assert player.choose_move(battle).message == "/choose default"
+
+
+def test_rule_sets_can_be_pickled():
+    rules = (
+        simple_heuristics_rules(hp_fraction_coefficient=0.6)
+        .without("entry_hazards")
+        .replace("dynamax", score=1.0)
+    )
+    executor = MagicMock()
+    player = RuleBasedPlayer(
+        rules=rules,
+        choose_move_executor=executor,
+        decision_budget=1,
+        start_listening=False,
+    )
+    assert player.choose_move_executor is executor
+    assert player.decision_budget == 1
+    copy = pickle.loads(pickle.dumps(player))
+
+    features = FeatureTable.from_battle(create_battle())
+    assert copy.rules.names == rules.names
+    assert np.allclose(copy.rules.scores(features), rules.scores(features))
+    assert copy.choose_move(create_battle()).message == "/choose move swordsdance"
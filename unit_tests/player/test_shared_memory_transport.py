@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from threading import Thread
+
+from poke_env.player.shared_memory_transport import (
+    shared_memory_env_algorithm,
+    SharedMemoryRingBuffer,
+    SharedMemoryTransport,
+    STOP_ACTION,
+)
+
+
+def test_ring_buffer():
+    fields = [("observation", (3,), np.float32), ("done", (), np.bool_)]
+    with SharedMemoryRingBuffer(2, fields) as producer:
+        consumer = SharedMemoryRingBuffer.attach(producer.spec)
+
+        with pytest.raises(TimeoutError):
+            consumer.get(timeout=0.01)
+        with pytest.raises(ValueError):
+            consumer.release()
+
+        producer.put(observation=[1, 2, 3], done=False)
+        producer.put(observation=[4, 5, 6], done=True)
+        assert len(consumer) == 2
+        with pytest.raises(TimeoutError):
+            producer.put(timeout=0.01, observation=[7, 8, 9], done=False)
+
+        record = consumer.get()
+        assert record["observation"].tolist() == [1, 2, 3]
+        assert not record["done"]
+        consumer.release()
+
+        producer.put(observation=[7, 8, 9], done=False)
+        assert consumer.get()["observation"].tolist() == [4, 5, 6]
+        consumer.release()
+        record = consumer.get()
+        assert record["observation"].tolist() == [7, 8, 9]
+
+        # Records are read in place
+        record["observation"][0] = 0
+        assert consumer.get()["observation"].tolist() == [0, 8, 9]
+        consumer.close()
+
+
+class FakeEnvPlayer:
+    def __init__(self):
+        self.actions = []
+        self.n_resets = 0
+
+    def reset(self):
+        self.n_resets += 1
+        self.turn = 0
+        return np.array([self.n_resets, self.turn])
+
+    def step(self, action):
+        self.actions.append(action)
+        self.turn += 1
+        done = self.turn == 2
+        return (
+            np.array([self.n_resets, self.turn]),
+            float(done),
+            done,
+            {"action_mask": np.array([not done, True])},
+        )
+
+    @property
+    def action_mask(self):
+        return np.array([True, False])
+
+
+def test_shared_memory_env_algorithm():
+    player = FakeEnvPlayer()
+
+    with SharedMemoryTransport(observation_shape=(2,), n_actions=2) as transport:
+        worker = Thread(
+            target=shared_memory_env_algorithm, args=(player, transport.spec)
+        )
+        worker.start()
+
+        transitions = []
+        for action in [1, 0, None, 1, STOP_ACTION]:
+            transition = transport.get_transition(timeout=1)
+            transitions.append(
+                (
+                    transition["observation"].tolist(),
+                    transition["action_mask"].tolist(),
+                    float(transition["reward"]),
+                    bool(transition["done"]),
+                )
+            )
+            transport.release_transition()
+            if action is not None:
+                transport.put_action(action)
+
+        worker.join(timeout=1)
+        assert not worker.is_alive()
+
+    assert player.actions == [1, 0, 1]
+    assert transitions == [
+        ([1, 0], [True, False], 0.0, False),
+        ([1, 1], [True, True], 0.0, False),
+        ([1, 2], [False, True], 1.0, True),
+        ([2, 0], [True, False], 0.0, False),
+        ([2, 1], [True, True], 0.0, False),
+    ]
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from time import perf_counter
+from unittest.mock import MagicMock
+
+from poke_env.environment.battle import Battle
+from poke_env.environment.double_battle import DoubleBattle
+from poke_env.environment.pokemon import Pokemon
+from poke_env.player.teampreview_optimizer import TeamPreviewOptimizer
+from poke_env.player.teampreview_optimizer import _selections
+
+
+def create_mon(species, moves=()):
+    mon = Pokemon(species=species)
+    for move in moves:
+        mon._add_move(move)
+    return mon
+
+
+def create_team():
+    return [
+        create_mon("scizor", ["bulletpunch", "uturn"]),
+        create_mon("blastoise", ["surf", "icebeam"]),
+        create_mon("ferrothorn", ["gyroball", "powerwhip"]),
+        create_mon("garchomp", ["earthquake", "dragonclaw"]),
+        create_mon("vaporeon", ["scald", "wish"]),
+        create_mon("venusaur", ["gigadrain", "sludgebomb"]),
+    ]
+
+
+def create_opponents():
+    return [
+        create_mon(species)
+        for species in (
+            "charizard",
+            "arcanine",
+            "heatran",
+            "volcarona",
+            "ninetales",
+            "infernape",
+        )
+    ]
+
+
+def test_matchup_matrix():
+    optimizer = TeamPreviewOptimizer()
+    team, opponents = create_team(), create_opponents()
+
+    matchups = optimizer.matchup_matrix(team, opponents)
+    assert matchups.shape == (6, 6)
+    assert matchups[1, 0] > 0  # blastoise vs charizard
+    assert matchups[2, 2] < 0  # ferrothorn vs heatran
+    assert matchups[3, 2] > matchups[0, 2]  # garchomp and scizor vs heatran
+
+    assert optimizer.matchup_matrix(team, []).shape == (6, 0)
+
+
+def test_selections():
+    brought, leading = _selections(6, 4, 2)
+    assert brought.shape == leading.shape == (90, 6)
+    assert (brought.sum(axis=1) == 4).all()
+    assert (leading.sum(axis=1) == 2).all()
+    assert not (leading & ~brought).any()
+
+    brought, leading = _selections(3, 3, 1)
+    assert brought.all() and leading.shape == (3, 3)
+
+
+def test_teampreview_doubles():
+    optimizer = TeamPreviewOptimizer()
+    battle = DoubleBattle("tag", "username", MagicMock())
+    battle._team = {f"p1: {mon.species}": mon for mon in create_team()}
+    battle._teampreview_opponent_team = set(create_opponents())
+    battle._max_team_size = 4
+
+    start = perf_counter()
+    order = optimizer.order(battle)
+    assert perf_counter() - start < 0.5
+
+    assert sorted(order) == [1, 2, 3, 4, 5, 6]
+    # Scizor and ferrothorn are left out, and water types lead
+    assert set(order[4:]) == {1, 3}
+    assert set(order[:2]) <= {2, 4, 5}
+    assert optimizer.teampreview(battle) == "/team " + "".join(map(str, order))
+
+
+def test_teampreview_singles():
+    optimizer = TeamPreviewOptimizer(lead_weight=1.0)
+    battle = Battle("tag", "username", MagicMock())
+    team = create_team()[:3]
+    battle._team = {f"p1: {mon.species}": mon for mon in team}
+    battle._teampreview_opponent_team = {create_mon("heatran")}
+
+    assert optimizer.lead_weight == 1.0
+    assert optimizer.order(battle)[0] == 2
+
+    battle._teampreview_opponent_team = set()
+    assert optimizer.teampreview(battle) == "/team 123"
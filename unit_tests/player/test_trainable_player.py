@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import pytest
+
+from poke_env.environment.battle import Battle
+from poke_env.player.trainable_player import TrainablePlayer
+from poke_env.player.trajectory_sink import RingBufferTrajectorySink
+from poke_env.player_configuration import PlayerConfiguration
+from poke_env.server_configuration import ServerConfiguration
+
+
+class BatchedPlayer(TrainablePlayer):
+    def action_to_move(self, action, battle):
+        return action
+
+    def battle_to_state(self, battle):
+        return battle.battle_tag
+
+    def state_to_action(self, state, battle):
+        return state + " action"
+
+    def replay(self, battle_history):
+        pass
+
+    def states_to_actions(self, states, battles):
+        self.batches.append(states)
+        return super().states_to_actions(states, battles)
+
+
+def create_player(max_batch_size, trajectory_sink=None):
+    player = BatchedPlayer(
+        PlayerConfiguration("username", None),
+        battle_format="gen8randombattle",
+        batch_timeout=0.01,
+        max_batch_size=max_batch_size,
+        server_configuration=ServerConfiguration("server.url", "auth.url"),
+        start_listening=False,
+        trajectory_sink=trajectory_sink,
+    )
+    player.batches = []
+    return player
+
+
+def test_unbatched_choose_move():
+    player = create_player(1)
+    battle = Battle("bat1", player.username, player.logger)
+
+    assert player.choose_move(battle) == "bat1 action"
+    assert player.training_data == {battle: [("bat1", "bat1 action")]}
+    assert player.batches == []
+
+
+@pytest.mark.asyncio
+async def test_batched_choose_move():
+    player = create_player(4)
+    battles = [Battle("bat%d" % i, player.username, player.logger) for i in range(3)]
+    for battle in battles:
+        player._battle_scheduler.battle_started(battle.battle_tag)
+
+    # Decisions are batched until every running battle awaits one
+    decisions = [asyncio.ensure_future(player.choose_move(b)) for b in battles[:2]]
+    await asyncio.sleep(0)
+    assert player.batches == []
+
+    decisions.append(asyncio.ensure_future(player.choose_move(battles[2])))
+    assert await asyncio.gather(*decisions) == [
+        "bat0 action",
+        "bat1 action",
+        "bat2 action",
+    ]
+    assert player.batches == [["bat0", "bat1", "bat2"]]
+    assert player.training_data[battles[1]] == [("bat1", "bat1 action")]
+
+    # Or until the batch timeout
+    assert await player.choose_move(battles[0]) == "bat0 action"
+    assert player.batches[1:] == [["bat0"]]
+    assert player.n_batches == 2
+
+
+def test_trajectory_sink():
+    sink = RingBufferTrajectorySink()
+    player = create_player(1, trajectory_sink=sink)
+    battle = Battle("bat1", player.username, player.logger)
+
+    player.choose_move(battle)
+    player.choose_move(battle)
+    assert len(sink) == 0
+
+    battle._won_by(player.username)
+    player._battle_finished_callback(battle)
+    assert player.training_data == {}
+    assert list(player._replay_data()) == [
+        ("bat1", True, ["bat1", "bat1"], ["bat1 action", "bat1 action"])
+    ]
+
+
+class OrderPlayer(BatchedPlayer):
+    def action_to_move(self, action, battle):
+        return self.choose_default_move()
+
+    async def _send_message(self, message, room):
+        self.sent_messages.append((message, room))
+
+
+@pytest.mark.asyncio
+async def test_handle_battle_request():
+    player = OrderPlayer(
+        PlayerConfiguration("username", None),
+        battle_format="gen8randombattle",
+        server_configuration=ServerConfiguration("server.url", "auth.url"),
+        start_listening=False,
+    )
+    player.sent_messages = []
+    battle = Battle("bat1", player.username, player.logger)
+
+    await player._handle_battle_request(battle)
+    assert player.sent_messages == [("/choose default", "bat1")]
+    assert player.training_data == {battle: [("bat1", "bat1 action")]}
+    assert player.decision_latencies["move"].count == 1
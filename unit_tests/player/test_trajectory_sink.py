@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from poke_env.player.trajectory_sink import (
+    MemmapTrajectorySink,
+    RingBufferTrajectorySink,
+    Trajectory,
+)
+
+
+def create_trajectory(i, length):
+    return Trajectory(
+        "bat%d" % i,
+        i % 2 == 0,
+        [np.full(3, i * 10 + step, dtype=np.float32) for step in range(length)],
+        [step for step in range(length)],
+    )
+
+
+def test_ring_buffer_sink():
+    sink = RingBufferTrajectorySink(capacity=2)
+    for i in range(3):
+        sink.add(create_trajectory(i, 2))
+
+    assert len(sink) == sink.capacity == 2
+    assert [trajectory.battle_tag for trajectory in sink] == ["bat1", "bat2"]
+
+    sink.clear()
+    assert list(sink.iter_trajectories()) == []
+
+
+def test_memmap_sink(tmp_path):
+    directory = str(tmp_path / "trajectories")
+    sink = MemmapTrajectorySink(directory, chunk_size=4)
+
+    # Trajectories span chunk boundaries
+    for i, length in enumerate([3, 6, 1]):
+        sink.add(create_trajectory(i, length))
+    assert len(sink) == 3
+    assert sink.n_steps == 10
+
+    with pytest.raises(ValueError):
+        sink.add(create_trajectory(3, 0))
+
+    def check(trajectories, lengths):
+        assert [t.battle_tag for t in trajectories] == [
+            "bat%d" % i for i in range(len(lengths))
+        ]
+        for i, (trajectory, length) in enumerate(zip(trajectories, lengths)):
+            assert trajectory.won == (i % 2 == 0)
+            assert trajectory.states.dtype == np.float32
+            assert trajectory.states[:, 0].tolist() == [
+                i * 10 + step for step in range(length)
+            ]
+            assert trajectory.actions.tolist() == list(range(length))
+
+    check(list(sink), [3, 6, 1])
+
+    # Reopening the directory appends to stored trajectories
+    reopened = MemmapTrajectorySink(directory)
+    reopened.add(create_trajectory(3, 4))
+    check(list(reopened), [3, 6, 1, 4])
+    assert reopened.n_steps == 14
+
+    reopened.clear()
+    assert len(reopened) == 0
+    assert len(MemmapTrajectorySink(directory)) == 0
+
+
+def test_memmap_sink_reopens_partially_written_directory(tmp_path):
+    directory = tmp_path / "trajectories"
+    sink = MemmapTrajectorySink(str(directory), chunk_size=4)
+    sink.add(create_trajectory(0, 3))
+
+    # Interrupted before the first trajectory was indexed
+    (directory / "trajectories.jsonl").unlink()
+    reopened = MemmapTrajectorySink(str(directory))
+    assert len(reopened) == 0
+    assert reopened.n_steps == 0
+
+    reopened.add(create_trajectory(1, 2))
+    reopened.add(create_trajectory(2, 3))
+    assert [t.battle_tag for t in reopened] == ["bat1", "bat2"]
+
+    # Interrupted while indexing the last trajectory
+    index = (directory / "trajectories.jsonl").read_text()
+    (directory / "trajectories.jsonl").write_text(index[:-10])
+    reopened = MemmapTrajectorySink(str(directory))
+    assert [t.battle_tag for t in reopened] == ["bat1"]
+    assert reopened.n_steps == 2
+
+    reopened.add(create_trajectory(3, 1))
+    trajectories = list(MemmapTrajectorySink(str(directory)))
+    assert [t.battle_tag for t in trajectories] == ["bat1", "bat3"]
+    assert trajectories[1].states[:, 0].tolist() == [30]
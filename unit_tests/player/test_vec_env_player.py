@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import numpy as np
+import pytest
+
+from poke_env.environment.battle import Battle
+from poke_env.environment.move import Move
+from poke_env.player.battle_order import BattleOrder
+from poke_env.player.vec_env_player import Gen8VecEnvSinglePlayer
+from poke_env.player_configuration import PlayerConfiguration
+from poke_env.server_configuration import ServerConfiguration
+
+
+class CustomVecEnvPlayer(Gen8VecEnvSinglePlayer):
+    def embed_battle(self, battle):
+        return np.array([int(battle.battle_tag[-1]), battle.turn])
+
+    def compute_reward(self, battle):
+        return 1.0 if battle.won else 0.0
+
+
+def create_player(n_envs):
+    player = CustomVecEnvPlayer(
+        n_envs,
+        player_configuration=PlayerConfiguration("username", None),
+        server_configuration=ServerConfiguration("server.url", "auth.url"),
+        start_listening=False,
+    )
+    player._start_new_battle = True
+    return player
+
+
+def create_battle(player, i):
+    battle = Battle("bat%d" % i, player.username, player.logger)
+    battle._available_moves = [Move("flamethrower")]
+    battle._player_role = "p1"
+    return battle
+
+
+def finish(player, battle):
+    battle._won_by(player.username)
+    player._battle_finished(battle)
+
+
+@pytest.mark.asyncio
+async def test_reset_and_step():
+    player = create_player(2)
+    battles = [create_battle(player, i) for i in range(3)]
+
+    orders = [asyncio.ensure_future(player.choose_move(b)) for b in battles[:2]]
+    observations = await player.async_reset()
+    assert observations.tolist() == [[0, 0], [1, 0]]
+
+    step = asyncio.ensure_future(player.async_step([0, 0]))
+    await asyncio.sleep(0.001)
+    for order in orders:
+        assert order.done()
+        assert order.result().message == "/choose move flamethrower"
+
+    battles[0].end_turn(1)
+    orders = [asyncio.ensure_future(player.choose_move(battles[0]))]
+    finish(player, battles[1])
+    await asyncio.sleep(0.001)
+    assert not step.done()
+
+    orders.append(asyncio.ensure_future(player.choose_move(battles[2])))
+    observations, rewards, dones, infos = await step
+
+    assert observations.tolist() == [[0, 1], [2, 0]]
+    assert rewards.tolist() == [0, 1]
+    assert dones.tolist() == [False, True]
+    assert infos[0]["action_mask"].tolist() == [True] + [False] * 21
+    assert infos[1]["terminal_observation"].tolist() == [1, 0]
+    assert infos[1]["action_mask"].tolist() == [True] + [False] * 21
+    assert player.action_masks.shape == (2, 22)
+
+    for order in orders:
+        order.cancel()
+
+
+@pytest.mark.asyncio
+async def test_complete_battles_and_battle_finished_during_choice():
+    player = create_player(1)
+    battles = [create_battle(player, i) for i in range(2)]
+
+    order = asyncio.ensure_future(player.choose_move(battles[0]))
+    await player.async_reset()
+
+    finish(player, battles[0])
+    assert isinstance(await order, BattleOrder)
+
+    order = asyncio.ensure_future(player.choose_move(battles[1]))
+    await asyncio.sleep(0.001)
+    await player._stop_new_battles()
+    assert (await order).message.startswith("/choose")
+
+    observations, _, dones, _ = await player.async_step([0])
+    assert observations.tolist() == [[0, 0]]
+    assert dones.tolist() == [True]
+
+    battle = create_battle(player, 3)
+    assert (await player.choose_move(battle)).message == "/choose move flamethrower"
+
+
+@pytest.mark.asyncio
+async def test_step_requires_reset():
+    player = create_player(1)
+    with pytest.raises(RuntimeError, match="async_reset"):
+        await player.async_step([0])
+    with pytest.raises(RuntimeError, match="async_reset"):
+        await player.async_forfeit(0)
+
+
+@pytest.mark.asyncio
+async def test_reset_times_out_without_new_battle():
+    player = create_player(1)
+    player.RESET_TIMEOUT = 0.01
+
+    with pytest.raises(EnvironmentError, match="no active battle"):
+        await player.async_reset()
+
+
+def test_run_requires_running_loop():
+    player = create_player(1)
+    with pytest.raises(EnvironmentError):
+        player.reset()
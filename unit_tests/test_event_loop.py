@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import sys
+
+from unittest.mock import patch
+
+from poke_env import event_loop
+
+
+def test_uvloop_fallback(monkeypatch):
+    monkeypatch.setitem(sys.modules, "uvloop", None)
+    policy = asyncio.get_event_loop_policy()
+
+    assert not event_loop.uvloop_available()
+    assert not event_loop.set_event_loop_policy(use_uvloop=True)
+    assert isinstance(asyncio.get_event_loop_policy(), asyncio.DefaultEventLoopPolicy)
+    assert asyncio.get_event_loop_policy() is policy
+
+    loop = event_loop.new_event_loop(use_uvloop=True)
+    assert isinstance(loop, asyncio.AbstractEventLoop)
+    loop.close()
+
+
+def test_run():
+    async def main():
+        await asyncio.sleep(0)
+        return asyncio.get_event_loop()
+
+    try:
+        # Runs do not depend on a current loop, nor leave a closed one behind
+        asyncio.set_event_loop(None)
+        loop = event_loop.run(main(), use_uvloop=False)
+        assert loop.is_closed()
+        assert event_loop.run(main(), use_uvloop=False) is not loop
+    finally:
+        asyncio.set_event_loop(asyncio.new_event_loop())
+
+
+def test_set_event_loop_policy_from_environment(monkeypatch):
+    with patch("poke_env.event_loop.set_event_loop_policy") as set_policy:
+        monkeypatch.setenv(event_loop.EVENT_LOOP_ENVIRONMENT_VARIABLE, "asyncio")
+        event_loop._set_event_loop_policy_from_environment()
+        set_policy.assert_not_called()
+
+        monkeypatch.setenv(event_loop.EVENT_LOOP_ENVIRONMENT_VARIABLE, "uvloop")
+        event_loop._set_event_loop_policy_from_environment()
+        set_policy.assert_called_once_with(use_uvloop=True)